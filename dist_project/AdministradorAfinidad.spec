@@ -6,7 +6,7 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[],
-    hiddenimports=['pygame', 'pynput', 'psutil', 'keyboard', 'tkinter', 'threading', 'json', 'ctypes', 'winsound'],
+    hiddenimports=['pygame', 'psutil', 'keyboard', 'tkinter', 'threading', 'json', 'ctypes'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
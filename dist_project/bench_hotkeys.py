@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Benchmark de latencia hotkey -> afinidad aplicada
+Ejecuta TaskManager.execute_task, el callback de hotkey (cola + ejecutor) y secuencias de
+teclas reproducidas por el backend falso contra un proveedor sintético de procesos y emite
+p50/p95/p99 y rendimiento en JSON
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+
+import psutil
+
+# Agregar el directorio src al path para importar los módulos
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from task_manager import TaskManager
+from hotkey_dispatch import HotkeyDispatcher
+from input_backends import FakeBackend, script_events
+
+
+class SyntheticProcess:
+    """Proceso sintético con la interfaz de psutil.Process que usa execute_task"""
+
+    def __init__(self, pid, name, denied=False, syscall_us=0):
+        self.pid = pid
+        self._name = name
+        self.denied = denied
+        self.syscall_us = syscall_us
+        self.affinity = None
+        self.calls = 0
+
+    def name(self):
+        return self._name
+
+    def is_running(self):
+        return True
+
+    def cpu_affinity(self, cpus=None):
+        self.calls += 1
+        if self.syscall_us:
+            time.sleep(self.syscall_us / 1_000_000)
+        if self.denied:
+            raise psutil.AccessDenied(self.pid, self._name)
+        if cpus is None:
+            return self.affinity
+        self.affinity = list(cpus)
+
+
+class SyntheticProvider:
+    """Proveedor de procesos por nombre con N procesos repartidos entre varios nombres"""
+
+    def __init__(self, processes, names, denied_ratio, syscall_us, seed):
+        rng = random.Random(seed)
+        self.by_name = {}
+        for i in range(processes):
+            name = names[i % len(names)]
+            proc = SyntheticProcess(1000 + i, name, rng.random() < denied_ratio, syscall_us)
+            self.by_name.setdefault(name.lower(), []).append(proc)
+
+    def __call__(self, process_name):
+        return list(self.by_name.get(process_name.lower(), ()))
+
+
+class BenchManager:
+    """Administrador sin interfaz: cuenta los mensajes y notificaciones"""
+
+    root = None
+
+    def __init__(self):
+        self.messages = {}
+        self.notifications = 0
+
+    def log_message(self, message, level="info"):
+        self.messages[level] = self.messages.get(level, 0) + 1
+
+    def show_notification(self, message):
+        self.notifications += 1
+
+
+def percentile(sorted_values, pct):
+    """Percentil por rango más cercano sobre una lista ordenada"""
+    if not sorted_values:
+        return None
+    rank = max(1, int(round(pct / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(latencies, elapsed):
+    """p50/p95/p99 en milisegundos y trabajos por segundo"""
+    values = sorted(latencies)
+    return {
+        'count': len(values),
+        'p50_ms': round(percentile(values, 50) * 1000, 4),
+        'p95_ms': round(percentile(values, 95) * 1000, 4),
+        'p99_ms': round(percentile(values, 99) * 1000, 4),
+        'max_ms': round(values[-1] * 1000, 4),
+        'throughput_per_s': round(len(values) / elapsed, 1) if elapsed else None,
+    }
+
+
+def build_task_manager(args):
+    """TaskManager con M tareas y el proveedor sintético"""
+    names = [f"bench{i}.exe" for i in range(args.names)]
+    cpu_count = psutil.cpu_count() or 1
+
+    # El backend falso evita instalar un hook sobre el teclado real
+    task_manager = TaskManager(BenchManager(), input_backend=FakeBackend())
+    task_manager.process_provider = SyntheticProvider(
+        args.processes, names, args.denied_ratio, args.syscall_us, args.seed
+    )
+    # Cola y histórico con capacidad para todas las pulsaciones del benchmark
+    task_manager.dispatcher = HotkeyDispatcher(task_manager.execute_task, max_pending=args.iterations,
+                                               history_size=args.iterations)
+    task_manager.hotkey_cooldown = args.cooldown_ms / 1000
+    task_manager.automated_tasks = {
+        f"task{i}": {
+            'name': f"Bench {i}",
+            'process_name': names[i % len(names)],
+            'target_affinity': [i % cpu_count],
+            'hotkey': f"ctrl+alt+f{i % 12 + 1}",
+            'apply_to_all': args.apply_to_all,
+        }
+        for i in range(args.tasks)
+    }
+    return task_manager
+
+
+def bench_execute_task(task_manager, args):
+    """Llamadas directas a execute_task en el hilo actual"""
+    task_ids = list(task_manager.automated_tasks)
+    latencies = []
+    start = time.perf_counter()
+    for i in range(args.iterations):
+        t0 = time.perf_counter()
+        task_manager.execute_task(task_ids[i % len(task_ids)])
+        latencies.append(time.perf_counter() - t0)
+    return summarize(latencies, time.perf_counter() - start)
+
+
+def bench_hotkey_callback(task_manager, args):
+    """Pulsación simulada -> cola -> ejecutor; latencia medida hasta terminar la tarea"""
+    callbacks = [task_manager._make_hotkey_callback(task['hotkey'], task_id)
+                 for task_id, task in task_manager.automated_tasks.items()]
+    dispatcher = task_manager.dispatcher
+    dispatcher.start()
+
+    press_times = []
+    start = time.perf_counter()
+    for i in range(args.iterations):
+        t0 = time.perf_counter()
+        callbacks[i % len(callbacks)]()
+        press_times.append(time.perf_counter() - t0)
+        if args.press_interval_ms:
+            time.sleep(args.press_interval_ms / 1000)
+    while dispatcher.completed < dispatcher.submitted:
+        time.sleep(0.001)
+    elapsed = time.perf_counter() - start
+    dispatcher.stop()
+
+    result = summarize(list(dispatcher.latencies), elapsed)
+    result['rejected'] = dispatcher.rejected
+    result['coalesced'] = dispatcher.coalesced
+    result['executed'] = dispatcher.completed
+    result['callback'] = summarize(press_times, elapsed)
+    return result
+
+
+def bench_key_events(task_manager, args):
+    """Guion de teclas -> motor de hotkeys -> cola -> ejecutor, sin teclado real
+
+    Cada hotkey va precedido de --noise-keys pulsaciones que no son hotkeys; el guion es
+    determinista, así que dos ejecuciones con la misma semilla entregan los mismos eventos.
+    """
+    rng = random.Random(args.seed)
+    hotkeys = [task['hotkey'] for task in task_manager.automated_tasks.values()]
+    script = []
+    for i in range(args.iterations):
+        script += [rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(args.noise_keys)]
+        script.append(hotkeys[i % len(hotkeys)])
+    events = script_events(script)
+
+    task_manager.sync_hotkeys()
+    engine = task_manager.hotkey_engine
+    engine.start()
+    dispatcher = task_manager.dispatcher
+    dispatcher.start()
+
+    start = time.perf_counter()
+    engine.backend.replay(events, rate=args.key_rate or None)
+    delivered = time.perf_counter() - start
+    while dispatcher.completed < dispatcher.submitted:
+        time.sleep(0.001)
+    elapsed = time.perf_counter() - start
+    dispatcher.stop()
+    engine.stop()
+
+    result = summarize(list(dispatcher.latencies), elapsed) if dispatcher.completed else {}
+    result.update({
+        'events': engine.events,
+        'matches': engine.matches,
+        'events_per_s': round(engine.events / delivered, 1) if delivered else None,
+        'engine_us_per_event': round(delivered / engine.events * 1_000_000, 3) if engine.events else None,
+        'rejected': dispatcher.rejected,
+        'coalesced': dispatcher.coalesced,
+        'executed': dispatcher.completed,
+    })
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de latencia hotkey -> afinidad")
+    parser.add_argument('--processes', type=int, default=500, help="Procesos sintéticos (N)")
+    parser.add_argument('--names', type=int, default=50, help="Nombres de proceso distintos")
+    parser.add_argument('--tasks', type=int, default=20, help="Tareas configuradas (M)")
+    parser.add_argument('--denied-ratio', type=float, default=0.1, help="Fracción con acceso denegado")
+    parser.add_argument('--syscall-us', type=int, default=0, help="Coste simulado de cpu_affinity")
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--press-interval-ms', type=float, default=0.0)
+    parser.add_argument('--cooldown-ms', type=float, default=0.0,
+                        help="Enfriamiento por tarea; las pulsaciones repetidas se agrupan")
+    parser.add_argument('--noise-keys', type=int, default=4,
+                        help="Pulsaciones sin hotkey antes de cada hotkey en el guion de teclas")
+    parser.add_argument('--key-rate', type=float, default=0.0,
+                        help="Eventos de teclado por segundo del guion (0 = sin límite)")
+    parser.add_argument('--apply-to-all', action='store_true', help="Aplicar a todas las instancias")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help="Archivo JSON de salida (por defecto stdout)")
+    args = parser.parse_args()
+    if args.output:
+        args.output = os.path.abspath(args.output)
+
+    # Trabajar en un directorio temporal para no cargar ni tocar automated_tasks.json
+    original_dir = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            report = {
+                'config': vars(args),
+                'python': sys.version.split()[0],
+                'execute_task': bench_execute_task(build_task_manager(args), args),
+                'hotkey_callback': bench_hotkey_callback(build_task_manager(args), args),
+                'key_events': bench_key_events(build_task_manager(args), args),
+            }
+        finally:
+            os.chdir(original_dir)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+        print(f"✅ Resultados guardados en {args.output}")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
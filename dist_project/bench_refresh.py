@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Benchmark del refresco incremental de la lista de procesos
+Compara la reconstrucción completa de un ttk.Treeview con VirtualProcessList.set_rows sobre
+el mismo widget real y la misma secuencia de instantáneas (necesita pantalla)
+"""
+
+import os
+import sys
+import time
+import random
+from array import array
+
+# Agregar el directorio src al path para importar los módulos
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+import tkinter as tk
+from tkinter import ttk
+
+from process_view import VirtualProcessList
+
+COLUMNS = ('PID', 'Nombre', 'CPU%', 'Memoria')
+WIDTHS = (80, 200, 80, 100)
+
+
+def make_rows(pids):
+    return {pid: (pid, f"proc{pid}.exe", "0.0%", f"{pid % 500 / 10:.1f}") for pid in pids}
+
+
+def mutate(rows, churn, next_pid):
+    """Simula la rotación de procesos: churn procesos salen, churn entran y churn cambian de CPU%"""
+    pids = list(rows)
+    new_rows = dict(rows)
+    for pid in random.sample(pids, churn):
+        del new_rows[pid]
+    for pid in range(next_pid, next_pid + churn):
+        new_rows[pid] = (pid, f"proc{pid}.exe", "0.0%", "1.0")
+    for pid in random.sample(list(new_rows), churn):
+        values = new_rows[pid]
+        new_rows[pid] = (values[0], values[1], f"{random.random() * 100:.1f}%", values[3])
+    return new_rows, next_pid + churn
+
+
+def make_sequence(total, churn, refreshes):
+    """Instantánea inicial y las siguientes; ambos métodos reciben exactamente las mismas"""
+    random.seed(total * 1000 + churn)
+    rows = make_rows(range(1, total + 1))
+    sequence, current, next_pid = [], rows, total + 1
+    for _ in range(refreshes):
+        current, next_pid = mutate(current, churn, next_pid)
+        sequence.append(current)
+    return rows, sequence
+
+
+def full_rebuild(tree, rows):
+    tree.delete(*tree.get_children())
+    for pid in sorted(rows):
+        tree.insert('', 'end', values=rows[pid])
+
+
+def bench_full(root, rows, sequence):
+    """Comportamiento anterior: vaciar el Treeview y volver a insertar todas las filas"""
+    tree = ttk.Treeview(root, columns=COLUMNS, show='headings', height=25)
+    tree.pack()
+    full_rebuild(tree, rows)
+    root.update_idletasks()
+    start = time.perf_counter()
+    for current in sequence:
+        full_rebuild(tree, current)
+        root.update_idletasks()
+    elapsed = time.perf_counter() - start
+    tree.destroy()
+    return elapsed * 1000 / len(sequence)
+
+
+def bench_virtual(root, rows, sequence):
+    """Lista virtualizada: diferencias en el modelo y solo las filas visibles en el widget"""
+    view = VirtualProcessList(root, COLUMNS, WIDTHS)
+    view.pack()
+    view.set_rows(array('I', sorted(rows)), rows.__getitem__)
+    root.update_idletasks()
+    updated = 0
+    start = time.perf_counter()
+    for current in sequence:
+        updated += view.set_rows(array('I', sorted(current)), current.__getitem__)[2]
+        root.update_idletasks()
+    elapsed = time.perf_counter() - start
+    view.destroy()
+    return elapsed * 1000 / len(sequence), updated / len(sequence)
+
+
+def main():
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"❌ El benchmark necesita una pantalla para crear widgets de Tk reales: {e}")
+        return 1
+    root.withdraw()
+
+    print("📊 Benchmark de refresco de la lista de procesos (ttk.Treeview real en ambos casos)")
+    print(f"{'procesos':>9} {'rotación':>9} {'completo ms':>12} {'virtual ms':>11} {'mejora':>7} {'filas/refresco':>15}")
+    for total in (1000, 4000, 8000):
+        for churn in (0, 10, 100):
+            rows, sequence = make_sequence(total, churn, refreshes=10)
+            full_ms = bench_full(root, rows, sequence)
+            virtual_ms, updated = bench_virtual(root, rows, sequence)
+            print(f"{total:>9} {churn:>9} {full_ms:>12.2f} {virtual_ms:>11.2f} "
+                  f"{full_ms / virtual_ms:>6.1f}x {updated:>15.1f}")
+    root.destroy()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
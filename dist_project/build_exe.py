@@ -33,14 +33,12 @@ def main():
         "--add-data=task_manager.py;.",       # Incluir módulos
         "--add-data=ui_components.py;.",      # Incluir módulos
         "--hidden-import=pygame",             # Importaciones ocultas
-        "--hidden-import=pynput",
         "--hidden-import=psutil", 
         "--hidden-import=keyboard",
         "--hidden-import=tkinter",
         "--hidden-import=threading",
         "--hidden-import=json",
         "--hidden-import=ctypes",
-        "--hidden-import=winsound",
         "--clean",                            # Limpiar cache
         "main.py"
     ]
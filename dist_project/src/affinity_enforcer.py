@@ -0,0 +1,103 @@
+"""
+Aplicación persistente de afinidad para el Administrador de Afinidad
+Vuelve a aplicar la afinidad de las tareas marcadas a los procesos nuevos que detecta el muestreador
+"""
+
+import time
+from typing import Dict, List
+
+import psutil
+
+from affinity_ops import STATUS_LABELS, STATUS_OK, apply_affinity
+from cgroup_cpuset import CgroupUnavailable
+from process_rules import RuleSet
+
+
+class AffinityEnforcer:
+    """Aplica las tareas con 'enforce' a cada proceso nuevo que cumple sus reglas
+
+    No hace recorridos propios: recibe las altas que calcula el muestreador entre dos
+    instantáneas consecutivas y evalúa cada proceso nuevo una vez con el RuleSet compilado,
+    sin importar cuántas tareas haya. El retraso máximo es el intervalo del muestreador
+    más lo que tarde la llamada al sistema.
+    """
+
+    def __init__(self, task_manager):
+        self.task_manager = task_manager
+        self._rules = RuleSet([])
+        self.enforced = 0
+        self.failed = 0
+        self.last_enforced = None
+
+    def rebuild(self):
+        """Compila las reglas de las tareas marcadas para aplicación persistente"""
+        self._rules = RuleSet.from_tasks(self.task_manager.automated_tasks, lambda task: task.get('enforce'))
+
+    def is_active(self) -> bool:
+        return bool(len(self._rules))
+
+    def on_snapshot(self, snapshot, added: List[int]):
+        """Listener del muestreador: recibe los índices de los procesos nuevos de la instantánea"""
+        if not added or not len(self._rules):
+            return
+        # Evaluar las reglas y aplicar fuera del hilo del muestreador
+        self.task_manager._get_apply_pool().submit(self._match_and_enforce, self._rules, snapshot, added)
+
+    def _match_and_enforce(self, rules: RuleSet, snapshot, added: List[int]):
+        matches = []
+        for i in added:
+            task_ids = rules.match(snapshot, i)
+            if task_ids:
+                matches.append((snapshot.pids[i], snapshot.create_times[i], task_ids))
+        rules.prune(snapshot)
+        if matches:
+            self._enforce(matches)
+
+    def _enforce(self, matches):
+        for pid, create_time, task_ids in matches:
+            # Si varias tareas comparten proceso se aplica la última, como al pulsarlas en orden
+            task_id = task_ids[-1]
+            task = self.task_manager.automated_tasks.get(task_id)
+            if task is None:
+                continue
+            try:
+                proc = self.task_manager.get_process(pid, create_time)
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+
+            cpus = self.task_manager._resolve_task_affinity(task)
+            result = self._apply(task_id, task, proc, cpus)
+            if result.status != STATUS_OK:
+                self.failed += 1
+                self.task_manager.log_message(
+                    f"Afinidad persistente: {task['process_name']} (PID: {pid}) "
+                    f"{STATUS_LABELS[result.status]}", "warning"
+                )
+                continue
+
+            self.task_manager._apply_task_extras(task, [proc])
+            self.enforced += 1
+            self.last_enforced = time.time()
+            self.task_manager.log_message(
+                f"Afinidad persistente aplicada a {task['process_name']} (PID: {pid}): "
+                f"{', '.join(f'CPU{cpu}' for cpu in cpus)}", "success"
+            )
+
+    def _apply(self, task_id: str, task: Dict, proc, cpus: List[int]):
+        """Mete el proceso en el cpuset de la tarea o, si no hay cgroups, le fija la afinidad"""
+        cgroups = self.task_manager.cgroups
+        if task.get('use_cgroup') and cgroups.available():
+            try:
+                cgroups.set_cpus(task_id, cpus)
+                return cgroups.attach(task_id, [proc.pid])[0]
+            except (CgroupUnavailable, OSError):
+                pass
+        return apply_affinity(proc, cpus)
+
+    def stats(self) -> Dict:
+        return {
+            'rules': len(self._rules),
+            'enforced': self.enforced,
+            'failed': self.failed,
+            'last_enforced': self.last_enforced,
+        }
@@ -0,0 +1,209 @@
+"""
+Operaciones de afinidad sobre varios procesos para el Administrador de Afinidad
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import psutil
+
+# Resultado de aplicar afinidad a un proceso
+STATUS_OK = "ok"
+STATUS_ACCESS_DENIED = "access_denied"
+STATUS_GONE = "gone"
+STATUS_ERROR = "error"
+STATUS_MISMATCH = "mismatch"
+STATUS_UNSUPPORTED = "unsupported"
+STATUS_NOT_FOUND = "not_found"
+
+STATUS_LABELS = {
+    STATUS_OK: "aplicado",
+    STATUS_ACCESS_DENIED: "acceso denegado",
+    STATUS_GONE: "terminado",
+    STATUS_ERROR: "error",
+    STATUS_MISMATCH: "no verificado",
+    STATUS_UNSUPPORTED: "no soportado",
+    STATUS_NOT_FOUND: "no encontrado",
+}
+
+
+class AffinityResult(NamedTuple):
+    """Resultado de aplicar afinidad a un proceso concreto"""
+    pid: int
+    status: str
+    detail: str = ""
+
+
+def apply_affinity(proc, cpus: List[int]) -> AffinityResult:
+    """Aplica la afinidad a un proceso y clasifica el resultado"""
+    try:
+        proc.cpu_affinity(cpus)
+        return AffinityResult(proc.pid, STATUS_OK)
+    except psutil.AccessDenied:
+        return AffinityResult(proc.pid, STATUS_ACCESS_DENIED)
+    except (psutil.NoSuchProcess, psutil.ZombieProcess):
+        return AffinityResult(proc.pid, STATUS_GONE)
+    except Exception as e:
+        return AffinityResult(proc.pid, STATUS_ERROR, str(e))
+
+
+def apply_affinity_parallel(processes: Iterable, cpus: List[int],
+                            executor: Optional[ThreadPoolExecutor] = None,
+                            max_workers: int = 8,
+                            verify: Optional[Callable[[Any], bool]] = None) -> List[AffinityResult]:
+    """Aplica la misma afinidad a varios procesos en paralelo con un pool acotado
+
+    Args:
+        processes: Procesos (psutil.Process o equivalentes) a modificar
+        cpus: Lista de CPUs lógicas
+        executor: Pool a reutilizar; si no se indica se crea uno temporal
+        max_workers: Tamaño del pool temporal
+        verify: Comprobación previa de cada proceso (p. ej. PID no reutilizado); si falla
+            el proceso se da por terminado sin tocarlo
+
+    Returns:
+        Un AffinityResult por proceso, en el mismo orden
+    """
+    def apply(proc):
+        if verify is not None and not verify(proc):
+            return AffinityResult(proc.pid, STATUS_GONE)
+        return apply_affinity(proc, cpus)
+    return _run_parallel(apply, list(processes), executor, max_workers)
+
+
+def _run_parallel(func, items: list, executor: Optional[ThreadPoolExecutor], max_workers: int) -> list:
+    """Aplica func a cada elemento en el pool indicado (o en uno temporal), conservando el orden"""
+    if len(items) <= 1:
+        return [func(item) for item in items]
+    if executor is not None:
+        return list(executor.map(func, items))
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as pool:
+        return list(pool.map(func, items))
+
+
+class BatchChange(NamedTuple):
+    """Cambio de afinidad de un proceso dentro de un lote, con la afinidad anterior"""
+    pid: int
+    status: str
+    previous: Optional[List[int]] = None
+    detail: str = ""
+
+
+class BatchResult(NamedTuple):
+    """Resultado de un lote de afinidades"""
+    changes: List[BatchChange]
+    rolled_back: bool
+    rollback: List[AffinityResult]
+
+    @property
+    def failures(self) -> List[BatchChange]:
+        """Cambios que no se aplicaron (sin contar procesos ya terminados)"""
+        return [change for change in self.changes if change.status not in (STATUS_OK, STATUS_GONE)]
+
+
+def resolve_selector(selector) -> list:
+    """Procesos que corresponden a un selector: psutil.Process, PID o nombre de ejecutable"""
+    if isinstance(selector, str):
+        return find_processes_by_name([selector])[selector]
+    if isinstance(selector, int):
+        return [psutil.Process(selector)]
+    return [selector]
+
+
+def find_processes_by_name(names: Iterable[str]) -> Dict[str, list]:
+    """Procesos de cada nombre de ejecutable con un único recorrido de process_iter"""
+    wanted = {}
+    for name in names:
+        wanted.setdefault(name.lower(), []).append(name)
+    found = {name: [] for names in wanted.values() for name in names}
+    if wanted:
+        for proc in psutil.process_iter(['name']):
+            for name in wanted.get((proc.info['name'] or '').lower(), ()):
+                found[name].append(proc)
+    return found
+
+
+def _selector_pid(selector) -> int:
+    """PID de un selector para los informes (-1 si es un nombre)"""
+    if isinstance(selector, int):
+        return selector
+    return getattr(selector, 'pid', -1)
+
+
+def _swap_affinity(proc, cpus: List[int]) -> BatchChange:
+    """Guarda la afinidad actual y aplica la nueva"""
+    try:
+        previous = proc.cpu_affinity()
+        if sorted(previous) != sorted(cpus):
+            proc.cpu_affinity(cpus)
+        return BatchChange(proc.pid, STATUS_OK, previous)
+    except psutil.AccessDenied:
+        return BatchChange(proc.pid, STATUS_ACCESS_DENIED)
+    except (psutil.NoSuchProcess, psutil.ZombieProcess):
+        return BatchChange(proc.pid, STATUS_GONE)
+    except Exception as e:
+        return BatchChange(proc.pid, STATUS_ERROR, detail=str(e))
+
+
+def apply_affinity_batch(changes: Iterable[Tuple[Any, Sequence[int]]],
+                         failure_threshold: float = 0.0,
+                         executor: Optional[ThreadPoolExecutor] = None,
+                         max_workers: int = 8,
+                         resolve_names: Callable[[Iterable[str]], Dict[str, list]] = find_processes_by_name
+                         ) -> BatchResult:
+    """Aplica un lote de afinidades de forma concurrente y todo o nada
+
+    Args:
+        changes: Pares (selector de proceso, CPUs); el selector es un psutil.Process, un PID
+            o un nombre de ejecutable
+        failure_threshold: Fracción de fallos tolerada; si se supera se restaura
+            la afinidad anterior de todos los procesos modificados del lote
+        executor: Pool a reutilizar; si no se indica se crea uno temporal
+        max_workers: Tamaño del pool temporal
+        resolve_names: Función nombres -> {nombre: procesos}; se llama una vez con todos los
+            nombres del lote
+
+    Returns:
+        BatchResult con un BatchChange por proceso (o por nombre sin procesos, como
+        no encontrado) y el resultado de la reversión
+    """
+    changes = list(changes)
+    by_name = resolve_names({selector for selector, _ in changes if isinstance(selector, str)})
+    targets = []
+    resolve_failures = []
+    for selector, cpus in changes:
+        try:
+            if isinstance(selector, str):
+                processes = by_name.get(selector) or []
+                if not processes:
+                    resolve_failures.append(BatchChange(-1, STATUS_NOT_FOUND, detail=selector))
+                    continue
+            else:
+                processes = resolve_selector(selector)
+            targets.extend((proc, list(cpus)) for proc in processes)
+        except psutil.AccessDenied:
+            resolve_failures.append(BatchChange(_selector_pid(selector), STATUS_ACCESS_DENIED))
+        except (psutil.NoSuchProcess, psutil.ZombieProcess):
+            resolve_failures.append(BatchChange(_selector_pid(selector), STATUS_GONE))
+
+    applied = _run_parallel(lambda target: _swap_affinity(*target), targets, executor, max_workers)
+    result = BatchResult(resolve_failures + applied, False, [])
+
+    total = len(result.changes)
+    if not total or len(result.failures) <= failure_threshold * total:
+        return result
+
+    # Umbral superado: deshacer los cambios aplicados
+    to_restore = [(proc, change.previous) for (proc, _), change in zip(targets, applied)
+                  if change.status == STATUS_OK]
+    rollback = _run_parallel(lambda target: apply_affinity(*target), to_restore, executor, max_workers)
+    return BatchResult(result.changes, True, rollback)
+
+
+def summarize_results(results: List[AffinityResult]) -> str:
+    """Resumen de una línea: "3 aplicado, 1 acceso denegado" """
+    counts = {}
+    for result in results:
+        counts[result.status] = counts.get(result.status, 0) + 1
+    return ", ".join(f"{counts[status]} {STATUS_LABELS[status]}"
+                     for status in STATUS_LABELS if status in counts)
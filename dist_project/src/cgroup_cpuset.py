@@ -0,0 +1,225 @@
+"""
+Backend de cpuset de cgroup v2 para el Administrador de Afinidad
+Agrupa los procesos de una tarea en un cgroup propio: los hijos heredan la máscara y
+cambiar de perfil es una única escritura en cpuset.cpus
+"""
+
+import errno
+import os
+import re
+from typing import Iterable, List, Optional
+
+from affinity_ops import STATUS_ACCESS_DENIED, STATUS_ERROR, STATUS_GONE, STATUS_OK, AffinityResult
+from cpu_topology import format_cpu_list, parse_cpu_list
+
+CGROUP_ROOT = "/sys/fs/cgroup"
+MANAGED_GROUP = "process-affinity"
+PROC_ROOT = "/proc"
+
+
+class CgroupUnavailable(Exception):
+    """El cgroup v2 con el controlador cpuset no existe o no se puede escribir"""
+
+
+def read_process_cgroup(pid, proc_root: str = PROC_ROOT) -> Optional[str]:
+    """Ruta cgroup v2 ("/user.slice/...") de un proceso ("self" para el propio); None si no hay"""
+    try:
+        with open(os.path.join(proc_root, str(pid), "cgroup"), 'r') as f:
+            for line in f:
+                if line.startswith("0::"):
+                    return line[3:].strip() or "/"
+    except OSError:
+        pass
+    return None
+
+
+class CgroupCpusetBackend:
+    """Un cgroup hoja por tarea bajo <base>/process-affinity con su propio cpuset.cpus
+
+    La base es el cgroup padre del de la aplicación (el delegado por systemd en una sesión de
+    usuario), así no se toca el subtree_control de la raíz salvo que no haya otra opción.
+    Cada proceso movido recuerda su cgroup original para devolverlo al soltarlo.
+    """
+
+    def __init__(self, root: str = CGROUP_ROOT, managed: str = MANAGED_GROUP, proc_root: str = PROC_ROOT):
+        self.root = root
+        self.managed = managed
+        self.proc_root = proc_root
+        self.managed_path = os.path.join(root, managed)
+        self._origins = {}  # id de tarea -> {pid: cgroup original}
+        self._available = None
+
+    @staticmethod
+    def _read(path: str) -> str:
+        with open(path, 'r') as f:
+            return f.read().strip()
+
+    @staticmethod
+    def _write(path: str, value: str):
+        with open(path, 'w') as f:
+            f.write(value)
+
+    def available(self) -> bool:
+        """Comprueba (una vez) que hay cgroup v2 con cpuset y que el grupo gestionado es escribible"""
+        if self._available is None:
+            try:
+                self._prepare()
+                self._available = True
+            except (OSError, CgroupUnavailable):
+                self._available = False
+        return self._available
+
+    def _host_path(self, cgroup: str) -> str:
+        """Ruta en el sistema de ficheros de una ruta cgroup ("/a/b")"""
+        return os.path.join(self.root, cgroup.lstrip("/"))
+
+    def _base_candidates(self) -> List[str]:
+        """Dónde crear el grupo gestionado: el padre del cgroup propio y, en último caso, la raíz"""
+        candidates = []
+        own = read_process_cgroup("self", self.proc_root)
+        if own and own != "/":
+            parent = os.path.dirname(own.rstrip("/"))
+            if parent != "/":
+                candidates.append(self._host_path(parent))
+        candidates.append(self.root)
+        return candidates
+
+    def _prepare(self):
+        """Crea el grupo gestionado y delega el controlador cpuset a sus hijos"""
+        if not os.path.exists(os.path.join(self.root, "cgroup.controllers")):
+            raise CgroupUnavailable("No hay jerarquía cgroup v2")
+        error = CgroupUnavailable("El controlador cpuset no está disponible")
+        for base in self._base_candidates():
+            controllers_file = os.path.join(base, "cgroup.controllers")
+            try:
+                if "cpuset" not in self._read(controllers_file).split():
+                    continue
+                managed_path = os.path.join(base, self.managed)
+                self._enable_cpuset(base)
+                os.makedirs(managed_path, exist_ok=True)
+                self._enable_cpuset(managed_path)
+            except OSError as e:
+                error = e
+                continue
+            self.managed_path = managed_path
+            return
+        raise error
+
+    def _enable_cpuset(self, path: str):
+        subtree = os.path.join(path, "cgroup.subtree_control")
+        current = self._read(subtree).split() if os.path.exists(subtree) else []
+        if "cpuset" not in current:
+            self._write(subtree, "+cpuset")
+
+    def group_path(self, task_id: str) -> str:
+        return os.path.join(self.managed_path, "task-" + re.sub(r'[^A-Za-z0-9_.-]', '_', task_id))
+
+    def set_cpus(self, task_id: str, cpus: List[int]):
+        """Fija las CPUs del grupo de la tarea (lo crea si no existe); afecta a todos sus procesos"""
+        if not self.available():
+            raise CgroupUnavailable("cgroup cpuset no disponible")
+        path = self.group_path(task_id)
+        os.makedirs(path, exist_ok=True)
+        self._write(os.path.join(path, "cpuset.cpus"), format_cpu_list(cpus))
+
+    def members(self, task_id: str) -> List[int]:
+        """PIDs que están en el grupo de la tarea"""
+        try:
+            text = self._read(os.path.join(self.group_path(task_id), "cgroup.procs"))
+        except OSError:
+            return []
+        return [int(line) for line in text.split() if line.isdigit()]
+
+    def _move(self, pid: int, group: str):
+        """Mueve un proceso a un cgroup; el núcleo solo admite un PID por escritura"""
+        with open(os.path.join(group, "cgroup.procs"), 'a') as f:
+            f.write(f"{pid}\n")
+
+    def _move_result(self, pid: int, group: str) -> AffinityResult:
+        try:
+            self._move(pid, group)
+            return AffinityResult(pid, STATUS_OK)
+        except PermissionError:
+            return AffinityResult(pid, STATUS_ACCESS_DENIED)
+        except OSError as e:
+            status = STATUS_GONE if e.errno == errno.ESRCH else STATUS_ERROR
+            return AffinityResult(pid, status, "" if status == STATUS_GONE else str(e))
+
+    def attach(self, task_id: str, pids: Iterable[int]) -> List[AffinityResult]:
+        """Mueve procesos al grupo de la tarea recordando el cgroup del que venían"""
+        group = self.group_path(task_id)
+        already = set(self.members(task_id))
+        origins = self._origins.setdefault(task_id, {})
+        results = []
+        for pid in pids:
+            if pid in already:
+                results.append(AffinityResult(pid, STATUS_OK))
+                continue
+            origin = read_process_cgroup(pid, self.proc_root)
+            result = self._move_result(pid, group)
+            if result.status == STATUS_OK and origin is not None:
+                origins[pid] = origin
+            results.append(result)
+        return results
+
+    def detach(self, task_id: str, pids: Optional[Iterable[int]] = None) -> List[AffinityResult]:
+        """Devuelve procesos del grupo (todos si pids es None) a su cgroup original
+
+        Los hijos creados dentro del grupo no tienen origen propio y vuelven al de otro proceso
+        de la tarea (o al cgroup de la aplicación). Si el grupo queda vacío se elimina.
+        """
+        origins = self._origins.get(task_id, {})
+        members = self.members(task_id)
+        targets = members if pids is None else [pid for pid in pids if pid in set(members)]
+        fallback = next(iter(origins.values()), None) or read_process_cgroup("self", self.proc_root) or "/"
+        results = [self._move_result(pid, self._host_path(origins.pop(pid, fallback))) for pid in targets]
+        if pids is None:
+            self._origins.pop(task_id, None)
+        self.remove_if_empty(task_id)
+        return results
+
+    def remove_if_empty(self, task_id: str) -> bool:
+        """Elimina el grupo de la tarea si ya no tiene procesos"""
+        path = self.group_path(task_id)
+        if not os.path.isdir(path) or self.members(task_id):
+            return False
+        try:
+            self._remove_group(path)
+        except OSError:
+            return False
+        self._origins.pop(task_id, None)
+        return True
+
+    def _remove_group(self, path: str):
+        # En cgroupfs un grupo sin procesos ni hijos se borra con rmdir aunque contenga ficheros
+        os.rmdir(path)
+
+    def prune(self, alive):
+        """Olvida los orígenes de procesos terminados y borra los grupos que quedaron vacíos
+
+        Args:
+            alive: PIDs que siguen vivos (p. ej. los de la última instantánea)
+        """
+        for task_id in list(self._origins):
+            origins = self._origins[task_id]
+            gone = [pid for pid in origins if pid not in alive]
+            for pid in gone:
+                del origins[pid]
+            if gone and not origins:
+                self.remove_if_empty(task_id)
+
+    def apply(self, task_id: str, pids: Iterable[int], cpus: List[int]) -> List[AffinityResult]:
+        """Fija las CPUs del grupo y mete en él los procesos
+
+        Raises:
+            CgroupUnavailable, OSError: Si el grupo no se puede crear o escribir
+        """
+        self.set_cpus(task_id, cpus)
+        return self.attach(task_id, pids)
+
+    def effective_cpus(self, task_id: str) -> Optional[List[int]]:
+        """CPUs que el núcleo aplica realmente al grupo (None si no se puede leer)"""
+        try:
+            return parse_cpu_list(self._read(os.path.join(self.group_path(task_id), "cpuset.cpus.effective")))
+        except (OSError, ValueError):
+            return None
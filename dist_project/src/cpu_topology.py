@@ -0,0 +1,244 @@
+"""
+Topología de CPU para el Administrador de Afinidad
+Modelo de núcleos, hermanos SMT, nodos NUMA y dominios L3 leído de /sys/devices/system/cpu,
+y selectores por topología ("physical & node:1") que se resuelven en cada equipo
+"""
+
+import os
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import psutil
+
+SYSFS_CPU_ROOT = "/sys/devices/system/cpu"
+SYSFS_NODE_ROOT = "/sys/devices/system/node"
+
+
+class CpuInfo(NamedTuple):
+    """CPU lógica y su posición en la topología"""
+    cpu: int
+    core: int        # Núcleo físico (numeración global 0..n)
+    thread: int      # Posición dentro del núcleo (0 = primer hilo SMT)
+    package: int
+    node: int
+    l3: int
+
+
+def parse_cpu_list(text: str) -> List[int]:
+    """Convierte "0,2-3" en [0, 2, 3]
+
+    Raises:
+        ValueError: Si la lista no es válida o está vacía
+    """
+    cpus = set()
+    for part in text.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        first, sep, last = part.partition('-')
+        if not first.strip().isdigit() or (sep and not last.strip().isdigit()):
+            raise ValueError(f"Lista de CPUs no válida: '{text.strip()}'")
+        cpus.update(range(int(first), int(last) + 1) if sep else (int(first),))
+    if not cpus:
+        raise ValueError(f"Lista de CPUs vacía: '{text.strip()}'")
+    return sorted(cpus)
+
+
+def format_cpu_list(cpus: List[int]) -> str:
+    """Convierte [0, 2, 3] en "0,2-3" (formato de sysfs y de cpuset.cpus)"""
+    parts = []
+    cpus = sorted(set(cpus))
+    start = 0
+    for i in range(1, len(cpus) + 1):
+        if i == len(cpus) or cpus[i] != cpus[i - 1] + 1:
+            first, last = cpus[start], cpus[i - 1]
+            parts.append(str(first) if first == last else f"{first}-{last}")
+            start = i
+    return ",".join(parts)
+
+
+def _read(path: str) -> Optional[str]:
+    try:
+        with open(path, 'r') as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _renumber(keys: List) -> Dict:
+    """Asigna índices 0..n a claves en orden de aparición"""
+    mapping = {}
+    for key in keys:
+        mapping.setdefault(key, len(mapping))
+    return mapping
+
+
+class CpuTopology:
+    """Topología de las CPUs lógicas del equipo"""
+
+    def __init__(self, cpus: List[CpuInfo], source: str = ""):
+        self.cpus = sorted(cpus)
+        self.source = source
+        self._by_cpu = {info.cpu: info for info in self.cpus}
+
+    @classmethod
+    def detect(cls) -> 'CpuTopology':
+        """Lee la topología del sistema; si no hay sysfs se deduce a partir de psutil"""
+        topology = cls.from_sysfs()
+        return topology if topology is not None else cls.from_counts()
+
+    @classmethod
+    def from_sysfs(cls, cpu_root: str = SYSFS_CPU_ROOT,
+                   node_root: str = SYSFS_NODE_ROOT) -> Optional['CpuTopology']:
+        """Construye la topología desde /sys/devices/system/cpu (None si no existe)"""
+        online = _read(os.path.join(cpu_root, "online"))
+        if online is None:
+            return None
+
+        raw = []
+        for cpu in parse_cpu_list(online):
+            topo_dir = os.path.join(cpu_root, f"cpu{cpu}", "topology")
+            package = int(_read(os.path.join(topo_dir, "physical_package_id")) or 0)
+            core_id = int(_read(os.path.join(topo_dir, "core_id")) or cpu)
+            siblings = _read(os.path.join(topo_dir, "thread_siblings_list"))
+            siblings = parse_cpu_list(siblings) if siblings else [cpu]
+            raw.append((cpu, (package, core_id), siblings.index(cpu) if cpu in siblings else 0,
+                        package, cls._l3_key(cpu_root, cpu)))
+
+        node_of = cls._read_nodes(node_root)
+        cores = _renumber([item[1] for item in raw])
+        l3_domains = _renumber([item[4] for item in raw])
+        cpus = [CpuInfo(cpu, cores[core_key], thread, package, node_of.get(cpu, 0), l3_domains[l3_key])
+                for cpu, core_key, thread, package, l3_key in raw]
+        return cls(cpus, "sysfs")
+
+    @staticmethod
+    def _l3_key(cpu_root: str, cpu: int):
+        """Identifica el dominio L3 por la primera CPU que comparte la caché"""
+        cache_dir = os.path.join(cpu_root, f"cpu{cpu}", "cache")
+        try:
+            entries = os.listdir(cache_dir)
+        except OSError:
+            return None
+        for entry in entries:
+            if not entry.startswith("index"):
+                continue
+            if _read(os.path.join(cache_dir, entry, "level")) == "3":
+                shared = _read(os.path.join(cache_dir, entry, "shared_cpu_list"))
+                return parse_cpu_list(shared)[0] if shared else cpu
+        return None
+
+    @staticmethod
+    def _read_nodes(node_root: str) -> Dict[int, int]:
+        """CPU -> nodo NUMA"""
+        node_of = {}
+        try:
+            entries = os.listdir(node_root)
+        except OSError:
+            return node_of
+        for entry in entries:
+            if entry.startswith("node") and entry[4:].isdigit():
+                cpulist = _read(os.path.join(node_root, entry, "cpulist"))
+                if cpulist:
+                    for cpu in parse_cpu_list(cpulist):
+                        node_of[cpu] = int(entry[4:])
+        return node_of
+
+    @classmethod
+    def from_counts(cls, logical: int = None, physical: int = None) -> 'CpuTopology':
+        """Topología aproximada a partir del número de CPUs lógicas y físicas
+
+        Sin sysfs (Windows) se asume que los hermanos SMT tienen índices consecutivos,
+        que es como los enumera Windows; un único nodo y un único dominio L3.
+        """
+        logical = logical or psutil.cpu_count() or 1
+        physical = physical or psutil.cpu_count(logical=False) or logical
+        per_core = logical // physical if logical % physical == 0 else 1
+        cpus = [CpuInfo(cpu, cpu // per_core, cpu % per_core, 0, 0, 0) for cpu in range(logical)]
+        return cls(cpus, "psutil")
+
+    def __len__(self):
+        return len(self.cpus)
+
+    def info(self, cpu: int) -> Optional[CpuInfo]:
+        return self._by_cpu.get(cpu)
+
+    def siblings(self, cpu: int) -> List[int]:
+        """CPUs lógicas del mismo núcleo físico"""
+        core = self._by_cpu[cpu].core
+        return [info.cpu for info in self.cpus if info.core == core]
+
+    def has_smt(self) -> bool:
+        return any(info.thread for info in self.cpus)
+
+    def _values(self, field: str) -> List[int]:
+        return sorted({getattr(info, field) for info in self.cpus})
+
+    def resolve(self, selector: str) -> List[int]:
+        """CPUs lógicas que corresponden a un selector de topología
+
+        Términos: all, physical (un hilo por núcleo), smt (hilos secundarios),
+        core:N, node:N, l3:N, package:N, cpus:LISTA. Se combinan con '&'
+        (intersección) y '|' (unión); '&' tiene prioridad.
+
+        Raises:
+            ValueError: Si el selector no es válido
+        """
+        result = set()
+        for alternative in selector.split('|'):
+            selected = None
+            for term in alternative.split('&'):
+                cpus = self._resolve_term(term.strip().lower())
+                selected = cpus if selected is None else selected & cpus
+            result |= selected or set()
+        return sorted(result)
+
+    def _resolve_term(self, term: str) -> set:
+        if term in ("all", "todas"):
+            return {info.cpu for info in self.cpus}
+        if term in ("physical", "fisicos"):
+            return {info.cpu for info in self.cpus if info.thread == 0}
+        if term == "smt":
+            return {info.cpu for info in self.cpus if info.thread > 0}
+        kind, sep, value = term.partition(':')
+        if not sep:
+            raise ValueError(f"Selector de topología no válido: '{term}'")
+        if kind == "cpus":
+            return set(parse_cpu_list(value)) & set(self._by_cpu)
+        fields = {"core": "core", "node": "node", "l3": "l3", "package": "package"}
+        if kind not in fields:
+            raise ValueError(f"Selector de topología no válido: '{term}'")
+        wanted = set(parse_cpu_list(value))
+        return {info.cpu for info in self.cpus if getattr(info, fields[kind]) in wanted}
+
+    def choices(self) -> List[Tuple[str, str]]:
+        """Selecciones habituales para la interfaz: (etiqueta, selector)"""
+        options = [("Todas las CPUs", "all")]
+        if self.has_smt():
+            options.append(("Núcleos físicos (sin hermanos SMT)", "physical"))
+        for node in self._values("node") if len(self._values("node")) > 1 else []:
+            options.append((f"Nodo NUMA {node}", f"node:{node}"))
+            if self.has_smt():
+                options.append((f"Nodo NUMA {node} - núcleos físicos", f"node:{node} & physical"))
+        for l3 in self._values("l3") if len(self._values("l3")) > 1 else []:
+            options.append((f"Dominio L3 {l3}", f"l3:{l3}"))
+            if self.has_smt():
+                options.append((f"Dominio L3 {l3} - núcleos físicos", f"l3:{l3} & physical"))
+        return options
+
+    def label(self, cpu: int) -> str:
+        """Etiqueta corta para la rejilla de CPUs: "CPU 5 (N2·T1)" """
+        info = self._by_cpu.get(cpu)
+        if info is None or not self.has_smt():
+            return f"CPU {cpu}"
+        return f"CPU {cpu} (N{info.core}·T{info.thread})"
+
+
+_topology = None
+
+
+def get_topology() -> CpuTopology:
+    """Topología del equipo (se detecta una sola vez)"""
+    global _topology
+    if _topology is None:
+        _topology = CpuTopology.detect()
+    return _topology
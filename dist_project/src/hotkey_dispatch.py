@@ -0,0 +1,146 @@
+"""
+Despacho asíncrono de hotkeys para el Administrador de Afinidad
+Los callbacks del hook de teclado solo encolan trabajos; un ejecutor dedicado los procesa
+"""
+
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, NamedTuple, Optional
+
+
+class HotkeyJob(NamedTuple):
+    """Trabajo pendiente de ejecutar"""
+    task_id: str
+    source: str
+    enqueued_at: float
+
+
+class HotkeyDispatcher:
+    """Cola acotada de trabajos de hotkeys con un hilo ejecutor dedicado
+
+    Si la cola está llena el trabajo se rechaza en lugar de bloquear el hook
+    de teclado (contrapresión).
+
+    Las activaciones de una tarea que ya tiene un trabajo pendiente o en curso, o que
+    llegan antes de que pase su enfriamiento desde la última ejecución, se agrupan con
+    esa ejecución: mantener pulsado o repetir un hotkey cuesta una sola aplicación.
+    """
+
+    def __init__(self, run_job: Callable[[str], Any], max_pending: int = 16,
+                 on_rejected: Callable[[HotkeyJob], Any] = None, history_size: int = 256,
+                 cooldown: float = 0.0, clock: Callable[[], float] = time.perf_counter):
+        self.run_job = run_job
+        self.clock = clock
+        self.on_rejected = on_rejected
+        self.max_pending = max_pending
+        self.cooldown = cooldown  # Segundos mínimos entre dos ejecuciones de la misma tarea
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._worker = None
+        self._stop = False
+        self._lock = threading.Lock()
+        self._state_lock = threading.Lock()
+        self._active = set()  # Tareas con un trabajo pendiente o en curso
+        self._last_started = {}  # Tarea -> inicio de su última ejecución (según clock)
+
+        # Estadísticas
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.coalesced = 0
+        self.failed = 0
+        self.wait_times = deque(maxlen=history_size)
+        self.latencies = deque(maxlen=history_size)
+
+    def start(self):
+        """Inicia el hilo ejecutor si no está en marcha"""
+        with self._lock:
+            if self._worker and self._worker.is_alive():
+                return
+            self._stop = False
+            self._worker = threading.Thread(target=self._loop, name="hotkey-dispatch", daemon=True)
+            self._worker.start()
+
+    def stop(self, timeout: float = 2.0):
+        """Detiene el ejecutor tras terminar el trabajo en curso"""
+        self._stop = True
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+        if self._worker and self._worker.is_alive():
+            self._worker.join(timeout=timeout)
+
+    def submit(self, task_id: str, source: str = "hotkey", cooldown: Optional[float] = None) -> bool:
+        """Encola un trabajo sin bloquear
+
+        Args:
+            cooldown: Enfriamiento de esta tarea en segundos; por defecto el del despachador
+
+        Returns:
+            True si se encoló; False si se agrupó con una ejecución pendiente, en curso o
+            reciente, o si la cola estaba llena y se rechazó
+        """
+        self.start()
+        now = self.clock()
+        cooldown = self.cooldown if cooldown is None else cooldown
+        with self._state_lock:
+            last = self._last_started.get(task_id)
+            if task_id in self._active or (last is not None and now - last < cooldown):
+                self.coalesced += 1
+                return False
+            self._active.add(task_id)
+
+        job = HotkeyJob(task_id, source, now)
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._state_lock:
+                self._active.discard(task_id)
+            self.rejected += 1
+            if self.on_rejected:
+                self.on_rejected(job)
+            return False
+        self.submitted += 1
+        return True
+
+    def depth(self) -> int:
+        """Trabajos pendientes en la cola"""
+        return self._queue.qsize()
+
+    def _loop(self):
+        while not self._stop:
+            job = self._queue.get()
+            if job is None:
+                break
+            started = self.clock()
+            with self._state_lock:
+                self._last_started[job.task_id] = started
+            self.wait_times.append(started - job.enqueued_at)
+            try:
+                self.run_job(job.task_id)
+            except Exception:
+                self.failed += 1
+            finally:
+                with self._state_lock:
+                    self._active.discard(job.task_id)
+                self.completed += 1
+                self.latencies.append(self.clock() - job.enqueued_at)
+
+    def stats(self) -> Dict[str, Any]:
+        """Profundidad de la cola, contadores y latencias (ms) de los últimos trabajos"""
+        latencies = list(self.latencies)
+        waits = list(self.wait_times)
+        return {
+            'depth': self.depth(),
+            'max_pending': self.max_pending,
+            'submitted': self.submitted,
+            'completed': self.completed,
+            'rejected': self.rejected,
+            'coalesced': self.coalesced,
+            'failed': self.failed,
+            'last_latency_ms': latencies[-1] * 1000 if latencies else None,
+            'avg_latency_ms': sum(latencies) / len(latencies) * 1000 if latencies else None,
+            'avg_wait_ms': sum(waits) / len(waits) * 1000 if waits else None,
+        }
@@ -0,0 +1,311 @@
+"""
+Motor de hotkeys del Administrador de Afinidad
+Un único hook de teclado alimenta una tabla compilada combinación -> callback
+"""
+
+import threading
+import time
+from collections import Counter
+from itertools import combinations
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from input_backends import PROBE_KEY, InputBackend, KeyEvent, default_backend
+
+# Nombres equivalentes de teclas -> nombre canónico
+KEY_ALIASES = {
+    'control': 'ctrl',
+    'left ctrl': 'ctrl',
+    'right ctrl': 'ctrl',
+    'control_l': 'ctrl',
+    'control_r': 'ctrl',
+    'left shift': 'shift',
+    'right shift': 'shift',
+    'shift_l': 'shift',
+    'shift_r': 'shift',
+    'left alt': 'alt',
+    'right alt': 'alt',
+    'alt gr': 'alt',
+    'alt_l': 'alt',
+    'alt_r': 'alt',
+    'option': 'alt',
+    'win': 'windows',
+    'left windows': 'windows',
+    'right windows': 'windows',
+    'super': 'windows',
+    'command': 'windows',
+    'return': 'enter',
+    'escape': 'esc',
+    # Nombres que guarda TaskDialog.get_key_str (keysyms de Tk) -> nombres de keyboard/evdev
+    'pageup': 'page up',
+    'page_up': 'page up',
+    'prior': 'page up',
+    'pagedown': 'page down',
+    'page_down': 'page down',
+    'next': 'page down',
+    'capslock': 'caps lock',
+    'caps_lock': 'caps lock',
+    'printscreen': 'print screen',
+    'print': 'print screen',
+    'numlock': 'num lock',
+    'num_lock': 'num lock',
+    'scrolllock': 'scroll lock',
+    'scroll_lock': 'scroll lock',
+    'del': 'delete',
+    'ins': 'insert',
+}
+
+# Símbolos con shift -> tecla base (distribución US): "shift+1" puede llegar como "!" y Tk
+# guarda "shift+!"; keyboard.add_hotkey comparaba códigos de escaneo, aquí se compara la tecla base
+SHIFTED_KEYS = {
+    '!': '1', '@': '2', '#': '3', '$': '4', '%': '5', '^': '6', '&': '7', '*': '8', '(': '9', ')': '0',
+    '_': '-', '{': '[', '}': ']', '|': '\\', ':': ';', '"': "'", '<': ',', '>': '.', '?': '/', '~': '`',
+}
+
+# Una tecla que lleva tanto tiempo "pulsada" sin autorepetición perdió su liberación
+STALE_KEY_SECONDS = 10.0
+
+# Modificadores: nunca se retienen, llegan a la aplicación como siempre
+MODIFIER_KEYS = frozenset({'ctrl', 'shift', 'alt', 'windows'})
+
+
+def normalize_key(name: str) -> str:
+    """Nombre canónico de una tecla"""
+    name = name.strip().lower()
+    if len(name) == 1:
+        return SHIFTED_KEYS.get(name, name)
+    return KEY_ALIASES.get(name, name)
+
+
+def parse_combo(hotkey: str) -> FrozenSet[str]:
+    """Conjunto de teclas de un hotkey ("ctrl+alt+f1")
+
+    Raises:
+        ValueError: Si el hotkey está vacío
+    """
+    keys = frozenset(normalize_key(key) for key in hotkey.split('+') if key.strip())
+    if not keys:
+        raise ValueError(f"Hotkey vacío: '{hotkey}'")
+    return keys
+
+
+def combo_prefixes(combo: FrozenSet[str]) -> Set[FrozenSet[str]]:
+    """Estados parciales de una combinación en los que se retiene la última tecla pulsada
+
+    Son los subconjuntos propios que ya contienen todos los modificadores de la combinación
+    y alguna tecla normal: en "z+x" se retiene la "z" hasta saber si llega la "x". Las
+    combinaciones con una sola tecla normal ("ctrl+alt+f1") no retienen nada.
+    """
+    modifiers = combo & MODIFIER_KEYS
+    keys = sorted(combo - MODIFIER_KEYS)
+    prefixes = set()
+    for size in range(1, len(keys)):
+        for subset in combinations(keys, size):
+            prefixes.add(modifiers | frozenset(subset))
+    return prefixes
+
+
+class HotkeyEngine:
+    """Un hook de bajo nivel para todos los hotkeys
+
+    Cada evento cuesta una búsqueda en un diccionario indexado por el conjunto de teclas
+    pulsadas, así que el coste por tecla no depende del número de hotkeys registrados.
+    La tabla se reemplaza entera al registrar (copia y sustitución), de modo que el hook
+    nunca ve una tabla a medio modificar ni necesita bloqueos.
+
+    Como hacía keyboard.add_hotkey(..., suppress=True), las teclas normales que empiezan una
+    combinación ("z" en "z+x") se retienen; si la combinación no se completa se reinyectan
+    por el backend, seguidas del evento que lo decidió.
+    """
+
+    def __init__(self, backend: Optional[InputBackend] = None):
+        self.backend = backend or default_backend()
+        self._table: Dict[FrozenSet[str], Tuple[str, Callable]] = {}
+        self._prefixes: FrozenSet[FrozenSet[str]] = frozenset()
+        self._held: List[KeyEvent] = []  # Pulsaciones retenidas a la espera de completar una combinación
+        self._injected = Counter()  # (tecla, pulsada) reinyectadas que volverán a pasar por el hook
+        self._taps: Tuple[Callable[[KeyEvent], None], ...] = ()
+        self._pressed: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.events = 0
+        self.matches = 0
+        self.replayed = 0
+        self.monitor = None  # monitor(evento, recibido, duración): vigilancia del hook
+
+    def start(self):
+        """Instala el hook si no está instalado"""
+        if not self.backend.is_running():
+            self._reset_keys()
+            self.backend.start(self._on_event)
+
+    def stop(self):
+        self.backend.stop()
+        self._reset_keys()
+
+    def _reset_keys(self):
+        self._pressed.clear()
+        self._held = []
+        self._injected.clear()
+
+    def restart(self):
+        """Reinstala el hook conservando los hotkeys registrados"""
+        self.stop()
+        self.start()
+
+    def is_running(self) -> bool:
+        return self.backend.is_running()
+
+    def register(self, hotkey: str, callback: Callable[[], None]):
+        """Asocia un hotkey a un callback (sustituye al anterior de la misma combinación)
+
+        Raises:
+            ValueError: Si el hotkey está vacío
+        """
+        self.update({hotkey: callback})
+
+    def unregister(self, hotkey: str) -> bool:
+        """Quita un hotkey; False si no estaba registrado"""
+        if parse_combo(hotkey) not in self._table:
+            return False
+        self.update(remove=[hotkey])
+        return True
+
+    def update(self, add: Optional[Dict[str, Callable[[], None]]] = None, remove: Iterable[str] = ()):
+        """Quita y añade varios hotkeys con una única sustitución de la tabla
+
+        El hook ve la tabla anterior o la nueva, nunca un estado intermedio, y los
+        hotkeys que no cambian siguen activos durante toda la operación.
+
+        Raises:
+            ValueError: Si algún hotkey está vacío (la tabla no se modifica)
+        """
+        removed = [parse_combo(hotkey) for hotkey in remove]
+        added = [(parse_combo(hotkey), hotkey, callback) for hotkey, callback in (add or {}).items()]
+        with self._lock:
+            table = dict(self._table)
+            for combo in removed:
+                table.pop(combo, None)
+            for combo, hotkey, callback in added:
+                table[combo] = (hotkey, callback)
+            prefixes = set()
+            for combo in table:
+                prefixes |= combo_prefixes(combo)
+            self._prefixes = frozenset(prefixes)
+            self._table = table
+
+    def is_registered(self, hotkey: str) -> bool:
+        return parse_combo(hotkey) in self._table
+
+    def hotkeys(self):
+        """Hotkeys registrados"""
+        return [hotkey for hotkey, _ in self._table.values()]
+
+    def add_tap(self, callback: Callable[[KeyEvent], None]) -> Callable[[KeyEvent], None]:
+        """Observa todos los eventos (monitoreo, prueba de captura) sin añadir otro hook"""
+        with self._lock:
+            self._taps = self._taps + (callback,)
+        return callback
+
+    def remove_tap(self, callback: Callable[[KeyEvent], None]):
+        with self._lock:
+            self._taps = tuple(tap for tap in self._taps if tap is not callback)
+
+    def keys_down(self) -> int:
+        """Teclas que el motor cree pulsadas"""
+        return len(self._pressed)
+
+    def _on_event(self, event: KeyEvent) -> bool:
+        """Hilo del hook: procesa el evento y avisa al monitor con su hora de llegada y duración"""
+        monitor = self.monitor
+        if monitor is None:
+            return self._dispatch(event)
+        received = time.time()
+        started = time.perf_counter()
+        consumed = self._dispatch(event)
+        monitor(event, received, time.perf_counter() - started)
+        return consumed
+
+    def _dispatch(self, event: KeyEvent) -> bool:
+        """Actualiza las teclas pulsadas y busca la combinación; True = suprimir"""
+        self.events += 1
+        key = normalize_key(event.name)
+        if key == PROBE_KEY:
+            return True  # Sonda del vigilante: solo confirma que el hook recibe
+        if self._injected:
+            mark = (key, event.down)
+            if self._injected[mark]:
+                # Eco de una tecla retenida que reinyectamos: ya se procesó
+                self._injected[mark] -= 1
+                if not self._injected[mark]:
+                    del self._injected[mark]
+                return False
+
+        for tap in self._taps:
+            try:
+                tap(event)
+            except Exception:
+                pass
+
+        pressed = self._pressed
+        held = self._held
+        if not event.down:
+            pressed.pop(key, None)
+            if any(normalize_key(item.name) == key for item in held):
+                # Se soltó una tecla retenida sin completar la combinación
+                return self._replay_held(event)
+            return False
+
+        now = time.monotonic()
+        if len(pressed) > 1:
+            for stale in [name for name, seen in pressed.items() if now - seen > STALE_KEY_SECONDS]:
+                del pressed[stale]
+        repeat = key in pressed
+        pressed[key] = now
+
+        keys = frozenset(pressed)
+        entry = self._table.get(keys)
+        if entry is not None:
+            self._held = []  # Las teclas retenidas formaban parte del hotkey
+            self.matches += 1
+            try:
+                entry[1]()
+            except Exception:
+                pass
+            return True
+
+        if repeat and any(normalize_key(item.name) == key for item in held):
+            return True  # Autorepetición de una tecla retenida
+        if key not in MODIFIER_KEYS and keys in self._prefixes and self.backend.can_replay():
+            held.append(event)
+            return True
+        if held:
+            return self._replay_held(event)
+        return False
+
+    def _replay_held(self, event: KeyEvent) -> bool:
+        """Reinyecta las teclas retenidas y el evento actual en orden; True = suprimir el original"""
+        events = self._held + [event]
+        self._held = []
+        backend = self.backend
+        marks = [(normalize_key(item.name), item.down) for item in events]
+        if backend.echoes_injected:
+            self._injected.update(marks)
+        try:
+            backend.inject(events)
+        except Exception:
+            # Sin reinyección las teclas retenidas se pierden, pero el evento actual pasa
+            if backend.echoes_injected:
+                self._injected.subtract(marks)
+                self._injected = +self._injected
+            return False
+        self.replayed += len(events)
+        return True
+
+    def stats(self) -> Dict:
+        return {
+            'backend': self.backend.name,
+            'running': self.is_running(),
+            'hotkeys': len(self._table),
+            'events': self.events,
+            'matches': self.matches,
+            'replayed': self.replayed,
+        }
@@ -0,0 +1,308 @@
+"""
+Vigilancia del hook de teclado para el Administrador de Afinidad
+Mide la latencia de entrega de cada evento, detecta bloqueos a partir de las marcas de tiempo
+reales de los eventos y recupera el hook con una máquina de estados que nunca bloquea
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Estados (los mismos nombres que muestra la pestaña de servicio)
+STATE_UNKNOWN = "unknown"
+STATE_HEALTHY = "healthy"
+STATE_STALLED = "unhealthy"
+STATE_RECOVERING = "recovering"
+STATE_RECOVERED = "recovered"
+STATE_FAILED = "failed"
+
+# Límites superiores (ms) de los intervalos del histograma de latencia
+LATENCY_BOUNDS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+class LatencyHistogram:
+    """Histograma de latencias con intervalos fijos: registrar cuesta una búsqueda binaria"""
+
+    def __init__(self, bounds_ms: Sequence[float] = LATENCY_BOUNDS_MS):
+        self.bounds_ms = tuple(bounds_ms)
+        self.reset()
+
+    def reset(self):
+        self.counts = [0] * (len(self.bounds_ms) + 1)  # El último intervalo es "> máximo"
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, seconds: float):
+        ms = max(0.0, seconds * 1000)
+        self.counts[bisect_left(self.bounds_ms, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Límite superior (ms) del intervalo que contiene el percentil; None sin muestras"""
+        if not self.count:
+            return None
+        target = fraction * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= target and count:
+                return self.bounds_ms[i] if i < len(self.bounds_ms) else self.max_ms
+        return self.max_ms
+
+    def buckets(self) -> List[Tuple[str, int]]:
+        """(etiqueta, cuenta) de cada intervalo"""
+        labels = [f"≤{bound:g} ms" for bound in self.bounds_ms] + [f">{self.bounds_ms[-1]:g} ms"]
+        return list(zip(labels, self.counts))
+
+    def summary(self) -> Dict:
+        return {
+            'count': self.count,
+            'avg_ms': self.total_ms / self.count if self.count else None,
+            'p50_ms': self.percentile(0.5),
+            'p99_ms': self.percentile(0.99),
+            'max_ms': self.max_ms if self.count else None,
+        }
+
+
+class HotkeyWatchdog:
+    """Vigilante del hook del motor de hotkeys guiado por eventos
+
+    Señales de bloqueo:
+      - Con teclas pulsadas siempre llegan eventos (liberación o autorepetición); si pasan
+        stall_timeout segundos sin ninguno, el hook ha dejado de recibir. Este temporizador solo
+        está armado mientras hay teclas pulsadas.
+      - En reposo, el backend avisa por on_dead cuando su hook muere (termina el hilo del hook
+        de keyboard, se desconectan todos los teclados de evdev), sin sondeo ni entrada
+        sintética. probe() hace la misma comprobación bajo demanda con is_alive(); solo los
+        backends que pueden entregar una tecla de sonda sin pasar por el sistema la usan.
+      - Un evento cuyo procesamiento supera hook_budget: Windows retira en silencio los hooks
+        que tardan demasiado, así que se reinstala de forma preventiva.
+
+    Recuperación: cada bloqueo ejecuta el siguiente paso de recover_steps a través de
+    run_action (por ejemplo root.after) sin esperar en ningún hilo. Si vuelve a haber un
+    bloqueo dentro de verify_window se escala al paso siguiente; el primer evento entregado
+    después confirma la recuperación.
+    """
+
+    def __init__(self, engine, recover_steps: Sequence[Tuple[str, Callable[[], None]]],
+                 run_action: Callable[[Callable[[], None]], None] = None,
+                 on_change: Callable[[str, str], None] = None,
+                 stall_timeout: float = 2.0, hook_budget: float = 0.2,
+                 verify_window: float = 10.0, max_attempts: int = 3, probe_interval: float = 5.0,
+                 clock: Callable[[], float] = time.time):
+        self.engine = engine
+        self.recover_steps = list(recover_steps)
+        self.run_action = run_action or (lambda action: action())
+        self.on_change = on_change
+        self.stall_timeout = stall_timeout
+        self.hook_budget = hook_budget
+        self.verify_window = verify_window
+        self.max_attempts = max_attempts
+        self.probe_interval = probe_interval
+        self.auto_recovery = True
+        self.clock = clock
+
+        self.latency = LatencyHistogram()
+        self.handler_time = LatencyHistogram()
+        self.state = STATE_UNKNOWN
+        self.last_event_time = None
+        self.attempts = 0
+        self.stalls = 0
+        self.probes = 0
+        self.last_recovery_time = None
+        self._step = 0
+        self._timer = None
+        self._probe_timer = None
+        self._probe_sent = None
+        self._lock = threading.Lock()
+
+    def attach(self):
+        """Empieza a recibir los eventos del motor y los avisos de muerte del hook"""
+        self.engine.monitor = self.on_event
+        self.engine.backend.on_dead = self._on_backend_dead
+
+    def detach(self):
+        if self.engine.monitor == self.on_event:
+            self.engine.monitor = None
+        if self.engine.backend.on_dead == self._on_backend_dead:
+            self.engine.backend.on_dead = None
+        self._cancel_timer()
+        self._cancel_probe()
+
+    def on_event(self, event, received: float, duration: float):
+        """Hilo del hook: registra latencias y rearma el plazo de bloqueo
+
+        La latencia de entrega solo se mide si el backend da la marca del sistema; con la
+        librería keyboard solo hay tiempo de proceso en el manejador.
+        """
+        if self.engine.backend.os_timestamps:
+            self.latency.record(received - event.time)
+        self.handler_time.record(duration)
+        self.last_event_time = received
+        if self._probe_sent is not None and received >= self._probe_sent:
+            self._cancel_probe()  # Sonda contestada (o tráfico real): el hook recibe
+
+        if duration > self.hook_budget:
+            self.stall(f"el hook tardó {duration * 1000:.0f} ms en procesar una tecla")
+            return
+
+        if self.state != STATE_HEALTHY:
+            confirmed = self.state in (STATE_RECOVERING, STATE_RECOVERED)
+            with self._lock:
+                if confirmed:
+                    self.attempts = 0
+                self._set_state(STATE_HEALTHY, "recuperación confirmada" if confirmed else "")
+        if self.engine.keys_down() and self._timer is None:
+            self._arm(self.stall_timeout)
+
+    def _arm(self, delay: float):
+        timer = threading.Timer(delay, self._check_deadline)
+        timer.daemon = True
+        self._timer = timer
+        timer.start()
+
+    def _cancel_timer(self):
+        timer, self._timer = self._timer, None
+        if timer is not None:
+            timer.cancel()
+
+    def _check_deadline(self):
+        """Vence el plazo: sin teclas pulsadas se desarma; si llegaron eventos se rearma"""
+        self._timer = None
+        if not self.engine.keys_down() or self.state == STATE_FAILED:
+            return
+        idle = self.clock() - (self.last_event_time or 0.0)
+        if idle < self.stall_timeout:
+            self._arm(self.stall_timeout - idle)
+        else:
+            self.stall(f"{idle:.1f} s sin eventos con teclas pulsadas")
+
+    def _on_backend_dead(self, reason: str):
+        """Hilo del backend: su hook dejó de recibir"""
+        self.stall(reason)
+
+    def probe(self):
+        """Comprobación de vida bajo demanda (al iniciar la vigilancia o desde la interfaz)"""
+        if self.state in (STATE_FAILED, STATE_RECOVERING) or self._probe_sent is not None:
+            return
+        backend = self.engine.backend
+        if not self.engine.is_running():
+            if self.engine.hotkeys():
+                # Hay hotkeys registrados pero el hook no llegó a instalarse
+                self.stall(f"el hook de teclado ({backend.name}) no está instalado")
+            return
+        if not backend.is_alive():
+            self.stall(f"el hook de teclado ({backend.name}) ya no está instalado")
+            return
+        now = self.clock()
+        if self.last_event_time is not None and now - self.last_event_time < self.probe_interval:
+            return  # Hay tráfico reciente: el hook está vivo
+        self._probe_sent = now
+        try:
+            sent = backend.probe()
+        except Exception:
+            sent = False
+        if not sent:
+            # El backend no puede inyectar teclas; basta con is_alive()
+            self._probe_sent = None
+            return
+        self.probes += 1
+        timer = threading.Timer(self.stall_timeout, self._check_probe)
+        timer.daemon = True
+        self._probe_timer = timer
+        timer.start()
+
+    def _check_probe(self):
+        """Vence el plazo de la sonda: si no llegó ningún evento desde que se envió, el hook está muerto"""
+        sent, self._probe_sent, self._probe_timer = self._probe_sent, None, None
+        if sent is None or self.state == STATE_FAILED:
+            return
+        if self.last_event_time is None or self.last_event_time < sent:
+            self.stall(f"la tecla de sonda no llegó al hook en {self.stall_timeout:.1f} s")
+
+    def _cancel_probe(self):
+        timer, self._probe_timer, self._probe_sent = self._probe_timer, None, None
+        if timer is not None:
+            timer.cancel()
+
+    def stall(self, reason: str, force: bool = False):
+        """Bloqueo detectado: programa el siguiente paso de recuperación
+
+        Args:
+            force: Recuperar aunque la recuperación automática esté desactivada
+        """
+        with self._lock:
+            self.stalls += 1
+            if self.state == STATE_FAILED:
+                self._set_state(STATE_FAILED, reason)
+                return
+            if not (self.auto_recovery or force):
+                self._set_state(STATE_STALLED, reason)
+                return
+            now = self.clock()
+            if self.last_recovery_time is None or now - self.last_recovery_time > self.verify_window:
+                self._step = 0
+            if self.attempts >= self.max_attempts or not self.recover_steps:
+                self._set_state(STATE_FAILED, f"{reason}; máximo de intentos alcanzado ({self.max_attempts})")
+                return
+            name, action = self.recover_steps[min(self._step, len(self.recover_steps) - 1)]
+            self._step += 1
+            self.attempts += 1
+            self._set_state(STATE_RECOVERING, f"{reason}; intento #{self.attempts}: {name}")
+        self._cancel_timer()
+        self._cancel_probe()
+        self.run_action(lambda: self._run_step(name, action))
+
+    def recover_now(self, reason: str = "prueba manual"):
+        """Ejecuta el primer paso de recuperación aunque se hubiera agotado el máximo de intentos"""
+        with self._lock:
+            if self.state == STATE_FAILED:
+                self.state = STATE_UNKNOWN
+            self.attempts = 0
+            self.last_recovery_time = None
+        self.stall(reason, force=True)
+
+    def _run_step(self, name: str, action: Callable[[], None]):
+        try:
+            action()
+        except Exception as e:
+            # El paso cuenta como intento: se escala al siguiente o se llega a "failed"
+            with self._lock:
+                self.last_recovery_time = self.clock()
+                self._set_state(STATE_STALLED, f"falló '{name}': {e}")
+            self.stall(f"falló '{name}'", force=True)
+            return
+        with self._lock:
+            self.last_recovery_time = self.clock()
+            if self.state == STATE_RECOVERING:
+                self._set_state(STATE_RECOVERED, f"'{name}' completado; a la espera del próximo evento")
+
+    def reset(self):
+        """Olvida intentos y vuelve a estado desconocido (botón de reinicio del contador)"""
+        with self._lock:
+            self.attempts = 0
+            self._step = 0
+            self._set_state(STATE_UNKNOWN, "")
+
+    def _set_state(self, state: str, reason: str):
+        changed = state != self.state
+        self.state = state
+        if self.on_change and (changed or reason):
+            self.on_change(state, reason)
+
+    def stats(self) -> Dict:
+        return {
+            'state': self.state,
+            'attempts': self.attempts,
+            'stalls': self.stalls,
+            'probes': self.probes,
+            'last_event_time': self.last_event_time,
+            'last_recovery_time': self.last_recovery_time,
+            'latency': self.latency.summary(),
+            'handler': self.handler_time.summary(),
+        }
@@ -0,0 +1,523 @@
+"""
+Fuentes de eventos de teclado para el motor de hotkeys del Administrador de Afinidad
+Cada backend instala un único hook de bajo nivel y entrega KeyEvent al motor
+"""
+
+import importlib.util
+import os
+import selectors
+import sys
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+# Variable de entorno para elegir el backend ("keyboard", "evdev" o "fake")
+INPUT_BACKEND_ENV = "AFFINITY_INPUT_BACKEND"
+
+# Nombre del dispositivo uinput por el que evdev reenvía las teclas (no se lee como teclado)
+UINPUT_NAME = "process-affinity-keyboard"
+
+# Tecla de sonda de los backends que pueden comprobar el hook sin pasar por el sistema
+# (solo el falso); el motor la consume sin pasarla a la aplicación activa
+PROBE_KEY = "f24"
+
+
+class KeyEvent(NamedTuple):
+    """Pulsación o liberación de una tecla
+
+    time es la marca del sistema operativo si el backend la tiene (os_timestamps); si no,
+    la hora a la que el backend recibió el evento.
+    """
+    name: str
+    down: bool
+    time: float
+
+
+# El manejador devuelve True si el evento corresponde a un hotkey y debe suprimirse
+KeyHandler = Callable[[KeyEvent], bool]
+
+
+class InputBackend:
+    """Interfaz de las fuentes de eventos de teclado"""
+
+    name = "base"
+    echoes_injected = False  # Las teclas reinyectadas vuelven a pasar por el hook
+    os_timestamps = False  # KeyEvent.time viene del sistema (permite medir la latencia de entrega)
+    suppress = True  # Los hotkeys reconocidos no llegan a la aplicación activa
+
+    def __init__(self):
+        self._handler = None
+        self.on_dead: Optional[Callable[[str], None]] = None  # Aviso cuando el hook muere solo
+
+    def start(self, handler: KeyHandler):
+        """Instala el hook y empieza a entregar eventos al manejador"""
+        raise NotImplementedError
+
+    def stop(self):
+        """Retira el hook"""
+        raise NotImplementedError
+
+    def is_running(self) -> bool:
+        return self._handler is not None
+
+    def is_alive(self) -> bool:
+        """True si el hook sigue instalado y recibiendo (no solo registrado por nosotros)"""
+        return self.is_running()
+
+    def probe(self) -> bool:
+        """Entrega PROBE_KEY al hook sin sintetizar entrada del sistema; False si no puede
+
+        Inyectar una tecla real reiniciaría el temporizador de inactividad del sistema
+        (salvapantallas, bloqueo, suspensión), así que los backends reales no sondean.
+        """
+        return False
+
+    def _report_dead(self, reason: str):
+        on_dead = self.on_dead
+        if on_dead is not None:
+            on_dead(reason)
+
+    def can_replay(self) -> bool:
+        """True si suprime eventos y puede reinyectar los que retuvo el motor"""
+        return False
+
+    def inject(self, events: Sequence[KeyEvent]):
+        """Envía eventos a la aplicación activa como si vinieran del teclado"""
+        raise NotImplementedError
+
+
+class KeyboardLibBackend(InputBackend):
+    """Hook global de la librería keyboard (Windows y Linux con root)"""
+
+    name = "keyboard"
+    echoes_injected = True
+    # La librería sella event.time dentro de su propio callback, no con la hora del hook del sistema
+    os_timestamps = False
+
+    def __init__(self, suppress: bool = True):
+        super().__init__()
+        self.suppress = suppress
+        self._hook = None
+
+    def start(self, handler: KeyHandler):
+        import keyboard
+        if self._hook is not None:
+            self.stop()
+        self._handler = handler
+        hook = self._hook = keyboard.hook(self._on_event, suppress=self.suppress)
+        # Esperar (sin sondear) a que termine el hilo del hook de la librería
+        listener = getattr(getattr(keyboard, '_listener', None), 'listening_thread', None)
+        if listener is not None:
+            threading.Thread(target=self._watch_listener, args=(listener, hook),
+                             name="keyboard-hook-watch", daemon=True).start()
+
+    def _watch_listener(self, listener: threading.Thread, hook):
+        listener.join()
+        if self._hook is hook:
+            self._report_dead("el hilo del hook de la librería keyboard terminó")
+
+    def stop(self):
+        import keyboard
+        hook, self._hook, self._handler = self._hook, None, None
+        if hook is not None:
+            try:
+                keyboard.unhook(hook)
+            except (KeyError, ValueError):
+                # El hook ya no estaba (por ejemplo tras keyboard.unhook_all)
+                pass
+
+    def is_alive(self) -> bool:
+        import keyboard
+        if self._hook is None:
+            return False
+        # El hilo lector de la librería muere si falla el hook del sistema
+        thread = getattr(getattr(keyboard, '_listener', None), 'listening_thread', None)
+        return thread is None or thread.is_alive()
+
+    def can_replay(self) -> bool:
+        return self.suppress and self._hook is not None
+
+    def inject(self, events: Sequence[KeyEvent]):
+        import keyboard
+        for event in events:
+            keyboard.send(event.name, do_press=event.down, do_release=not event.down)
+
+    def _on_event(self, event) -> bool:
+        handler = self._handler
+        if handler is None or not event.name:
+            return True
+        consumed = handler(KeyEvent(event.name, event.event_type == 'down', event.time or time.time()))
+        # Con suppress=True la librería bloquea el evento si el callback devuelve False
+        return not consumed
+
+
+# Nombres de evdev (KEY_LEFTCTRL -> "leftctrl") que difieren de los de la librería keyboard
+EVDEV_KEY_NAMES = {
+    'leftctrl': 'ctrl',
+    'rightctrl': 'ctrl',
+    'leftshift': 'shift',
+    'rightshift': 'shift',
+    'leftalt': 'alt',
+    'rightalt': 'alt',
+    'leftmeta': 'windows',
+    'rightmeta': 'windows',
+    'kpenter': 'enter',
+    'pageup': 'page up',
+    'pagedown': 'page down',
+    'capslock': 'caps lock',
+    'numlock': 'num lock',
+    'scrolllock': 'scroll lock',
+    'sysrq': 'print screen',
+    'compose': 'menu',
+    'minus': '-',
+    'equal': '=',
+    'leftbrace': '[',
+    'rightbrace': ']',
+    'semicolon': ';',
+    'apostrophe': "'",
+    'grave': '`',
+    'backslash': '\\',
+    'comma': ',',
+    'dot': '.',
+    'slash': '/',
+}
+
+# Nombres de evdev que son alias de otro código (#define KEY_X KEY_Y en input-event-codes.h);
+# ecodes.KEY da para esos códigos una lista ordenada alfabéticamente, no el nombre canónico
+EVDEV_ALIASES = {
+    'KEY_MIN_INTERESTING',  # KEY_MUTE
+    'KEY_HANGUEL',  # KEY_HANGEUL
+    'KEY_SCREENLOCK',  # KEY_COFFEE
+    'KEY_DIRECTION',  # KEY_ROTATE_DISPLAY
+    'KEY_BRIGHTNESS_ZERO',  # KEY_BRIGHTNESS_AUTO
+    'KEY_WIMAX',  # KEY_WWAN
+}
+
+
+class EvdevBackend(InputBackend):
+    """Lectura directa de los teclados en /dev/input con python-evdev (Linux)
+
+    Solo necesita permiso de lectura sobre los dispositivos (grupo input), no root.
+    Con suppress=True se capturan los teclados en exclusiva y los eventos que no son
+    hotkeys se reenvían por un dispositivo uinput; sin él los hotkeys también llegan
+    a la aplicación activa.
+
+    A diferencia de la librería keyboard, suppress es False por defecto: la captura
+    necesita escribir en /dev/uinput (normalmente solo root) y un fallo ahí dejaría sin
+    hotkeys. El diálogo de tareas avisa cuando el backend activo no los suprime.
+    """
+
+    name = "evdev"
+    os_timestamps = True  # Marca del kernel de cada input_event
+
+    def __init__(self, device_paths: Optional[Sequence[str]] = None, suppress: bool = False):
+        super().__init__()
+        self.device_paths = device_paths
+        self.suppress = suppress
+        self._devices = []
+        self._uinput = None
+        self._thread = None
+        self._wake = None
+        self._lost = 0
+        self._ecodes = None
+        self._codes: Dict[str, int] = {}  # Nombre -> código de las teclas leídas (para reinyectar)
+
+    def start(self, handler: KeyHandler):
+        """Abre los teclados y arranca el hilo lector
+
+        Raises:
+            ImportError: Si python-evdev no está instalado
+            OSError: Si no hay ningún teclado accesible
+        """
+        import evdev
+        if self._thread is not None:
+            self.stop()
+        devices = self._open_keyboards(evdev)
+        if not devices:
+            raise OSError("No hay teclados accesibles en /dev/input (¿permiso de lectura o grupo input?)")
+
+        if self.suppress:
+            self._uinput = evdev.UInput.from_device(*devices, name=UINPUT_NAME)
+            for device in devices:
+                device.grab()
+        self._devices = devices
+        self._lost = 0
+        self._wake = os.pipe()
+        selector = selectors.DefaultSelector()
+        selector.register(self._wake[0], selectors.EVENT_READ)
+        for device in devices:
+            selector.register(device, selectors.EVENT_READ)
+
+        self._handler = handler
+        self._ecodes = evdev.ecodes
+        self._thread = threading.Thread(target=self._read_loop, args=(evdev.ecodes, selector),
+                                        name="evdev-hook", daemon=True)
+        self._thread.start()
+
+    def has_keyboards(self) -> bool:
+        """True si hay al menos un teclado que este usuario puede abrir"""
+        try:
+            import evdev
+        except ImportError:
+            return False
+        devices = self._open_keyboards(evdev)
+        for device in devices:
+            device.close()
+        return bool(devices)
+
+    def _open_keyboards(self, evdev) -> List:
+        """Dispositivos indicados o todos los que tienen teclas alfabéticas"""
+        devices = []
+        for path in self.device_paths or evdev.list_devices():
+            try:
+                device = evdev.InputDevice(path)
+            except OSError:
+                continue
+            keys = device.capabilities().get(evdev.ecodes.EV_KEY, [])
+            if getattr(device, 'name', None) == UINPUT_NAME:
+                device.close()
+            elif self.device_paths or (evdev.ecodes.KEY_A in keys and evdev.ecodes.KEY_SPACE in keys):
+                devices.append(device)
+            else:
+                device.close()
+        return devices
+
+    def stop(self):
+        thread, self._thread, self._handler = self._thread, None, None
+        if thread is not None:
+            os.write(self._wake[1], b'\0')
+            if thread is not threading.current_thread():
+                thread.join(timeout=1.0)
+        for device in self._devices:
+            try:
+                if self.suppress:
+                    device.ungrab()
+                device.close()
+            except OSError:
+                pass
+        self._devices = []
+        if self._uinput is not None:
+            self._uinput.close()
+            self._uinput = None
+        if self._wake is not None:
+            for fd in self._wake:
+                os.close(fd)
+            self._wake = None
+
+    def is_alive(self) -> bool:
+        """El hilo lector sigue vivo y queda algún teclado conectado
+
+        No hay sonda: evdev lee descriptores de archivo que el sistema no retira en silencio.
+        """
+        thread = self._thread
+        return thread is not None and thread.is_alive() and self._lost < len(self._devices)
+
+    def can_replay(self) -> bool:
+        return self._uinput is not None
+
+    def inject(self, events: Sequence[KeyEvent]):
+        """Escribe los eventos en el dispositivo uinput (no vuelven a pasar por el lector)"""
+        uinput, ecodes = self._uinput, self._ecodes
+        if uinput is None:
+            raise OSError("Sin dispositivo uinput: el backend evdev no suprime eventos")
+        for event in events:
+            uinput.write(ecodes.EV_KEY, self._codes[event.name], 1 if event.down else 0)
+        uinput.syn()
+
+    def _read_loop(self, ecodes, selector):
+        """Hilo lector: convierte los EV_KEY en KeyEvent y reenvía el resto si hay captura"""
+        wake_fd = self._wake[0]
+        names: Dict[int, str] = {}
+        try:
+            with selector:
+                while True:
+                    for key, _ in selector.select():
+                        if key.fileobj == wake_fd:
+                            return
+                        device = key.fileobj
+                        try:
+                            events = list(device.read())
+                        except BlockingIOError:
+                            continue
+                        except OSError:
+                            # Teclado desconectado: se sigue leyendo el resto
+                            selector.unregister(device)
+                            self._lost += 1
+                            if self._lost >= len(self._devices):
+                                self._report_dead("se desconectaron todos los teclados")
+                            continue
+                        for event in events:
+                            self._on_event(ecodes, names, event)
+        except Exception as e:
+            if self._thread is threading.current_thread():
+                self._thread = None
+                self._report_dead(f"el lector de evdev falló: {e}")
+
+    def _on_event(self, ecodes, names: Dict[int, str], event):
+        handler = self._handler
+        consumed = False
+        if handler is not None and event.type == ecodes.EV_KEY:
+            name = names.get(event.code)
+            if name is None:
+                name = names[event.code] = evdev_key_name(ecodes, event.code)
+                self._codes.setdefault(name, event.code)
+            # value: 0 = liberación, 1 = pulsación, 2 = autorepetición
+            consumed = handler(KeyEvent(name, event.value != 0, event.timestamp()))
+        uinput = self._uinput
+        if uinput is not None and not consumed:
+            # syn() ya escribe el SYN_REPORT: reenviarlo también con write_event lo duplicaría
+            if event.type == ecodes.EV_SYN:
+                uinput.syn()
+            else:
+                uinput.write_event(event)
+
+
+def evdev_key_name(ecodes, code: int) -> str:
+    """Nombre de tecla al estilo de la librería keyboard para un código de evdev"""
+    name = ecodes.KEY.get(code) or ecodes.BTN.get(code) or f"KEY_{code}"
+    if isinstance(name, (list, tuple)):
+        canonical = [alias for alias in name if alias not in EVDEV_ALIASES]
+        name = canonical[0] if canonical else name[-1]
+    name = name.split('_', 1)[-1].lower()
+    return EVDEV_KEY_NAMES.get(name, name)
+
+
+class FakeBackend(InputBackend):
+    """Backend en proceso sin teclado: reproduce secuencias guionizadas (pruebas y benchmarks)
+
+    Los eventos se entregan de forma síncrona en el hilo que llama, así que el
+    resultado de una secuencia es determinista y el ritmo solo lo limita el motor.
+    """
+
+    name = "fake"
+    os_timestamps = True  # Las marcas del guion hacen de marcas del sistema
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        super().__init__()
+        self.clock = clock
+        self.delivered = 0
+        self.suppressed = 0
+        self.dead = False  # Simula un hook retirado por el sistema: sigue "instalado" pero no recibe
+        self.injected: List[KeyEvent] = []  # Eventos reinyectados por el motor, en orden
+
+    def start(self, handler: KeyHandler):
+        self._handler = handler
+        self.dead = False
+
+    def stop(self):
+        self._handler = None
+
+    def probe(self) -> bool:
+        self.feed(KeyEvent(PROBE_KEY, True, self.clock()))
+        self.feed(KeyEvent(PROBE_KEY, False, self.clock()))
+        return True
+
+    def can_replay(self) -> bool:
+        return True
+
+    def inject(self, events: Sequence[KeyEvent]):
+        self.injected.extend(events)
+
+    def feed(self, event: KeyEvent) -> bool:
+        """Entrega un evento; True si el motor lo suprimió (sin hook instalado se ignora)"""
+        handler = self._handler
+        if handler is None or self.dead:
+            return False
+        self.delivered += 1
+        consumed = bool(handler(event))
+        if consumed:
+            self.suppressed += 1
+        return consumed
+
+    def replay(self, events: Sequence[KeyEvent], repeat: int = 1, rate: Optional[float] = None,
+               restamp: bool = False) -> int:
+        """Reproduce una secuencia y devuelve cuántos eventos se suprimieron
+
+        Args:
+            repeat: Veces que se reproduce la secuencia completa
+            rate: Eventos por segundo; None = tan rápido como los procese el motor
+            restamp: Sustituir la marca de tiempo del guion por la hora de entrega
+                     (para medir latencias con el vigilante)
+        """
+        suppressed = 0
+        interval = 1.0 / rate if rate else 0.0
+        started = time.perf_counter()
+        sent = 0
+        for _ in range(repeat):
+            for event in events:
+                if interval:
+                    delay = started + sent * interval - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                if restamp:
+                    event = event._replace(time=self.clock())
+                suppressed += self.feed(event)
+                sent += 1
+        return suppressed
+
+    def press(self, hotkey: str, repeats: int = 0) -> bool:
+        """Pulsa y suelta una combinación; True si el motor la reconoció"""
+        events = combo_events(hotkey, start=self.clock(), repeats=repeats)
+        return self.replay(events) > 0
+
+
+def combo_events(hotkey: str, start: float = 0.0, interval: float = 0.0, repeats: int = 0) -> List[KeyEvent]:
+    """Eventos de una combinación: pulsa las teclas en orden, autorepite la última y suelta al revés
+
+    Args:
+        start: Marca de tiempo del primer evento
+        interval: Segundos entre eventos consecutivos
+        repeats: Autorepeticiones de la última tecla antes de soltar
+    """
+    keys = [key.strip() for key in hotkey.split('+') if key.strip()]
+    steps = [(key, True) for key in keys]
+    if keys:
+        steps += [(keys[-1], True)] * repeats
+    steps += [(key, False) for key in reversed(keys)]
+    return [KeyEvent(key, down, start + i * interval) for i, (key, down) in enumerate(steps)]
+
+
+def script_events(combos: Iterable[str], start: float = 0.0, interval: float = 0.001,
+                  repeats: int = 0) -> List[KeyEvent]:
+    """Concatena las combinaciones de un guion con marcas de tiempo deterministas"""
+    events: List[KeyEvent] = []
+    for hotkey in combos:
+        events += combo_events(hotkey, start + len(events) * interval, interval, repeats)
+    return events
+
+
+BACKENDS = {
+    KeyboardLibBackend.name: KeyboardLibBackend,
+    EvdevBackend.name: EvdevBackend,
+    FakeBackend.name: FakeBackend,
+}
+
+
+def create_backend(name: str, **options) -> InputBackend:
+    """Crea un backend por nombre
+
+    Raises:
+        ValueError: Si el nombre no corresponde a ningún backend
+    """
+    try:
+        backend_class = BACKENDS[name.strip().lower()]
+    except KeyError:
+        raise ValueError(f"Backend de entrada desconocido: '{name}' (disponibles: {', '.join(BACKENDS)})")
+    return backend_class(**options)
+
+
+def default_backend(name: Optional[str] = None) -> InputBackend:
+    """Backend elegido por nombre, por AFFINITY_INPUT_BACKEND o por plataforma
+
+    En Linux se prefiere evdev si python-evdev está instalado y hay algún teclado legible
+    (no necesita root); en otro caso se usa la librería keyboard.
+    """
+    name = name or os.environ.get(INPUT_BACKEND_ENV)
+    if name:
+        return create_backend(name)
+    if sys.platform.startswith('linux'):
+        if importlib.util.find_spec('evdev') is not None:
+            backend = EvdevBackend()
+            if backend.has_keyboards():
+                return backend
+    return KeyboardLibBackend()
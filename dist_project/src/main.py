@@ -15,13 +15,11 @@ import time
 import os
 import sys
 import json
-import keyboard
 import uuid
 import shutil
-import winsound
-from pynput import keyboard as pynput_keyboard
 from typing import Dict, List, Optional, Any
 import traceback
+from collections import Counter
 import pygame
 import ctypes
 import ctypes.wintypes
@@ -40,6 +38,11 @@ except ImportError:
 from ui_components import UIComponents
 from task_manager import TaskManager, TaskDialog
 from icon_utils import icon_manager
+from process_sampler import ProcessSampler
+from affinity_ops import STATUS_LABELS, STATUS_OK, apply_affinity_parallel, summarize_results
+from cpu_topology import get_topology
+from hotkey_watchdog import HotkeyWatchdog
+from thread_affinity import apply_thread_rules, list_threads, parse_thread_rules, rules_to_task
 
 class AffinityManager:
     def __init__(self, root):
@@ -53,10 +56,17 @@ class AffinityManager:
         
         # Variables principales
         self.selected_process = None
+        self.selected_process_name = ""
         self.process_list = {}
         self.cpu_count = psutil.cpu_count()
+        self.topology = get_topology()
         self.refresh_thread = None
         self.stop_refresh = False
+        self.process_sampler = ProcessSampler()
+        self.process_refresh_interval = 2.0  # Segundos entre muestreos de procesos
+        self._refresh_requested = False
+        self.search_debounce_ms = 200
+        self._search_after_id = None
         
         # Configuración de notificaciones
         self.notification_config = {
@@ -82,9 +92,7 @@ class AffinityManager:
         self.last_keypress_time = time.time()
         self.keypress_timeout = 300  # 5 minutos por defecto
         self.auto_recovery_enabled = True
-        self.monitoring_thread = None
-        self.stop_monitoring = False
-        self.test_key_captured = False
+        self.watchdog = None  # Vigilante del hook (se crea al iniciar el monitoreo)
         self.recovery_attempts = 0
         self.max_recovery_attempts = 3
         self.service_health_status = "unknown"
@@ -96,12 +104,17 @@ class AffinityManager:
         
         # Inicializar gestor de tareas
         self.task_manager = TaskManager(self)
+        self.process_sampler.add_listener(self.task_manager.on_snapshot)
+        self.process_sampler.add_listener(self.task_manager.enforcer.on_snapshot)
+        self.process_sampler.add_listener(self.task_manager.profile_switcher.on_snapshot)
         
         # Actualizar UI con las tareas cargadas
         self.ui.refresh_tasks_display(self)
         
         # Configurar interfaz
         self.refresh_process_list()
+        self.process_sampler.start(self.process_refresh_interval)
+        self.root.after(100, self._drain_process_snapshots)
         self.load_notification_config()
         self.init_sound_system()
         
@@ -159,73 +172,66 @@ class AffinityManager:
             print(f"[{timestamp}] {prefix} {message}")
     
     def refresh_process_list(self):
-        """Actualiza la lista de procesos"""
-        self.log_message("Actualizando lista de procesos...")
-        
-        # Limpiar lista actual
-        for item in self.process_tree.get_children():
-            self.process_tree.delete(item)
-        
-        self.process_list.clear()
-        
+        """Solicita una nueva instantánea de procesos sin bloquear la interfaz"""
+        self._refresh_requested = True
+        if self.process_sampler.request_refresh():
+            self.log_message("Actualizando lista de procesos...")
+    
+    def _drain_process_snapshots(self):
+        """Recoge en el hilo de Tk las instantáneas producidas por el muestreador"""
         try:
-            for proc in psutil.process_iter(['pid', 'name', 'cpu_percent', 'memory_info']):
-                try:
-                    pinfo = proc.info
-                    pid = pinfo['pid']
-                    name = pinfo['name']
-                    cpu_percent = pinfo['cpu_percent'] or 0
-                    memory_mb = round(pinfo['memory_info'].rss / 1024 / 1024, 1) if pinfo['memory_info'] else 0
-                    
-                    # Agregar al treeview
-                    item_id = self.process_tree.insert('', 'end', values=(
-                        pid, name, f"{cpu_percent:.1f}%", f"{memory_mb:.1f}"
-                    ))
-                    
-                    # Guardar referencia al proceso
-                    self.process_list[item_id] = proc
-                    
-                except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                    continue
-                    
-            self.log_message(f"Lista actualizada: {len(self.process_list)} procesos encontrados", "success")
+            snapshot, errors = self.process_sampler.drain()
             
+            for error in errors:
+                self.log_message(f"Error al actualizar procesos: {str(error)}", "error")
+            
+            if snapshot is not None:
+                inserted, removed, updated = self._sync_process_tree(snapshot, self.search_var.get().lower())
+                
+                # Los muestreos periódicos no se registran, solo los solicitados por el usuario
+                if self._refresh_requested:
+                    self._refresh_requested = False
+                    self.log_message(
+                        f"Lista actualizada: {len(snapshot)} procesos encontrados "
+                        f"(+{inserted} / -{removed} / ~{updated})", 
+                        "success"
+                    )
+                
         except Exception as e:
             self.log_message(f"Error al actualizar procesos: {str(e)}", "error")
+        
+        if not self.stop_refresh:
+            self.root.after(100, self._drain_process_snapshots)
     
     def on_search_change(self, event=None):
-        """Maneja los cambios en la barra de búsqueda"""
-        search_text = self.search_var.get().lower()
-        
-        # Limpiar la vista actual
-        for item in self.process_tree.get_children():
-            self.process_tree.delete(item)
-        
-        # Filtrar y mostrar procesos que coincidan
-        for proc in psutil.process_iter(['pid', 'name', 'cpu_percent', 'memory_info']):
-            try:
-                pinfo = proc.info
-                pid = pinfo['pid']
-                name = pinfo['name']
-                
-                # Filtrar por nombre o PID
-                if (search_text in name.lower() or 
-                    search_text in str(pid) or 
-                    search_text == ""):
-                    
-                    cpu_percent = pinfo['cpu_percent'] or 0
-                    memory_mb = round(pinfo['memory_info'].rss / 1024 / 1024, 1) if pinfo['memory_info'] else 0
-                    
-                    # Agregar al treeview
-                    item_id = self.process_tree.insert('', 'end', values=(
-                        pid, name, f"{cpu_percent:.1f}%", f"{memory_mb:.1f}"
-                    ))
-                    
-                    # Guardar referencia al proceso
-                    self.process_list[item_id] = proc
-                    
-            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                continue
+        """Maneja los cambios en la barra de búsqueda con un pequeño retardo"""
+        # Reiniciar el temporizador en cada pulsación para filtrar una sola vez
+        if self._search_after_id:
+            self.root.after_cancel(self._search_after_id)
+        self._search_after_id = self.root.after(self.search_debounce_ms, self._apply_search)
+    
+    def _apply_search(self):
+        """Aplica el filtro de búsqueda sobre la última instantánea"""
+        self._search_after_id = None
+        try:
+            # El filtro usa el índice de la instantánea, sin recorrer /proc
+            self._sync_process_tree(self.process_sampler.latest, self.search_var.get().lower())
+        except Exception as e:
+            self.log_message(f"Error filtrando procesos: {str(e)}", "error")
+    
+    def _sync_process_tree(self, snapshot, search_text: str = ""):
+        """Sincroniza la lista virtualizada con una instantánea aplicando solo las diferencias"""
+        # La instantánea columnar respalda la lista; solo se formatean las filas visibles
+        self.process_list = snapshot
+        pids = snapshot.filter(search_text)
+        return self.process_tree.set_rows(pids, lambda pid: self._format_process_row(snapshot, pid))
+    
+    def _format_process_row(self, snapshot, pid: int):
+        """Valores de las columnas de la lista para un PID de la instantánea"""
+        i = snapshot.index_of(pid)
+        memory_mb = round(snapshot.rss[i] / 1024 / 1024, 1)
+        return (pid, snapshot.names.names[snapshot.name_ids[i]], 
+                f"{snapshot.cpu_percents[i]:.1f}%", f"{memory_mb:.1f}")
     
     def clear_search(self):
         """Limpia la búsqueda y muestra todos los procesos"""
@@ -238,43 +244,109 @@ class AffinityManager:
         if not selection:
             return
             
-        item_id = selection[0]
-        if item_id not in self.process_list:
+        pid = selection[0]
+        if pid not in self.process_list:
             return
             
-        self.selected_process = self.process_list[item_id]
+        info = self.process_list[pid]
         
         try:
-            # Obtener información del proceso
-            pid = self.selected_process.pid
-            name = self.selected_process.name()
+            # Manejador compartido con el ejecutor de tareas; descarta PIDs reutilizados
+            process = self.process_sampler.handles.get(info.pid, info.create_time)
+            self.selected_process = process
+            self.selected_process_name = info.name
+            
+            # Obtener información del proceso (el nombre ya está en la instantánea)
+            pid = info.pid
+            name = info.name
             
             # Obtener afinidad actual
             try:
-                current_affinity = self.selected_process.cpu_affinity()
+                current_affinity = process.cpu_affinity()
                 affinity_str = ', '.join([f"CPU{cpu}" for cpu in current_affinity])
             except (psutil.AccessDenied, AttributeError):
                 current_affinity = list(range(self.cpu_count))
                 affinity_str = "Sin acceso (requiere permisos)"
             
+            # Hilos del proceso (nombres distintos, los más frecuentes primero)
+            try:
+                threads = list_threads(pid)
+                counts = Counter(thread.name for thread in threads if thread.name)
+                names = ', '.join(name for name, _ in counts.most_common(4))
+                threads_str = f"{len(threads)} ({names})" if names else str(len(threads))
+            except (psutil.NoSuchProcess, psutil.AccessDenied, OSError):
+                threads_str = "Sin acceso"
+            
             # Actualizar interfaz
             self.selected_process_label.config(text=name)
             self.pid_label.config(text=str(pid))
             self.current_affinity_label.config(text=affinity_str)
+            self.threads_label.config(text=threads_str)
             
             # Actualizar checkboxes
             for i, var in enumerate(self.cpu_vars):
                 var.set(i in current_affinity)
             
             self.apply_btn.config(state='normal')
+            self.apply_threads_btn.config(state='normal')
             self.create_task_btn.config(state='normal')
             self.log_message(f"Proceso seleccionado: {name} (PID: {pid})")
             
         except (psutil.NoSuchProcess, psutil.AccessDenied) as e:
             self.log_message(f"Error al acceder al proceso: {str(e)}", "error")
             self.apply_btn.config(state='disabled')
+            self.apply_threads_btn.config(state='disabled')
             self.create_task_btn.config(state='disabled')
     
+    def apply_thread_rules(self):
+        """Aplica las reglas de afinidad por hilo al proceso seleccionado"""
+        if not self.selected_process:
+            messagebox.showwarning("Advertencia", "No hay proceso seleccionado")
+            return
+        
+        try:
+            rules = parse_thread_rules(self.thread_rules_var.get())
+        except ValueError as e:
+            messagebox.showwarning("Advertencia", str(e))
+            return
+        if not rules:
+            messagebox.showwarning("Advertencia", "Escriba al menos una regla (ej: net*=2,3)")
+            return
+        
+        try:
+            results = apply_thread_rules(self.selected_process.pid, rules)
+        except (psutil.NoSuchProcess, psutil.AccessDenied, OSError) as e:
+            self.log_message(f"Error al acceder a los hilos del proceso: {str(e)}", "error")
+            return
+        
+        if not results:
+            self.log_message("Ninguna regla coincide con los hilos del proceso", "warning")
+            return
+        
+        for result in results:
+            level = "success" if result.status == STATUS_OK else "warning"
+            cpu_list = ', '.join(f"CPU{cpu}" for cpu in result.cpus)
+            detail = f" ({result.detail})" if result.detail else ""
+            self.log_message(
+                f"Hilo {result.name or '-'} (TID: {result.tid}): {STATUS_LABELS[result.status]} "
+                f"{cpu_list}{detail}", level
+            )
+        self.log_message(f"Afinidad por hilo: {summarize_results(results)}", "info")
+    
+    def on_topology_select(self, event=None):
+        """Marca las CPUs que corresponden a la selección por topología"""
+        selector = self.ui.topology_selector(self, self.cpu_selector_var.get())
+        if not selector:
+            return
+        try:
+            cpus = self.topology.resolve(selector)
+        except ValueError as e:
+            messagebox.showwarning("Advertencia", str(e))
+            return
+        for i, var in enumerate(self.cpu_vars):
+            var.set(i in cpus)
+        self.log_message(f"Selección por topología '{selector}': {len(cpus)} CPUs")
+    
     def select_all_cpus(self):
         """Selecciona todas las CPUs"""
         for var in self.cpu_vars:
@@ -298,23 +370,27 @@ class AffinityManager:
             messagebox.showwarning("Advertencia", "Debe seleccionar al menos una CPU")
             return
         
+        if self.apply_tree_var.get():
+            self.apply_affinity_to_tree(selected_cpus)
+            return
+        
         try:
-            # Verificar que el proceso aún existe
-            if not self.selected_process.is_running():
+            # Verificar que el proceso aún existe y que el PID no se ha reutilizado
+            if not self.process_sampler.handles.verify(self.selected_process):
                 messagebox.showerror("Error", "El proceso ya no está en ejecución")
                 return
             
             # Aplicar nueva afinidad
-            old_affinity = self.selected_process.cpu_affinity()
             self.selected_process.cpu_affinity(selected_cpus)
             
             # Verificar que se aplicó correctamente
             new_affinity = self.selected_process.cpu_affinity()
+            name = self.selected_process_name
             
             if set(new_affinity) == set(selected_cpus):
                 cpu_list = ', '.join([f"CPU{cpu}" for cpu in selected_cpus])
                 self.log_message(
-                    f"Afinidad aplicada exitosamente al proceso {self.selected_process.name()} "
+                    f"Afinidad aplicada exitosamente al proceso {name} "
                     f"(PID: {self.selected_process.pid}): {cpu_list}", 
                     "success"
                 )
@@ -324,7 +400,7 @@ class AffinityManager:
                 
                 messagebox.showinfo("Éxito", 
                     f"Afinidad aplicada correctamente.\n"
-                    f"Proceso: {self.selected_process.name()}\n"
+                    f"Proceso: {name}\n"
                     f"CPUs: {cpu_list}")
             else:
                 self.log_message(
@@ -352,11 +428,45 @@ class AffinityManager:
             messagebox.showerror("Error", f"Error inesperado: {str(e)}")
             self.log_message(f"Error inesperado: {str(e)}", "error")
     
+    def apply_affinity_to_tree(self, selected_cpus):
+        """Aplica la afinidad al proceso seleccionado y a todos sus descendientes en paralelo"""
+        if not self.process_sampler.handles.verify(self.selected_process):
+            messagebox.showerror("Error", "El proceso ya no está en ejecución")
+            return
+        
+        name = self.selected_process_name
+        processes = self.task_manager.expand_process_tree([self.selected_process])
+        results = apply_affinity_parallel(processes, selected_cpus, self.task_manager._get_apply_pool(),
+                                          verify=self.process_sampler.handles.verify)
+        summary = summarize_results(results)
+        for result in results:
+            if result.status != STATUS_OK:
+                detail = f": {result.detail}" if result.detail else ""
+                self.log_message(f"PID {result.pid}: {STATUS_LABELS[result.status]}{detail}", "warning")
+        
+        applied = sum(1 for result in results if result.status == STATUS_OK)
+        cpu_list = ', '.join([f"CPU{cpu}" for cpu in selected_cpus])
+        level = "success" if applied == len(results) else "warning" if applied else "error"
+        self.log_message(
+            f"Afinidad aplicada al árbol de {name} (PID: {self.selected_process.pid}): "
+            f"{applied}/{len(results)} procesos, {cpu_list} ({summary})", level
+        )
+        if applied:
+            self.current_affinity_label.config(text=cpu_list)
+        messagebox.showinfo("Árbol de procesos",
+            f"Proceso: {name}\n"
+            f"Procesos del árbol: {len(results)}\n"
+            f"Aplicados: {applied}\n"
+            f"CPUs: {cpu_list}\n"
+            f"{summary}")
+    
     def on_closing(self):
         """Maneja el cierre de la aplicación"""
         try:
             # Detener el sistema de monitoreo
             self.stop_keypress_monitoring()
+            self.process_sampler.stop()
+            self.task_manager.dispatcher.stop()
             
             # Detener el icono de la bandeja si existe
             if hasattr(self, 'tray_icon') and self.tray_icon:
@@ -368,8 +478,8 @@ class AffinityManager:
             self.task_manager.save_automated_tasks()
             
             # Limpiar hotkeys
-            for hotkey in list(self.task_manager.hotkey_listeners.keys()):
-                self.task_manager.remove_hotkey_listener(hotkey)
+            self.task_manager.sync_hotkeys({})
+            self.task_manager.hotkey_engine.stop()
             
             self.log_message("Aplicación cerrada correctamente", "info")
         except:
@@ -411,14 +521,27 @@ class AffinityManager:
             
         # Recopilar información necesaria para la tarea
         task_data = {
-            'name': f"Tarea para {self.selected_process.name()}",
-            'process_name': self.selected_process.name(),
+            'name': f"Tarea para {self.selected_process_name}",
+            'process_name': self.selected_process_name,
             'target_affinity': [i for i, var in enumerate(self.cpu_vars) if var.get()],
+            'apply_to_tree': self.apply_tree_var.get(),
             'hotkey': ''
         }
+        try:
+            task_data['thread_rules'] = rules_to_task(parse_thread_rules(self.thread_rules_var.get()))
+        except ValueError:
+            pass
+        
+        # Conservar la selección por topología si las casillas no se han cambiado a mano
+        selector = self.ui.topology_selector(self, self.cpu_selector_var.get())
+        try:
+            if selector and self.topology.resolve(selector) == task_data['target_affinity']:
+                task_data['cpu_selector'] = selector
+        except ValueError:
+            pass
         
         # Mostrar el diálogo para crear tarea
-        dialog = TaskDialog(self.root, task_data)
+        dialog = TaskDialog(self.root, task_data, input_backend=self.task_manager.hotkey_engine.backend)
         self.root.wait_window(dialog.dialog)
         
         if dialog.result:
@@ -648,29 +771,35 @@ class AffinityManager:
                 pass
 
     def restart_hotkey_service(self):
-        """Reinicia el servicio de captura de hotkeys"""
+        """Reinicia el servicio de captura de hotkeys
+
+        Reinstala el hook y reconcilia los hotkeys con las tareas; los que no han cambiado
+        no se desregistran, así que no hay ventana en la que dejen de responder.
+        """
         try:
-            # Detener el servicio actual
-            self.stop_hotkey_service()
-            
-            # Esperar un momento
-            time.sleep(0.5)
+            started = time.perf_counter()
+            self._reinstall_hotkey_hook()
             
-            # Iniciar el servicio
-            self.start_hotkey_service()
+            if hasattr(self, 'service_status_label'):
+                self.service_status_label.config(text="🟢 Funcionando", foreground='green')
             
-            self.log_message("Servicio de hotkeys reiniciado", "success")
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.log_message(f"Servicio de hotkeys reiniciado en {elapsed_ms:.1f} ms", "success")
             self.update_hotkey_service_status()
             
         except Exception as e:
             self.log_message(f"Error reiniciando servicio de hotkeys: {str(e)}", "error")
     
+    def _reinstall_hotkey_hook(self):
+        """Reinstala el hook y reconcilia los hotkeys; lanza la excepción si el backend no arranca"""
+        self.task_manager.hotkey_engine.restart()
+        self.task_manager.sync_hotkeys()
+    
     def stop_hotkey_service(self):
         """Detiene el servicio de captura de hotkeys"""
         try:
             # Remover todos los listeners de hotkeys
-            for hotkey in list(self.task_manager.hotkey_listeners.keys()):
-                self.task_manager.remove_hotkey_listener(hotkey)
+            self.task_manager.sync_hotkeys({})
             
             # Actualizar estado en la UI
             if hasattr(self, 'service_status_label'):
@@ -685,10 +814,9 @@ class AffinityManager:
     def start_hotkey_service(self):
         """Inicia el servicio de captura de hotkeys"""
         try:
-            # Reconfigurar todos los hotkeys de las tareas
-            for task_id, task in self.task_manager.automated_tasks.items():
-                if task.get('hotkey'):
-                    self.task_manager.setup_hotkey_listener(task['hotkey'], task_id)
+            # Reconfigurar los hotkeys de las tareas (solo los que falten o hayan cambiado)
+            self.task_manager.sync_hotkeys()
+            self.task_manager.hotkey_engine.start()
             
             # Actualizar estado en la UI
             if hasattr(self, 'service_status_label'):
@@ -761,19 +889,26 @@ class AffinityManager:
             # Variable para controlar el test
             test_active = [True]
             
-            def on_key_event(e):
+            def show_key(name):
                 if test_active[0]:
                     timestamp = time.strftime("%H:%M:%S")
-                    key_info = f"[{timestamp}] Capturado: {e.name}\n"
+                    key_info = f"[{timestamp}] Capturado: {name}\n"
                     capture_text.insert(tk.END, key_info)
                     capture_text.see(tk.END)
             
-            # Configurar listener temporal
-            test_hook = keyboard.on_press(on_key_event)
+            def on_key_event(e):
+                # Llega por el hook del motor de hotkeys: pasar al hilo de Tk
+                if e.down:
+                    self.root.after(0, show_key, e.name)
+            
+            # Observar el hook existente en lugar de instalar otro
+            engine = self.task_manager.hotkey_engine
+            engine.add_tap(on_key_event)
+            engine.start()
             
             def close_test():
                 test_active[0] = False
-                keyboard.unhook(test_hook)
+                engine.remove_tap(on_key_event)
                 test_window.destroy()
             
             # Botón de cerrar
@@ -896,6 +1031,7 @@ class AffinityManager:
                     self.auto_recovery_enabled = recovery_enabled
                 
                 self.max_recovery_attempts = config.get('max_recovery_attempts', 3)
+                self._configure_watchdog()
                 
                 self.log_message("Configuración de hotkeys cargada", "success")
             else:
@@ -923,7 +1059,7 @@ class AffinityManager:
                 self.auto_recovery_enabled = True
             
             self.max_recovery_attempts = 3
-            self.recovery_attempts = 0
+            self._configure_watchdog()
             
             self.log_message("Configuración de hotkeys restaurada por defecto", "success")
             
@@ -931,171 +1067,59 @@ class AffinityManager:
             self.log_message(f"Error restaurando configuración por defecto: {str(e)}", "error")
 
     def start_keypress_monitoring(self):
-        """Inicia el sistema de monitoreo de captura de teclas"""
+        """Inicia la vigilancia del hook de teclado (guiada por eventos, sin hilo de sondeo)"""
         try:
-            if self.monitoring_thread and self.monitoring_thread.is_alive():
-                return
-                
-            self.stop_monitoring = False
-            self.monitoring_thread = threading.Thread(target=self._monitoring_loop, daemon=True)
-            self.monitoring_thread.start()
-            
-            # Configurar listener global para detectar cualquier tecla presionada
-            self._setup_global_keypress_listener()
+            if self.watchdog is None:
+                self.watchdog = HotkeyWatchdog(
+                    self.task_manager.hotkey_engine,
+                    [
+                        ("reinstalar el hook", self._reinstall_hotkey_hook),
+                        ("reconstruir la tabla de hotkeys", self._full_service_reset),
+                    ],
+                    run_action=lambda action: self.root.after(0, action),
+                    on_change=lambda state, reason: self.root.after(0, self._on_watchdog_change, state, reason),
+                )
+            self._configure_watchdog()
+            self.watchdog.attach()
+            self.task_manager.start_hotkey_engine()
+            # Si el hook no llegó a instalarse se recupera ya; después avisa el propio backend
+            self.watchdog.probe()
             
-            self.log_message("Sistema de monitoreo de captura iniciado", "success")
+            backend = self.task_manager.hotkey_engine.backend.name
+            self.log_message(f"Sistema de monitoreo de captura iniciado (entrada: {backend})", "success")
             
         except Exception as e:
             self.log_message(f"Error iniciando monitoreo: {str(e)}", "error")
     
-    def _setup_global_keypress_listener(self):
-        """Configura un listener global para detectar pulsaciones de teclas"""
-        try:
-            def on_any_key(e):
-                self.last_keypress_time = time.time()
-                self.test_key_captured = True
-                # Actualizar estado de salud
-                self.service_health_status = "healthy"
-                if hasattr(self, 'health_status_label'):
-                    self.root.after_idle(lambda: self._update_health_status_ui())
-            
-            # Usar keyboard para capturar cualquier tecla
-            keyboard.on_press(on_any_key)
-            
-        except Exception as e:
-            self.log_message(f"Error configurando listener global: {str(e)}", "error")
-    
-    def _monitoring_loop(self):
-        """Bucle principal de monitoreo"""
-        while not self.stop_monitoring:
-            try:
-                current_time = time.time()
-                time_since_last_key = current_time - self.last_keypress_time
-                
-                # Verificar si han pasado demasiados minutos sin captura
-                if time_since_last_key > self.keypress_timeout and self.auto_recovery_enabled:
-                    self.log_message(f"No se han detectado teclas en {int(time_since_last_key/60)} minutos", "warning")
-                    
-                    # Realizar test de captura
-                    if not self._test_key_capture():
-                        self.log_message("Test de captura falló - Iniciando recuperación automática", "error")
-                        self._attempt_service_recovery()
-                    else:
-                        self.log_message("Test de captura exitoso - Servicio funcionando", "success")
-                        self.service_health_status = "healthy"
-                
-                # Actualizar UI cada 10 segundos
-                if hasattr(self, 'root'):
-                    self.root.after_idle(lambda: self._update_monitoring_ui())
-                
-                time.sleep(10)  # Verificar cada 10 segundos
-                
-            except Exception as e:
-                self.log_message(f"Error en bucle de monitoreo: {str(e)}", "error")
-                time.sleep(30)  # Esperar más tiempo si hay error
-    
-    def _test_key_capture(self):
-        """Realiza una prueba para verificar si la captura de teclas funciona"""
-        try:
-            # Resetear flag de prueba
-            self.test_key_captured = False
-            
-            # Simular una pulsación de tecla interna para probar el sistema
-            # En lugar de simular, verificamos si el listener sigue activo
-            import keyboard
-            
-            # Verificar si hay hooks activos
-            if hasattr(keyboard, '_hooks') and keyboard._hooks:
-                self.service_health_status = "healthy"
-                return True
-            else:
-                self.service_health_status = "unhealthy"
-                return False
-                
-        except Exception as e:
-            self.log_message(f"Error en test de captura: {str(e)}", "error")
-            self.service_health_status = "error"
-            return False
+    def _configure_watchdog(self):
+        """Aplica la configuración de recuperación de la pestaña de servicio al vigilante"""
+        if self.watchdog is not None:
+            self.watchdog.auto_recovery = self.auto_recovery_enabled
+            self.watchdog.max_attempts = self.max_recovery_attempts
     
-    def _attempt_service_recovery(self):
-        """Intenta recuperar el servicio de captura de teclas"""
-        try:
-            if self.recovery_attempts >= self.max_recovery_attempts:
-                self.log_message(f"Máximo de intentos de recuperación alcanzado ({self.max_recovery_attempts})", "error")
-                self.service_health_status = "failed"
-                return False
-            
-            self.recovery_attempts += 1
-            self.log_message(f"Intento de recuperación #{self.recovery_attempts}", "warning")
-            
-            # Método 1: Reiniciar servicio de hotkeys
-            self.log_message("Reiniciando servicio de hotkeys...", "info")
-            self.restart_hotkey_service()
-            
-            # Esperar y probar
-            time.sleep(2)
-            if self._test_key_capture():
-                self.log_message("Recuperación exitosa con reinicio de servicio", "success")
-                self.recovery_attempts = 0
-                self.service_health_status = "recovered"
-                self.last_recovery_time = time.time()
-                return True
-            
-            # Método 2: Reconfigurar listener global
-            self.log_message("Reconfigurando listener global...", "info")
-            self._setup_global_keypress_listener()
-            
-            time.sleep(2)
-            if self._test_key_capture():
-                self.log_message("Recuperación exitosa con reconfiguración", "success")
-                self.recovery_attempts = 0
-                self.service_health_status = "recovered"
-                self.last_recovery_time = time.time()
-                return True
-            
-            # Método 3: Limpiar y reconfigurar completamente
-            self.log_message("Limpiando y reconfigurando sistema completo...", "info")
-            self._full_service_reset()
-            
-            time.sleep(3)
-            if self._test_key_capture():
-                self.log_message("Recuperación exitosa con reset completo", "success")
-                self.recovery_attempts = 0
-                self.service_health_status = "recovered"
-                self.last_recovery_time = time.time()
-                return True
-            
-            self.log_message(f"Intento de recuperación #{self.recovery_attempts} falló", "error")
-            self.service_health_status = "recovery_failed"
-            return False
-            
-        except Exception as e:
-            self.log_message(f"Error en recuperación automática: {str(e)}", "error")
-            self.service_health_status = "error"
-            return False
+    def _on_watchdog_change(self, state: str, reason: str):
+        """Cambio de estado del vigilante (hilo de Tk)"""
+        self.service_health_status = state
+        if reason:
+            level = {"healthy": "success", "recovered": "info", "recovering": "warning"}.get(state, "error")
+            self.log_message(f"Vigilancia de hotkeys: {reason}", level)
+        self._update_monitoring_ui()
     
     def _full_service_reset(self):
-        """Realiza un reset completo del servicio de captura"""
-        try:
-            # Limpiar todos los hooks existentes
-            import keyboard
-            keyboard.unhook_all()
-            
-            # Esperar un momento
-            time.sleep(1)
-            
-            # Reconfigurar todo
-            self._setup_global_keypress_listener()
-            self.start_hotkey_service()
-            
-            self.log_message("Reset completo del servicio realizado", "info")
-            
-        except Exception as e:
-            self.log_message(f"Error en reset completo: {str(e)}", "error")
+        """Reconstruye la tabla de hotkeys y reinstala el hook (sin esperas)"""
+        engine = self.task_manager.hotkey_engine
+        engine.stop()
+        self.task_manager.sync_hotkeys({})
+        self.task_manager.sync_hotkeys()
+        engine.start()
+        self.log_message("Reset completo del servicio realizado", "info")
     
     def _update_monitoring_ui(self):
         """Actualiza la UI del sistema de monitoreo"""
         try:
+            watchdog = self.watchdog
+            if watchdog is not None and watchdog.last_event_time:
+                self.last_keypress_time = watchdog.last_event_time
             current_time = time.time()
             time_since_last_key = current_time - self.last_keypress_time
             
@@ -1108,9 +1132,26 @@ class AffinityManager:
                 self.last_capture_label.config(text=time_str)
             
             # Actualizar contador de recuperaciones
+            if watchdog is not None:
+                self.recovery_attempts = watchdog.attempts
+                self.last_recovery_time = watchdog.last_recovery_time
             if hasattr(self, 'recovery_attempts_label'):
                 self.recovery_attempts_label.config(text=str(self.recovery_attempts))
             
+            # Latencia de entrega del hook (percentiles del histograma); sin marcas del sistema
+            # solo se puede mostrar el tiempo de proceso en el manejador
+            if hasattr(self, 'delivery_latency_label') and watchdog is not None:
+                latency = watchdog.latency.summary()
+                label = ""
+                if not latency['count']:
+                    latency = watchdog.handler_time.summary()
+                    label = "solo manejador: "
+                if latency['count']:
+                    self.delivery_latency_label.config(
+                        text=f"{label}p50 ≤{latency['p50_ms']:g} ms, p99 ≤{latency['p99_ms']:g} ms, "
+                             f"máx {latency['max_ms']:.1f} ms ({latency['count']} eventos)"
+                    )
+            
             # Actualizar última recuperación
             if hasattr(self, 'last_recovery_label') and hasattr(self, 'last_recovery_time'):
                 if hasattr(self, 'last_recovery_time') and self.last_recovery_time:
@@ -1137,13 +1178,19 @@ class AffinityManager:
                 "unhealthy": ("Problemático", "orange"),
                 "error": ("Error", "red"),
                 "recovery_failed": ("Fallo Total", "red"),
+                "recovering": ("Recuperando", "orange"),
                 "recovered": ("Recuperado", "green"),
                 "failed": ("Fallido", "red"),
                 "unknown": ("Desconocido", "gray")
             }
             
+            # Sin teclas durante el timeout de monitoreo el estado ya no se puede confirmar
+            status = self.service_health_status
+            if status == "healthy" and time.time() - self.last_keypress_time > self.keypress_timeout:
+                status = "unknown"
+            
             # Intentar usar iconos según el estado
-            status_text, color = status_colors.get(self.service_health_status, ("Desconocido", "gray"))
+            status_text, color = status_colors.get(status, ("Desconocido", "gray"))
             
             # Mapear estados a emojis para obtener iconos
             status_emojis = {
@@ -1151,12 +1198,13 @@ class AffinityManager:
                 "unhealthy": "🟡", 
                 "error": "🔴",
                 "recovery_failed": "❌",
+                "recovering": "🟡",
                 "recovered": "🟢",
                 "failed": "💀",
                 "unknown": "⚪"
             }
             
-            emoji = status_emojis.get(self.service_health_status, "⚪")
+            emoji = status_emojis.get(status, "⚪")
             status_icon = icon_manager.get_icon_for_emoji(emoji, (16, 16))
             
             if status_icon:
@@ -1180,8 +1228,9 @@ class AffinityManager:
                 self.log_message(f"Recuperación automática {status}", "info")
                 
                 # Resetear contador si se activa
-                if self.auto_recovery_enabled:
-                    self.recovery_attempts = 0
+                if self.auto_recovery_enabled and self.watchdog is not None:
+                    self.watchdog.reset()
+                self._configure_watchdog()
                     
         except Exception as e:
             self.log_message(f"Error alternando recuperación automática: {str(e)}", "error")
@@ -1204,18 +1253,9 @@ class AffinityManager:
         try:
             self.log_message("Iniciando prueba manual de recuperación...", "info")
             
-            # Forzar un intento de recuperación
-            old_attempts = self.recovery_attempts
-            self.recovery_attempts = 0  # Resetear para permitir el test
-            
-            success = self._attempt_service_recovery()
-            
-            if success:
-                self.log_message("Prueba manual de recuperación exitosa", "success")
-                self.last_recovery_time = time.time()
-            else:
-                self.log_message("Prueba manual de recuperación falló", "error")
-                self.recovery_attempts = old_attempts  # Restaurar si falló
+            # Forzar un paso de recuperación; el resultado llega por _on_watchdog_change
+            if self.watchdog is not None:
+                self.watchdog.recover_now()
                 
         except Exception as e:
             self.log_message(f"Error en prueba manual: {str(e)}", "error")
@@ -1225,6 +1265,8 @@ class AffinityManager:
         try:
             self.recovery_attempts = 0
             self.service_health_status = "unknown"
+            if self.watchdog is not None:
+                self.watchdog.reset()
             self.log_message("Contador de recuperación reseteado", "success")
             self._update_monitoring_ui()
             
@@ -1234,15 +1276,32 @@ class AffinityManager:
     def stop_keypress_monitoring(self):
         """Detiene el sistema de monitoreo"""
         try:
-            self.stop_monitoring = True
-            if self.monitoring_thread and self.monitoring_thread.is_alive():
-                self.monitoring_thread.join(timeout=5)
+            if self.watchdog is not None:
+                self.watchdog.detach()
             
             self.log_message("Sistema de monitoreo detenido", "warning")
             
         except Exception as e:
             self.log_message(f"Error deteniendo monitoreo: {str(e)}", "error")
 
+    def update_dispatch_status(self):
+        """Muestra la profundidad de la cola de hotkeys y la latencia de las últimas tareas"""
+        stats = self.task_manager.dispatcher.stats()
+        if hasattr(self, 'dispatch_queue_label'):
+            text = f"{stats['depth']}/{stats['max_pending']}"
+            if stats['rejected']:
+                text += f" ({stats['rejected']} descartadas)"
+            if stats['coalesced']:
+                text += f" · {stats['coalesced']} agrupadas"
+            self.dispatch_queue_label.config(text=text)
+        if hasattr(self, 'dispatch_latency_label'):
+            if stats['last_latency_ms'] is None:
+                self.dispatch_latency_label.config(text="-")
+            else:
+                self.dispatch_latency_label.config(
+                    text=f"{stats['last_latency_ms']:.0f} ms (media {stats['avg_latency_ms']:.0f} ms)"
+                )
+
     def initialize_hotkey_service_tab(self):
         """Inicializa la pestaña de servicio de hotkeys con valores por defecto"""
         try:
@@ -1259,6 +1318,8 @@ class AffinityManager:
                     if hasattr(self, 'capture_errors_label'):
                         # Aquí podrías agregar lógica para contar errores reales
                         self.capture_errors_label.config(text="0")
+                    self.update_dispatch_status()
+                    self._update_monitoring_ui()
                 except:
                     pass
                 # Programar próxima actualización en 5 segundos
@@ -0,0 +1,80 @@
+"""
+Caché de manejadores de procesos para el Administrador de Afinidad
+Comparte objetos psutil.Process entre la interfaz, el ejecutor de tareas y las estadísticas,
+identificados por (pid, create_time) para no confundir un PID reutilizado
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import psutil
+
+
+class ProcessHandleCache:
+    """Caché LRU de psutil.Process por (pid, create_time)
+
+    Crear un psutil.Process ya lee la hora de creación del proceso; reutilizarlo evita
+    esa lectura en cada operación, y la comprobación de reutilización de PID se reduce
+    a un is_running() justo antes de modificar nada.
+    """
+
+    def __init__(self, max_size: int = 512):
+        self.max_size = max_size
+        self._handles = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, pid: int, create_time: Optional[float] = None) -> psutil.Process:
+        """Manejador del proceso; si create_time no coincide el PID se ha reutilizado
+
+        Raises:
+            psutil.NoSuchProcess: Si el proceso ya no existe o el PID es de otro proceso
+        """
+        with self._lock:
+            if create_time:
+                proc = self._handles.get((pid, create_time))
+                if proc is not None:
+                    self._handles.move_to_end((pid, create_time))
+                    self.hits += 1
+                    return proc
+            self.misses += 1
+
+        proc = psutil.Process(pid)
+        actual = proc.create_time()
+        if create_time and actual != create_time:
+            raise psutil.NoSuchProcess(pid, msg="PID reutilizado por otro proceso")
+
+        with self._lock:
+            self._handles[(pid, actual)] = proc
+            self._handles.move_to_end((pid, actual))
+            while len(self._handles) > self.max_size:
+                self._handles.popitem(last=False)
+        return proc
+
+    def verify(self, proc: psutil.Process) -> bool:
+        """Comprueba antes de aplicar cambios que el PID sigue siendo el mismo proceso"""
+        if proc.is_running():
+            return True
+        self.discard(proc)
+        return False
+
+    def discard(self, proc: psutil.Process):
+        """Olvida un manejador (proceso terminado o PID reutilizado)"""
+        with self._lock:
+            for key in [key for key, value in self._handles.items() if value is proc]:
+                del self._handles[key]
+
+    def prune(self, snapshot):
+        """Descarta los manejadores de procesos que ya no están en la instantánea"""
+        if not self._handles:
+            return
+        with self._lock:
+            for pid, create_time in list(self._handles):
+                index = snapshot.index_of(pid)
+                if index < 0 or snapshot.create_times[index] != create_time:
+                    del self._handles[(pid, create_time)]
+
+    def __len__(self):
+        return len(self._handles)
@@ -0,0 +1,254 @@
+"""
+Motor de reglas de coincidencia de procesos para el Administrador de Afinidad
+Compila los criterios de todas las tareas (nombre exacto, glob o regex, ruta del ejecutable,
+línea de comandos, usuario y proceso padre) en un único evaluador con caché por (pid, create_time)
+"""
+
+import re
+import threading
+from fnmatch import translate
+from typing import Dict, List, NamedTuple, Optional, Pattern, Tuple
+
+import psutil
+
+# Prefijo para escribir una expresión regular en lugar de un glob
+REGEX_PREFIX = "re:"
+
+
+def compile_pattern(text: str) -> Tuple[Optional[str], Optional[Pattern]]:
+    """(nombre exacto en minúsculas, None) o (None, patrón compilado) según el texto
+
+    "re:..." es una expresión regular; un texto con * ? o [ es un glob; el resto es exacto.
+
+    Raises:
+        ValueError: Si la expresión regular no es válida
+    """
+    text = text.strip()
+    if text.lower().startswith(REGEX_PREFIX):
+        try:
+            return None, re.compile(text[len(REGEX_PREFIX):], re.IGNORECASE)
+        except re.error as e:
+            raise ValueError(f"Expresión regular no válida '{text}': {e}")
+    if any(char in text for char in "*?["):
+        return None, re.compile(translate(text), re.IGNORECASE)
+    return text.lower(), None
+
+
+class CompiledRule(NamedTuple):
+    """Criterios de una tarea ya compilados"""
+    task_id: str
+    name_exact: Optional[str]
+    name_pattern: Optional[Pattern]
+    exe: Optional[Pattern]
+    cmdline: Optional[str]
+    user: Optional[str]
+    parent: Optional[Pattern]
+
+    def needs_details(self) -> bool:
+        """Indica si hace falta consultar el proceso además de su nombre"""
+        return bool(self.exe or self.cmdline or self.user or self.parent)
+
+    def matches_details(self, details: 'ProcessDetails') -> bool:
+        if self.exe and not self.exe.fullmatch(details.exe):
+            return False
+        if self.cmdline and self.cmdline not in details.cmdline:
+            return False
+        if self.user and self.user != details.user:
+            return False
+        if self.parent and not self.parent.fullmatch(details.parent_name):
+            return False
+        return True
+
+
+def _optional_pattern(text: str) -> Optional[Pattern]:
+    """Patrón (glob, regex o exacto) para criterios distintos del nombre"""
+    if not text:
+        return None
+    exact, pattern = compile_pattern(text)
+    return pattern if pattern is not None else re.compile(re.escape(exact), re.IGNORECASE)
+
+
+def compile_task_rule(task_id: str, task: Dict) -> Optional[CompiledRule]:
+    """Compila los criterios de una tarea
+
+    El nombre sale de 'process_name' y es obligatorio: es el único criterio que se evalúa
+    con la instantánea, y una regla sin nombre obligaría a leer los detalles de cada proceso.
+    Los demás criterios, opcionales, salen de 'match':
+    {'exe': glob/regex, 'cmdline': subcadena, 'user': usuario, 'parent': glob/regex}.
+
+    Raises:
+        ValueError: Si algún patrón no es válido o hay criterios sin nombre de proceso
+    """
+    match = task.get('match') or {}
+    name = (task.get('process_name') or '').strip()
+    name_exact, name_pattern = compile_pattern(name) if name else (None, None)
+    rule = CompiledRule(
+        task_id,
+        name_exact,
+        name_pattern,
+        _optional_pattern(match.get('exe', '')),
+        (match.get('cmdline') or '').lower() or None,
+        (match.get('user') or '').lower() or None,
+        _optional_pattern(match.get('parent', '')),
+    )
+    if not (name_exact or name_pattern):
+        if rule.needs_details():
+            raise ValueError("Indica un nombre de proceso (exacto, glob o re:) además de los otros criterios")
+        return None
+    return rule
+
+
+class ProcessDetails:
+    """Atributos de un proceso que no están en la instantánea; se leen una vez con oneshot()"""
+
+    __slots__ = ('exe', 'cmdline', 'user', 'parent_name', 'gone')
+
+    def __init__(self, snapshot, pid: int, create_time: float):
+        self.exe = self.cmdline = self.user = self.parent_name = ""
+        self.gone = False
+        try:
+            proc = psutil.Process(pid)
+            with proc.oneshot():
+                if create_time and proc.create_time() != create_time:
+                    self.gone = True
+                    return
+                ppid = proc.ppid()
+                self.exe = self._safe(proc.exe)
+                self.cmdline = " ".join(self._safe(proc.cmdline) or ()).lower()
+                user = self._safe(proc.username)
+                # En Windows el usuario viene como DOMINIO\\usuario
+                self.user = user.rsplit("\\", 1)[-1].lower() if user else ""
+            parent = snapshot.get(ppid)
+            self.parent_name = parent.name if parent is not None else self._parent_name(ppid)
+        except (psutil.NoSuchProcess, psutil.ZombieProcess):
+            self.gone = True
+
+    @staticmethod
+    def _safe(getter):
+        try:
+            return getter()
+        except psutil.AccessDenied:
+            return ""
+
+    @staticmethod
+    def _parent_name(ppid: int) -> str:
+        try:
+            return psutil.Process(ppid).name()
+        except (psutil.NoSuchProcess, psutil.AccessDenied, ValueError):
+            return ""
+
+
+class RuleSet:
+    """Evaluador único para las reglas de todas las tareas
+
+    El coste por proceso no depende del número de reglas: las reglas candidatas de cada
+    nombre se calculan una sola vez (los nombres se repiten mucho) y el veredicto de cada
+    proceso se guarda por (pid, create_time), así que un proceso se evalúa una vez en su vida.
+    """
+
+    def __init__(self, rules: List[CompiledRule]):
+        self.rules = rules
+        self._by_task = {rule.task_id: rule for rule in rules}
+        self._exact = {}
+        self._patterned = []
+        for rule in rules:
+            if rule.name_exact:
+                self._exact.setdefault(rule.name_exact, []).append(rule)
+            else:
+                self._patterned.append(rule)
+        self._candidates = {}
+        self._verdicts = {}
+        self._rows = (None, {})  # (instantánea, id de nombre -> filas) de la última búsqueda
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_tasks(cls, tasks: Dict[str, Dict], predicate=None) -> 'RuleSet':
+        """Compila las tareas que cumplen predicate (todas si no se indica); ignora las no válidas"""
+        rules = []
+        for task_id, task in tasks.items():
+            if predicate is not None and not predicate(task):
+                continue
+            try:
+                rule = compile_task_rule(task_id, task)
+            except ValueError:
+                continue
+            if rule is not None:
+                rules.append(rule)
+        return cls(rules)
+
+    def __len__(self):
+        return len(self.rules)
+
+    def rule_for(self, task_id: str) -> Optional[CompiledRule]:
+        return self._by_task.get(task_id)
+
+    def candidates(self, name: str) -> Tuple[CompiledRule, ...]:
+        """Reglas cuyo criterio de nombre acepta el nombre indicado (cacheado por nombre)"""
+        key = name.lower()
+        cached = self._candidates.get(key)
+        if cached is None:
+            cached = tuple(self._exact.get(key, ())) + tuple(
+                rule for rule in self._patterned if rule.name_pattern.fullmatch(name)
+            )
+            self._candidates[key] = cached
+        return cached
+
+    def match(self, snapshot, index: int) -> Tuple[str, ...]:
+        """Tareas cuyas reglas cumple la fila index de la instantánea"""
+        key = (snapshot.pids[index], snapshot.create_times[index])
+        verdict = self._verdicts.get(key)
+        if verdict is not None:
+            return verdict
+
+        candidates = self.candidates(snapshot.names.names[snapshot.name_ids[index]])
+        if not candidates:
+            verdict = ()
+        elif not any(rule.needs_details() for rule in candidates):
+            verdict = tuple(rule.task_id for rule in candidates)
+        else:
+            details = ProcessDetails(snapshot, *key)
+            if details.gone:
+                return ()
+            verdict = tuple(rule.task_id for rule in candidates
+                            if not rule.needs_details() or rule.matches_details(details))
+        with self._lock:
+            self._verdicts[key] = verdict
+        return verdict
+
+    def _rows_by_name(self, snapshot) -> Dict[int, List[int]]:
+        """Índice id de nombre -> filas de la instantánea, construido una vez por instantánea"""
+        cached_snapshot, rows = self._rows
+        if cached_snapshot is not snapshot:
+            rows = {}
+            name_ids = snapshot.name_ids
+            for i in range(len(name_ids)):
+                rows.setdefault(name_ids[i], []).append(i)
+            self._rows = (snapshot, rows)
+        return rows
+
+    def find(self, snapshot, task_id: str) -> List[Tuple[int, float]]:
+        """Procesos (pid, create_time) de la instantánea que cumplen la regla de una tarea
+
+        Solo se evalúan las filas cuyo nombre acepta la regla: un nombre exacto va directo a
+        sus filas y un patrón recorre los nombres distintos, no todos los procesos.
+        """
+        rule = self._by_task.get(task_id)
+        if rule is None:
+            return []
+        rows = self._rows_by_name(snapshot)
+        if rule.name_exact:
+            name_ids = snapshot.names.ids_for(rule.name_exact)
+        else:
+            names = snapshot.names.names
+            name_ids = [name_id for name_id in rows if rule in self.candidates(names[name_id])]
+        indexes = sorted(i for name_id in name_ids for i in rows.get(name_id, ()))
+        return [(snapshot.pids[i], snapshot.create_times[i]) for i in indexes
+                if task_id in self.match(snapshot, i)]
+
+    def prune(self, snapshot):
+        """Descarta veredictos de procesos que ya no están en la instantánea"""
+        if len(self._verdicts) <= 2 * len(snapshot) + 64:
+            return
+        with self._lock:
+            alive = set(zip(snapshot.pids, snapshot.create_times))
+            self._verdicts = {key: value for key, value in self._verdicts.items() if key in alive}
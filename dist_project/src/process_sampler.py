@@ -0,0 +1,152 @@
+"""
+Muestreo de procesos en segundo plano para el Administrador de Afinidad
+Construye instantáneas inmutables en un hilo de trabajo y las entrega a la UI mediante una cola
+"""
+
+import queue
+import threading
+import time
+
+import psutil
+
+from process_handles import ProcessHandleCache
+from process_snapshot import CpuTracker, NameTable, ProcessNameIndex, ProcessSnapshot, SnapshotBuilder
+
+
+class ProcessSampler:
+    """Recorre los procesos en un hilo de trabajo y publica instantáneas en una cola"""
+
+    def __init__(self):
+        self.snapshots = queue.Queue()
+        self.names = NameTable()
+        self.cpu_tracker = CpuTracker()
+        self.name_index = ProcessNameIndex()
+        self.handles = ProcessHandleCache()  # Compartido por la interfaz y el ejecutor de tareas
+        self.latest = ProcessSnapshot.empty()
+        self.interval = None
+        self._worker = None
+        self._busy = False
+        self._stop = False
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._sample_lock = threading.RLock()
+        self._listeners = []
+
+    def start(self, interval: float = 2.0):
+        """Inicia el muestreo periódico en un único hilo de trabajo"""
+        with self._lock:
+            if self._worker and self._worker.is_alive():
+                return
+            self.interval = interval
+            self._stop = False
+            self._worker = threading.Thread(target=self._loop, daemon=True)
+            self._worker.start()
+
+    def stop(self):
+        """Detiene el muestreo periódico"""
+        self._stop = True
+        self._wake.set()
+
+    def add_listener(self, callback):
+        """Registra callback(instantánea, índices de procesos nuevos), llamado en el hilo que muestrea"""
+        self._listeners.append(callback)
+
+    def request_refresh(self) -> bool:
+        """Solicita una nueva instantánea sin bloquear
+
+        Returns:
+            True si se inició un muestreo nuevo, False si se reutiliza el que ya está en curso
+        """
+        with self._lock:
+            if self._busy:
+                return False
+            if self.interval is not None and self._worker and self._worker.is_alive():
+                # Adelantar la siguiente vuelta del muestreo periódico
+                self._wake.set()
+            else:
+                self._busy = True
+                self._worker = threading.Thread(target=self._run, daemon=True)
+                self._worker.start()
+            return True
+
+    def is_busy(self) -> bool:
+        """Indica si hay un muestreo en curso"""
+        return self._busy
+
+    def _loop(self):
+        """Bucle del muestreo periódico"""
+        while not self._stop:
+            self._busy = True
+            self._run()
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def _run(self):
+        """Toma una instantánea y la publica en la cola"""
+        try:
+            snapshot = self.take_snapshot()
+            # Construir el índice de búsqueda aquí y no en el hilo de Tk
+            snapshot.search_index
+            self.snapshots.put(snapshot)
+        except Exception as e:
+            # Los errores se entregan por la misma cola para que la UI los registre
+            self.snapshots.put(e)
+        finally:
+            self._busy = False
+
+    def take_snapshot(self) -> ProcessSnapshot:
+        """Recorre los procesos del sistema y construye una instantánea"""
+        # La tabla de nombres y el contador de CPU no admiten dos muestreos a la vez
+        with self._sample_lock:
+            builder = SnapshotBuilder(self.names)
+            for proc in psutil.process_iter(['pid', 'ppid', 'name', 'create_time', 'cpu_times', 'memory_info']):
+                try:
+                    pinfo = proc.info
+                    memory_info = pinfo['memory_info']
+                    cpu_times = pinfo['cpu_times']
+                    builder.add(
+                        pinfo['pid'],
+                        pinfo['name'] or "",
+                        pinfo['create_time'] or 0.0,
+                        cpu_times.user + cpu_times.system if cpu_times else 0.0,
+                        memory_info.rss if memory_info else 0,
+                        pinfo['ppid'] or 0
+                    )
+                except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                    continue
+
+            snapshot = builder.build(self.cpu_tracker, time.time())
+            added = self.name_index.update(self.latest, snapshot)
+            self.handles.prune(snapshot)
+            self.latest = snapshot
+            for callback in self._listeners:
+                callback(snapshot, added)
+            return snapshot
+
+    def fresh_name_index(self, max_age: float) -> ProcessNameIndex:
+        """Índice de nombres con una antigüedad máxima; si está caducado se muestrea en el hilo actual"""
+        if self.name_index.age() > max_age:
+            with self._sample_lock:
+                # Otro hilo pudo refrescarlo mientras se esperaba el bloqueo
+                if self.name_index.age() > max_age:
+                    self.take_snapshot()
+        return self.name_index
+
+    def drain(self):
+        """Extrae todo lo pendiente en la cola sin bloquear
+
+        Returns:
+            (última instantánea o None, lista de errores)
+        """
+        snapshot = None
+        errors = []
+        while True:
+            try:
+                item = self.snapshots.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, Exception):
+                errors.append(item)
+            else:
+                snapshot = item
+        return snapshot, errors
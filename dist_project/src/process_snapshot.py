@@ -0,0 +1,423 @@
+"""
+Instantáneas compactas de procesos para el Administrador de Afinidad
+Guarda los datos en columnas (arrays paralelos) en lugar de un objeto por proceso
+"""
+
+import bisect
+import sys
+import threading
+import time
+from array import array
+from typing import Dict, FrozenSet, Iterator, List, Optional, Tuple
+
+
+class NameTable:
+    """Tabla de nombres de proceso internados, compartida entre instantáneas
+
+    Solo crece: los identificadores ya asignados no cambian, por lo que una
+    instantánea antigua puede seguir leyéndola desde otro hilo.
+    """
+
+    def __init__(self):
+        self.names = []
+        self.lowered = []
+        self._ids = {}
+        self._lowered_ids = {}
+
+    def intern(self, name: str) -> int:
+        """Devuelve el identificador del nombre, registrándolo si es nuevo"""
+        name_id = self._ids.get(name)
+        if name_id is None:
+            name_id = len(self.names)
+            lowered = name.lower()
+            self.names.append(sys.intern(name))
+            self.lowered.append(lowered)
+            self._lowered_ids.setdefault(lowered, []).append(name_id)
+            self._ids[name] = name_id
+        return name_id
+
+    def ids_for(self, name: str) -> List[int]:
+        """Identificadores de los nombres que coinciden sin distinguir mayúsculas"""
+        return self._lowered_ids.get(name.lower(), [])
+
+
+class ProcessRow:
+    """Vista de una fila de la instantánea (no copia los datos)"""
+
+    __slots__ = ('_snapshot', '_index')
+
+    def __init__(self, snapshot: 'ProcessSnapshot', index: int):
+        self._snapshot = snapshot
+        self._index = index
+
+    @property
+    def pid(self) -> int:
+        return self._snapshot.pids[self._index]
+
+    @property
+    def name(self) -> str:
+        return self._snapshot.names.names[self._snapshot.name_ids[self._index]]
+
+    @property
+    def create_time(self) -> float:
+        return self._snapshot.create_times[self._index]
+
+    @property
+    def ppid(self) -> int:
+        return self._snapshot.ppids[self._index]
+
+    @property
+    def cpu_percent(self) -> float:
+        return self._snapshot.cpu_percents[self._index]
+
+    @property
+    def memory_rss(self) -> int:
+        return self._snapshot.rss[self._index]
+
+    @property
+    def cpu_time(self) -> float:
+        return self._snapshot.cpu_times[self._index]
+
+    def __repr__(self) -> str:
+        return f"ProcessRow(pid={self.pid}, name={self.name!r})"
+
+
+class ProcessSnapshot:
+    """Instantánea inmutable de los procesos del sistema en formato columnar
+
+    Las filas están ordenadas por PID, de modo que la búsqueda de un PID es binaria.
+    """
+
+    __slots__ = ('timestamp', 'names', 'pids', 'create_times', 'name_ids', 'ppids',
+                 'rss', 'cpu_times', 'cpu_percents', '_search_index', '_children')
+
+    def __init__(self, names: NameTable, pids: array, create_times: array, name_ids: array, ppids: array,
+                 rss: array, cpu_times: array, cpu_percents: array, timestamp: float):
+        self.timestamp = timestamp
+        self.names = names
+        self.pids = pids
+        self.create_times = create_times
+        self.name_ids = name_ids
+        self.ppids = ppids
+        self.rss = rss
+        self.cpu_times = cpu_times
+        self.cpu_percents = cpu_percents
+        self._search_index = None
+        self._children = None
+
+    @classmethod
+    def empty(cls) -> 'ProcessSnapshot':
+        builder = SnapshotBuilder(NameTable())
+        return builder.build(CpuTracker(), 0.0)
+
+    def index_of(self, pid: int) -> int:
+        """Posición del PID en la instantánea o -1 si no está"""
+        i = bisect.bisect_left(self.pids, pid)
+        if i < len(self.pids) and self.pids[i] == pid:
+            return i
+        return -1
+
+    def get(self, pid: int) -> Optional[ProcessRow]:
+        """Obtiene la fila de un PID o None si no estaba en la instantánea"""
+        i = self.index_of(pid)
+        return ProcessRow(self, i) if i >= 0 else None
+
+    def row(self, index: int) -> ProcessRow:
+        return ProcessRow(self, index)
+
+    @property
+    def search_index(self) -> 'ProcessSearchIndex':
+        """Índice de búsqueda (el muestreador lo construye en su hilo de trabajo)"""
+        if self._search_index is None:
+            self._search_index = ProcessSearchIndex(self)
+        return self._search_index
+
+    @property
+    def children(self) -> Dict[int, List[int]]:
+        """Índice ppid -> filas de sus hijos directos, construido en una pasada la primera vez"""
+        if self._children is None:
+            children = {}
+            ppids = self.ppids
+            for i in range(len(ppids)):
+                children.setdefault(ppids[i], []).append(i)
+            self._children = children
+        return self._children
+
+    def descendants(self, index: int) -> List[int]:
+        """Filas de todo el subárbol de la fila index, sin incluirla
+
+        Un hijo creado antes que su supuesto padre es un huérfano cuyo ppid se ha
+        reutilizado, así que no se cuenta como descendiente.
+        """
+        children, pids, create_times = self.children, self.pids, self.create_times
+        result = []
+        pending = [index]
+        seen = {index}
+        while pending:
+            parent = pending.pop()
+            for child in children.get(pids[parent], ()):
+                if child in seen or create_times[child] < create_times[parent]:
+                    continue
+                seen.add(child)
+                result.append(child)
+                pending.append(child)
+        return result
+
+    def filter(self, text: str) -> array:
+        """PIDs cuyo nombre o PID contiene el texto, en orden"""
+        if not text:
+            return self.pids
+        pids = self.pids
+        return array(pids.typecode, (pids[i] for i in sorted(self.search_index.search(text))))
+
+    def find_by_name(self, name: str) -> List[ProcessRow]:
+        """Filas cuyo nombre coincide exactamente sin distinguir mayúsculas"""
+        ids = self.names.ids_for(name)
+        if not ids:
+            return []
+        name_ids = self.name_ids
+        if len(ids) == 1:
+            name_id = ids[0]
+            return [ProcessRow(self, i) for i in range(len(name_ids)) if name_ids[i] == name_id]
+        ids = set(ids)
+        return [ProcessRow(self, i) for i in range(len(name_ids)) if name_ids[i] in ids]
+
+    def __contains__(self, pid: int) -> bool:
+        return self.index_of(pid) >= 0
+
+    def __getitem__(self, pid: int) -> ProcessRow:
+        i = self.index_of(pid)
+        if i < 0:
+            raise KeyError(pid)
+        return ProcessRow(self, i)
+
+    def __iter__(self) -> Iterator[ProcessRow]:
+        return (ProcessRow(self, i) for i in range(len(self.pids)))
+
+    def __len__(self) -> int:
+        return len(self.pids)
+
+
+class CpuTracker:
+    """Calcula el % de CPU por proceso a partir de los tiempos de CPU entre instantáneas
+
+    Conserva las columnas de la muestra anterior y las cruza con la nueva por
+    (pid, create_time), de modo que un PID reutilizado no hereda el historial
+    del proceso anterior.
+    """
+
+    def __init__(self):
+        self._pids = array('I')
+        self._create_times = array('d')
+        self._cpu_times = array('d')
+        self._timestamp = 0.0
+
+    def update(self, pids: array, create_times: array, cpu_times: array, now: float) -> array:
+        """Calcula el % de CPU de todos los procesos en una sola pasada
+
+        Args:
+            pids: PIDs ordenados de la nueva muestra
+            create_times: Hora de creación de cada proceso
+            cpu_times: Tiempo de CPU acumulado (usuario + sistema) en segundos
+            now: Marca de tiempo de la muestra
+
+        Returns:
+            array('f') con el % de CPU de cada fila (100% equivale a un núcleo completo)
+        """
+        percents = array('f', bytes(4 * len(pids)))
+        prev_pids, prev_create, prev_cpu = self._pids, self._create_times, self._cpu_times
+        prev_elapsed = now - self._timestamp
+        j, prev_count = 0, len(prev_pids)
+
+        for i in range(len(pids)):
+            pid = pids[i]
+            # Cruce de dos listas ordenadas por PID
+            while j < prev_count and prev_pids[j] < pid:
+                j += 1
+            if j < prev_count and prev_pids[j] == pid and prev_create[j] == create_times[i]:
+                delta = cpu_times[i] - prev_cpu[j]
+                elapsed = prev_elapsed
+            else:
+                # Primera vez que se ve el proceso: media desde su creación
+                delta = cpu_times[i]
+                elapsed = now - create_times[i] if create_times[i] else 0.0
+            if elapsed > 0 and delta > 0:
+                percents[i] = delta / elapsed * 100
+
+        self._pids, self._create_times, self._cpu_times = pids, create_times, cpu_times
+        self._timestamp = now
+        return percents
+
+
+class SnapshotBuilder:
+    """Acumula filas en columnas y produce una ProcessSnapshot"""
+
+    def __init__(self, names: NameTable):
+        self.names = names
+        self.pids = array('I')
+        self.create_times = array('d')
+        self.name_ids = array('I')
+        self.ppids = array('I')
+        self.rss = array('Q')
+        self.cpu_times = array('d')
+
+    def add(self, pid: int, name: str, create_time: float, cpu_time: float, rss: int, ppid: int = 0):
+        self.pids.append(pid)
+        self.create_times.append(create_time)
+        self.name_ids.append(self.names.intern(name))
+        self.ppids.append(ppid)
+        self.rss.append(rss)
+        self.cpu_times.append(cpu_time)
+
+    def build(self, cpu_tracker: CpuTracker, now: float) -> ProcessSnapshot:
+        """Cierra la instantánea calculando el % de CPU de cada fila"""
+        pids = self.pids
+        if any(pids[i] > pids[i + 1] for i in range(len(pids) - 1)):
+            # psutil entrega los procesos ordenados por PID; por si acaso, ordenar las columnas
+            order = sorted(range(len(pids)), key=pids.__getitem__)
+            for attr in ('pids', 'create_times', 'name_ids', 'ppids', 'rss', 'cpu_times'):
+                column = getattr(self, attr)
+                setattr(self, attr, array(column.typecode, (column[i] for i in order)))
+
+        cpu_percents = cpu_tracker.update(self.pids, self.create_times, self.cpu_times, now)
+        return ProcessSnapshot(self.names, self.pids, self.create_times, self.name_ids, self.ppids,
+                               self.rss, self.cpu_times, cpu_percents, now)
+
+
+class ProcessSearchIndex:
+    """Índice de búsqueda por nombre (en minúsculas) y PID sobre una instantánea
+
+    Los resultados son posiciones de fila dentro de la instantánea.
+    """
+
+    def __init__(self, snapshot: ProcessSnapshot):
+        self._snapshot = snapshot
+        # Nombre en minúsculas -> identificadores de nombre presentes en la instantánea
+        lowered = snapshot.names.lowered
+        names = {}
+        for name_id in set(snapshot.name_ids):
+            names.setdefault(lowered[name_id], []).append(name_id)
+        self._names = names
+        self._sorted_names = sorted(names)
+        # Todos los PIDs en un solo texto "\n1\n2\n...\n" con la posición de inicio de cada uno
+        self._pid_text = "\n" + "".join(f"{pid}\n" for pid in snapshot.pids)
+        offsets = array('I')
+        position = 1
+        for pid in snapshot.pids:
+            offsets.append(position)
+            position += len(str(pid)) + 1
+        self._pid_offsets = offsets
+        # Última consulta, para refinar en lugar de recorrer todo al seguir escribiendo
+        self._last_query = None
+        self._last_matches = ()
+
+    def _rows_with_names(self, keys) -> set:
+        ids = {name_id for key in keys for name_id in self._names[key]}
+        name_ids = self._snapshot.name_ids
+        return {i for i in range(len(name_ids)) if name_ids[i] in ids} if ids else set()
+
+    def _rows_with_pid_text(self, text: str, prefix: bool) -> set:
+        if not text.isdigit():
+            return set()
+        needle = "\n" + text if prefix else text
+        rows = set()
+        pid_text, offsets = self._pid_text, self._pid_offsets
+        position = pid_text.find(needle)
+        while position >= 0:
+            rows.add(bisect.bisect_right(offsets, position + (1 if prefix else 0)) - 1)
+            position = pid_text.find(needle, position + 1)
+        return rows
+
+    def prefix(self, text: str) -> FrozenSet[int]:
+        """Filas cuyo nombre o PID empieza por el texto"""
+        text = text.lower()
+        start = bisect.bisect_left(self._sorted_names, text)
+        keys = []
+        for key in self._sorted_names[start:]:
+            if not key.startswith(text):
+                break
+            keys.append(key)
+        return frozenset(self._rows_with_names(keys) | self._rows_with_pid_text(text, True))
+
+    def search(self, text: str) -> FrozenSet[int]:
+        """Filas cuyo nombre o PID contiene el texto"""
+        text = text.lower()
+        if not text:
+            return frozenset(range(len(self._snapshot)))
+
+        # Si la consulta amplía la anterior basta con filtrar sus coincidencias
+        if self._last_query is not None and text.startswith(self._last_query):
+            candidates = self._last_matches
+        else:
+            candidates = self._names
+        matches = tuple(key for key in candidates if text in key)
+        self._last_query, self._last_matches = text, matches
+
+        return frozenset(self._rows_with_names(matches) | self._rows_with_pid_text(text, False))
+
+
+class ProcessNameIndex:
+    """Índice vivo nombre normalizado -> {(pid, create_time)} de los procesos en ejecución
+
+    El muestreador lo actualiza con las diferencias entre instantáneas consecutivas,
+    así que consultar los procesos de un nombre no requiere recorrerlos todos.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.updated_at = 0.0
+
+    @staticmethod
+    def normalize(name: str) -> str:
+        return name.lower()
+
+    def update(self, previous: ProcessSnapshot, snapshot: ProcessSnapshot) -> List[int]:
+        """Aplica las altas y bajas entre dos instantáneas en una sola pasada
+
+        Returns:
+            Índices en la nueva instantánea de los procesos que no estaban en la anterior
+        """
+        added = []
+        removed = []
+        old_pids, old_create = previous.pids, previous.create_times
+        new_pids, new_create = snapshot.pids, snapshot.create_times
+        i = j = 0
+        while i < len(new_pids) or j < len(old_pids):
+            if j >= len(old_pids) or (i < len(new_pids) and new_pids[i] < old_pids[j]):
+                added.append(i)
+                i += 1
+            elif i >= len(new_pids) or old_pids[j] < new_pids[i]:
+                removed.append(j)
+                j += 1
+            else:
+                # Mismo PID: si cambió la hora de creación el PID se reutilizó
+                if new_create[i] != old_create[j]:
+                    removed.append(j)
+                    added.append(i)
+                i += 1
+                j += 1
+
+        old_names, new_names = previous.names.lowered, snapshot.names.lowered
+        with self._lock:
+            for j in removed:
+                name = old_names[previous.name_ids[j]]
+                entry = self._entries.get(name)
+                if entry is not None:
+                    entry.discard((old_pids[j], old_create[j]))
+                    if not entry:
+                        del self._entries[name]
+            for i in added:
+                name = new_names[snapshot.name_ids[i]]
+                self._entries.setdefault(name, set()).add((new_pids[i], new_create[i]))
+            self.updated_at = snapshot.timestamp
+        return added
+
+    def lookup(self, name: str) -> Tuple[Tuple[int, float], ...]:
+        """Pares (pid, create_time) vivos con ese nombre según la última instantánea"""
+        with self._lock:
+            return tuple(self._entries.get(self.normalize(name), ()))
+
+    def age(self) -> float:
+        """Segundos desde la última actualización"""
+        return time.time() - self.updated_at
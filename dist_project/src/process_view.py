@@ -0,0 +1,236 @@
+"""
+Vista de la lista de procesos para el Administrador de Afinidad
+Mantiene todos los datos en Python y solo materializa en el Treeview las filas visibles
+"""
+
+import bisect
+import tkinter as tk
+from array import array
+from tkinter import ttk
+from typing import Callable, Tuple
+
+
+class ProcessRowModel:
+    """PIDs de la lista de procesos, ordenados; los valores se formatean solo al mostrarse"""
+
+    def __init__(self):
+        self.keys = array('I')
+        self.formatter = None
+
+    def update(self, keys: array, formatter: Callable[[int], Tuple]) -> Tuple[int, int]:
+        """Sustituye las claves y cuenta las diferencias con las anteriores
+
+        Args:
+            keys: PIDs ordenados de menor a mayor
+            formatter: Función pid -> tupla de valores de las columnas
+
+        Returns:
+            (insertados, eliminados)
+        """
+        old = self.keys
+        self.formatter = formatter
+        if keys == old:
+            return 0, 0
+
+        # Cruce de las dos listas ordenadas
+        inserted = removed = 0
+        i = j = 0
+        while i < len(keys) and j < len(old):
+            if keys[i] == old[j]:
+                i += 1
+                j += 1
+            elif keys[i] < old[j]:
+                inserted += 1
+                i += 1
+            else:
+                removed += 1
+                j += 1
+        inserted += len(keys) - i
+        removed += len(old) - j
+
+        self.keys = keys
+        return inserted, removed
+
+    def position(self, key: int) -> int:
+        """Posición del PID en la lista o -1 si no está"""
+        i = bisect.bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            return i
+        return -1
+
+    def values(self, key: int) -> Tuple:
+        return self.formatter(key)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+
+class VirtualProcessList(ttk.Frame):
+    """Lista de procesos virtualizada: el Treeview solo contiene las filas del área visible"""
+
+    def __init__(self, parent, columns, widths, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(0, weight=1)
+
+        self.model = ProcessRowModel()
+        self.offset = 0
+        self.visible_rows = 25
+        self.selected_key = None
+        self._slots = []
+        self._slot_values = []
+        self._slot_keys = []
+
+        self.tree = ttk.Treeview(self, columns=columns, show='headings',
+                                 height=self.visible_rows, selectmode='browse')
+        for col, width in zip(columns, widths):
+            self.tree.heading(col, text=col)
+            self.tree.column(col, width=width, minwidth=70)
+        self.tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.yview)
+        self.scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+
+        self.tree.bind('<<TreeviewSelect>>', self._on_tree_select)
+        self.tree.bind('<Configure>', self._on_resize)
+        self.tree.bind('<MouseWheel>', self._on_mousewheel)
+        self.tree.bind('<Button-4>', lambda e: self.yview('scroll', -3, 'units'))
+        self.tree.bind('<Button-5>', lambda e: self.yview('scroll', 3, 'units'))
+        for key, step in (('<Up>', -1), ('<Down>', 1), ('<Prior>', None), ('<Next>', None)):
+            self.tree.bind(key, lambda e, k=key, s=step: self._on_navigate(k, s))
+
+    def set_rows(self, keys: array, formatter: Callable[[int], Tuple]) -> Tuple[int, int, int]:
+        """Actualiza los datos y repinta solo el área visible
+
+        Args:
+            keys: PIDs ordenados de menor a mayor
+            formatter: Función pid -> tupla de valores, llamada solo para las filas visibles
+
+        Returns:
+            (insertados, eliminados, filas visibles actualizadas)
+        """
+        inserted, removed = self.model.update(keys, formatter)
+        self._clamp_offset()
+        updated = self._render()
+        return inserted, removed, updated
+
+    def selection(self) -> Tuple:
+        """PID seleccionado como tupla (compatible con Treeview.selection)"""
+        if self.selected_key is not None and self.model.position(self.selected_key) >= 0:
+            return (self.selected_key,)
+        return ()
+
+    def see(self, key):
+        """Desplaza la vista para que el PID indicado sea visible"""
+        position = self.model.position(key)
+        if position < 0:
+            return
+        if position < self.offset:
+            self.offset = position
+        elif position >= self.offset + self.visible_rows:
+            self.offset = position - self.visible_rows + 1
+        self._clamp_offset()
+        self._render()
+
+    def yview(self, *args):
+        """Comando de la barra de desplazamiento ('moveto' o 'scroll')"""
+        total = len(self.model)
+        if not args or not total:
+            return
+        if args[0] == 'moveto':
+            self.offset = int(float(args[1]) * total)
+        elif args[0] == 'scroll':
+            amount = int(args[1])
+            if args[2] == 'pages':
+                amount *= self.visible_rows
+            self.offset += amount
+        self._clamp_offset()
+        self._render()
+
+    def _clamp_offset(self):
+        self.offset = max(0, min(self.offset, len(self.model) - self.visible_rows))
+
+    def _render(self):
+        """Materializa en el Treeview únicamente las filas visibles
+
+        Returns:
+            Número de filas del widget cuyo contenido cambió
+        """
+        keys = self.model.keys[self.offset:self.offset + self.visible_rows]
+
+        # Ajustar el número de filas del widget al de filas visibles
+        while len(self._slots) < len(keys):
+            self._slots.append(self.tree.insert('', 'end', values=()))
+            self._slot_values.append(None)
+            self._slot_keys.append(None)
+        if len(self._slots) > len(keys):
+            self.tree.delete(*self._slots[len(keys):])
+            del self._slots[len(keys):]
+            del self._slot_values[len(keys):]
+            del self._slot_keys[len(keys):]
+
+        selected_slot = None
+        updated = 0
+        for i, key in enumerate(keys):
+            values = self.model.values(key)
+            if self._slot_values[i] != values:
+                self.tree.item(self._slots[i], values=values)
+                self._slot_values[i] = values
+                updated += 1
+            self._slot_keys[i] = key
+            if key == self.selected_key:
+                selected_slot = self._slots[i]
+
+        # Mantener la selección en el PID, no en la posición del widget
+        current = self.tree.selection()
+        if selected_slot is None:
+            if current:
+                self.tree.selection_remove(*current)
+        elif current != (selected_slot,):
+            self.tree.selection_set(selected_slot)
+
+        total = len(self.model)
+        if total:
+            self.scrollbar.set(self.offset / total, min(1.0, (self.offset + len(keys)) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+        return updated
+
+    def _on_tree_select(self, event=None):
+        current = self.tree.selection()
+        if not current:
+            # Ocurre al desplazar la fila seleccionada fuera de la vista
+            return
+        slot = self._slots.index(current[0]) if current[0] in self._slots else None
+        if slot is None:
+            return
+        key = self._slot_keys[slot]
+        if key != self.selected_key:
+            self.selected_key = key
+            self.event_generate('<<ProcessSelect>>')
+
+    def _on_resize(self, event=None):
+        rowheight = int(ttk.Style().lookup('Treeview', 'rowheight') or 20)
+        visible = max(1, (self.tree.winfo_height() - 25) // rowheight)
+        if visible != self.visible_rows:
+            self.visible_rows = visible
+            self._clamp_offset()
+            self._render()
+
+    def _on_mousewheel(self, event):
+        self.yview('scroll', -3 if event.delta > 0 else 3, 'units')
+        return "break"
+
+    def _on_navigate(self, key_name, step):
+        """Mueve la selección por el conjunto completo de datos, no solo por las filas visibles"""
+        if step is None:
+            step = -self.visible_rows if key_name == '<Prior>' else self.visible_rows
+        if not len(self.model):
+            return "break"
+        position = self.model.position(self.selected_key) if self.selected_key is not None else -1
+        position = self.offset if position < 0 else position + step
+        position = max(0, min(len(self.model) - 1, position))
+        self.selected_key = self.model.keys[position]
+        self.see(self.selected_key)
+        self.event_generate('<<ProcessSelect>>')
+        return "break"
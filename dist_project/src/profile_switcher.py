@@ -0,0 +1,241 @@
+"""
+Cambio automático de perfil de afinidad para el Administrador de Afinidad
+Alterna cada tarea entre su perfil de rendimiento (alto) y de eficiencia (bajo) según la carga
+del proceso y de los núcleos, con histéresis y un tiempo mínimo de permanencia
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, NamedTuple, Optional
+
+import psutil
+
+from cgroup_cpuset import CgroupUnavailable
+from cpu_topology import get_topology, parse_cpu_list
+
+PROFILE_HIGH = "high"
+PROFILE_LOW = "low"
+
+PROFILE_LABELS = {
+    PROFILE_HIGH: "rendimiento",
+    PROFILE_LOW: "eficiencia",
+}
+
+# Valores por defecto de task['auto_profile']
+DEFAULT_AUTO_PROFILE = {
+    'enabled': False,
+    'low_affinity': "",      # Lista de CPUs ("0,1") o selector de topología ("node:0 & physical")
+    'high_threshold': 60.0,  # % de CPU del proceso (100 = un núcleo) para pasar a rendimiento
+    'low_threshold': 20.0,   # % de CPU del proceso para volver a eficiencia
+    'core_threshold': 85.0,  # Carga media de los núcleos del perfil bajo que también fuerza el paso a alto
+    'min_dwell': 30.0,       # Segundos mínimos en un perfil antes de volver a cambiar
+}
+
+# Suavizado exponencial de la carga del proceso entre muestras
+SMOOTHING = 0.5
+
+
+class AutoProfileConfig(NamedTuple):
+    """Configuración del cambio automático de una tarea"""
+    high_affinity: List[int]
+    low_affinity: List[int]
+    high_threshold: float
+    low_threshold: float
+    core_threshold: float
+    min_dwell: float
+
+
+class AutoProfileState:
+    """Perfil actual de una tarea, cambio en curso y carga suavizada de sus procesos"""
+
+    __slots__ = ('profile', 'since', 'load', 'pending')
+
+    def __init__(self, profile: Optional[str] = None, since: float = 0.0, load: Optional[float] = None):
+        self.profile = profile
+        self.since = since  # Último cambio aplicado o último intento fallido
+        self.load = load
+        self.pending = None  # Perfil que se está aplicando; profile solo cambia si se aplica
+
+
+def resolve_cpus(text: str) -> List[int]:
+    """CPUs de una lista ("0,2-3") o de un selector de topología
+
+    Raises:
+        ValueError: Si el texto no es ni una lista ni un selector válido
+    """
+    text = (text or "").strip()
+    if not text:
+        return []
+    try:
+        return parse_cpu_list(text)
+    except ValueError:
+        return get_topology().resolve(text)
+
+
+def config_from_task(task: Dict, high_affinity: List[int]) -> Optional[AutoProfileConfig]:
+    """Configuración de la tarea, o None si el cambio automático no está activo o no es válido"""
+    settings = dict(DEFAULT_AUTO_PROFILE, **(task.get('auto_profile') or {}))
+    if not settings['enabled']:
+        return None
+    try:
+        low_affinity = resolve_cpus(settings['low_affinity'])
+    except ValueError:
+        return None
+    if not low_affinity or not high_affinity:
+        return None
+    return AutoProfileConfig(
+        list(high_affinity), low_affinity,
+        float(settings['high_threshold']), float(settings['low_threshold']),
+        float(settings['core_threshold']), float(settings['min_dwell']),
+    )
+
+
+def decide(state: AutoProfileState, load: float, core_load: float,
+           config: AutoProfileConfig, now: float) -> Optional[str]:
+    """Perfil al que hay que cambiar, o None para quedarse en el actual
+
+    Histéresis: se sube con high_threshold y solo se baja por debajo de low_threshold.
+    Tampoco se cambia antes de min_dwell segundos en el perfil actual (o desde el último
+    intento fallido).
+    """
+    if now - state.since < config.min_dwell:
+        return None
+    if state.profile is None:
+        return PROFILE_HIGH if load >= config.high_threshold else PROFILE_LOW
+    if state.profile == PROFILE_LOW:
+        # Proceso muy activo, o activo y con sus núcleos saturados
+        if load >= config.high_threshold or (load > config.low_threshold and core_load >= config.core_threshold):
+            return PROFILE_HIGH
+    elif load <= config.low_threshold:
+        return PROFILE_LOW
+    return None
+
+
+class ProfileSwitcher:
+    """Evalúa en cada instantánea del muestreador las tareas con cambio automático de perfil
+
+    Usa el % de CPU que ya calcula la instantánea y una lectura por núcleo de psutil,
+    así que no añade recorridos de procesos.
+    """
+
+    def __init__(self, task_manager):
+        self.task_manager = task_manager
+        self._configs = {}
+        self._states = {}
+        self._lock = threading.Lock()
+        self._pool = None
+        self.switches = 0
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        """Hilo propio para los cambios: cada lote usa el pool compartido de afinidad, y ocupar
+        sus hilos con los cambios dejaría los lotes sin hilos libres (interbloqueo)"""
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="profile-switch")
+        return self._pool
+
+    def rebuild(self):
+        """Recalcula qué tareas tienen cambio automático"""
+        configs = {}
+        for task_id, task in self.task_manager.automated_tasks.items():
+            config = config_from_task(task, self.task_manager._resolve_task_affinity(task))
+            if config is not None:
+                configs[task_id] = config
+        with self._lock:
+            self._configs = configs
+            self._states = {task_id: self._states.get(task_id, AutoProfileState())
+                            for task_id in configs}
+
+    def is_active(self) -> bool:
+        return bool(self._configs)
+
+    def current_profile(self, task_id: str) -> Optional[str]:
+        state = self._states.get(task_id)
+        return state.profile if state else None
+
+    def on_snapshot(self, snapshot, added):
+        """Listener del muestreador"""
+        if not self._configs:
+            return
+        core_loads = psutil.cpu_percent(percpu=True)
+        now = snapshot.timestamp
+        rule_set = self.task_manager.rule_set
+
+        switches = []
+        with self._lock:
+            for task_id, config in self._configs.items():
+                matches = rule_set.find(snapshot, task_id)
+                if not matches:
+                    continue
+                load = sum(snapshot.get(pid).cpu_percent for pid, _ in matches)
+                state = self._states[task_id]
+                state.load = load if state.load is None else SMOOTHING * load + (1 - SMOOTHING) * state.load
+                low_cores = [core_loads[cpu] for cpu in config.low_affinity if cpu < len(core_loads)]
+                core_load = sum(low_cores) / len(low_cores) if low_cores else 0.0
+
+                if state.pending is not None:
+                    continue  # Hay un cambio en curso
+                profile = decide(state, state.load, core_load, config, now)
+                if profile is not None and profile != state.profile:
+                    state.pending = profile
+                    switches.append((task_id, profile, matches, state.load, core_load, now))
+
+        for switch in switches:
+            self._get_pool().submit(self._switch, *switch)
+
+    def _switch(self, task_id: str, profile: str, matches, load: float, core_load: float, now: float):
+        """Hilo de cambios: aplica el perfil y solo entonces lo da por activo"""
+        applied = False
+        try:
+            applied = self._apply_profile(task_id, profile, matches, load, core_load)
+        finally:
+            self._finish_switch(task_id, profile, applied, now)
+
+    def _apply_profile(self, task_id: str, profile: str, matches, load: float, core_load: float) -> bool:
+        """Aplica el perfil a todos los procesos de la tarea como un lote con reversión
+
+        matches son pares (pid, create_time): un PID reutilizado por otro proceso no se toca.
+        """
+        config = self._configs.get(task_id)
+        task = self.task_manager.automated_tasks.get(task_id)
+        if config is None or task is None:
+            return False
+        processes = [proc for proc in self.task_manager._get_processes(matches)
+                     if self.task_manager.verify_process(proc)]
+        if not processes:
+            return False
+        cpus = config.high_affinity if profile == PROFILE_HIGH else config.low_affinity
+        self.task_manager.log_message(
+            f"Cambio automático de {task['process_name']} a perfil de {PROFILE_LABELS[profile]} "
+            f"(carga {load:.0f}%, núcleos {core_load:.0f}%)", "info"
+        )
+        if task.get('use_cgroup') and self._switch_cgroup(task_id, cpus, [proc.pid for proc in processes]):
+            return True
+        result = self.task_manager.apply_affinity_batch([(proc, cpus) for proc in processes], 0.5)
+        return not result.rolled_back
+
+    def _finish_switch(self, task_id: str, profile: str, applied: bool, now: float):
+        """Confirma el perfil si se aplicó; si el lote se revirtió se conserva el anterior"""
+        with self._lock:
+            state = self._states.get(task_id)
+            if state is None:
+                return
+            state.pending = None
+            state.since = now  # También tras un fallo, para no reintentar antes de min_dwell
+            if applied:
+                state.profile = profile
+                self.switches += 1
+
+    def _switch_cgroup(self, task_id: str, cpus: List[int], pids: List[int]) -> bool:
+        """Cambio de perfil con una sola escritura en cpuset.cpus; False si hay que usar el lote por proceso"""
+        cgroups = self.task_manager.cgroups
+        if not cgroups.available():
+            return False
+        try:
+            cgroups.set_cpus(task_id, cpus)
+            # Los procesos ya agrupados se saltan; solo se mueven los que aún no lo estén
+            cgroups.attach(task_id, pids)
+        except (CgroupUnavailable, OSError) as e:
+            self.task_manager.log_message(f"No se pudo escribir el cpuset de la tarea: {str(e)}", "warning")
+            return False
+        return True
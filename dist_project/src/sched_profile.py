@@ -0,0 +1,215 @@
+"""
+Perfil de planificación para el Administrador de Afinidad
+Prioridad (nice / clase de prioridad), prioridad de E/S y política del planificador
+(SCHED_BATCH / SCHED_IDLE) que se aplican y verifican junto con la afinidad
+"""
+
+import os
+from typing import Dict, List, NamedTuple, Optional
+
+import psutil
+
+from affinity_ops import (STATUS_ACCESS_DENIED, STATUS_ERROR, STATUS_GONE, STATUS_MISMATCH, STATUS_OK,
+                          STATUS_UNSUPPORTED)
+from thread_affinity import list_threads
+
+IS_WINDOWS = psutil.WINDOWS
+
+# Prioridad: etiqueta -> valor nice (en Windows se traduce a clase de prioridad)
+PRIORITY_CHOICES = [
+    ("Alta", -10),
+    ("Por encima de lo normal", -5),
+    ("Normal", 0),
+    ("Por debajo de lo normal", 10),
+    ("Baja", 19),
+]
+
+IO_CHOICES = [
+    ("Inactiva", "idle"),
+    ("Baja", "low"),
+    ("Normal", "normal"),
+    ("Alta", "high"),
+]
+
+POLICY_CHOICES = [
+    ("Normal (SCHED_OTHER)", "normal"),
+    ("Lotes (SCHED_BATCH)", "batch"),
+    ("Inactiva (SCHED_IDLE)", "idle"),
+]
+
+FIELD_LABELS = {
+    'policy': "política",
+    'nice': "prioridad",
+    'io': "prioridad de E/S",
+}
+
+
+class SchedResult(NamedTuple):
+    """Resultado de aplicar y verificar un campo del perfil en un hilo (tid) o en el proceso (tid None)"""
+    field: str
+    status: str
+    detail: str = ""
+    tid: Optional[int] = None
+
+
+def profile_from_task(task: Dict) -> Dict:
+    """Perfil de la tarea sin los campos que no cambian"""
+    profile = task.get('sched_profile') or {}
+    return {key: value for key, value in profile.items() if value not in (None, "")}
+
+
+def _nice_value(nice: int):
+    """Valor que acepta psutil.Process.nice() en esta plataforma"""
+    if not IS_WINDOWS:
+        return nice
+    if nice >= 15:
+        return psutil.IDLE_PRIORITY_CLASS
+    if nice >= 5:
+        return psutil.BELOW_NORMAL_PRIORITY_CLASS
+    if nice > -5:
+        return psutil.NORMAL_PRIORITY_CLASS
+    if nice > -15:
+        return psutil.ABOVE_NORMAL_PRIORITY_CLASS
+    return psutil.HIGH_PRIORITY_CLASS
+
+
+def _io_args(level: str) -> tuple:
+    """Argumentos de psutil.Process.ionice() para un nivel de E/S"""
+    if IS_WINDOWS:
+        return ({
+            'idle': psutil.IOPRIO_VERYLOW,
+            'low': psutil.IOPRIO_LOW,
+            'normal': psutil.IOPRIO_NORMAL,
+            'high': psutil.IOPRIO_HIGH,
+        }[level],)
+    if level == 'idle':
+        return (psutil.IOPRIO_CLASS_IDLE, 0)
+    return (psutil.IOPRIO_CLASS_BE, {'low': 7, 'normal': 4, 'high': 0}[level])
+
+
+def _io_matches(current, expected: tuple) -> bool:
+    if IS_WINDOWS:
+        return current == expected[0]
+    if expected[0] == psutil.IOPRIO_CLASS_IDLE:
+        return current.ioclass == psutil.IOPRIO_CLASS_IDLE
+    return (current.ioclass, current.value) == expected
+
+
+def _policy_value(policy: str) -> Optional[int]:
+    """Constante de os.sched_setscheduler, o None si la plataforma no la tiene"""
+    name = {'normal': 'SCHED_OTHER', 'batch': 'SCHED_BATCH', 'idle': 'SCHED_IDLE'}[policy]
+    if not hasattr(os, 'sched_setscheduler'):
+        return None
+    return getattr(os, name, None)
+
+
+def _status_for(error: Exception) -> str:
+    if isinstance(error, (psutil.AccessDenied, PermissionError)):
+        return STATUS_ACCESS_DENIED
+    if isinstance(error, (psutil.NoSuchProcess, ProcessLookupError)):
+        return STATUS_GONE
+    return STATUS_ERROR
+
+
+def apply_sched_profile(proc, profile: Dict) -> List[SchedResult]:
+    """Aplica política, prioridad y E/S en ese orden y verifica todo con una relectura
+
+    En Linux los tres son atributos de cada hilo: aplicarlos al PID solo cambia el hilo
+    principal, así que se aplican y verifican en todos los hilos del proceso. En Windows la
+    clase de prioridad y la prioridad de E/S son del proceso.
+
+    Args:
+        proc: psutil.Process destino
+        profile: {'policy': 'normal'|'batch'|'idle', 'nice': int, 'io': 'idle'|'low'|'normal'|'high'}
+
+    Returns:
+        Un SchedResult por campo del perfil (y por hilo en Linux); los hilos que terminan
+        mientras se aplica se omiten
+    """
+    if IS_WINDOWS or not os.path.isdir(f"/proc/{proc.pid}/task"):
+        return _apply_to(proc, proc.pid, profile, None)
+
+    results = []
+    for thread in list_threads(proc.pid):
+        try:
+            target = proc if thread.tid == proc.pid else psutil.Process(thread.tid)
+        except psutil.NoSuchProcess:
+            continue
+        thread_results = _apply_to(target, thread.tid, profile, thread.tid)
+        if thread.tid != proc.pid and any(result.status == STATUS_GONE for result in thread_results):
+            continue
+        results.extend(thread_results)
+    return results
+
+
+def _apply_to(target, sched_id: int, profile: Dict, tid: Optional[int]) -> List[SchedResult]:
+    """Aplica y verifica el perfil en un proceso o hilo (target: psutil.Process del PID o del TID)"""
+    results = {}
+    expected = {}
+
+    if 'policy' in profile:
+        policy = _policy_value(profile['policy'])
+        if policy is None:
+            results['policy'] = SchedResult('policy', STATUS_UNSUPPORTED, tid=tid)
+        else:
+            try:
+                os.sched_setscheduler(sched_id, policy, os.sched_param(0))
+                expected['policy'] = policy
+            except Exception as e:
+                results['policy'] = SchedResult('policy', _status_for(e), str(e), tid)
+
+    if 'nice' in profile:
+        value = _nice_value(int(profile['nice']))
+        try:
+            target.nice(value)
+            expected['nice'] = value
+        except Exception as e:
+            results['nice'] = SchedResult('nice', _status_for(e), str(e), tid)
+
+    if 'io' in profile:
+        args = _io_args(profile['io'])
+        try:
+            target.ionice(*args)
+            expected['io'] = args
+        except AttributeError:
+            results['io'] = SchedResult('io', STATUS_UNSUPPORTED, tid=tid)
+        except Exception as e:
+            results['io'] = SchedResult('io', _status_for(e), str(e), tid)
+
+    # Verificación: una sola relectura de todo lo aplicado
+    if expected:
+        try:
+            with target.oneshot():
+                if 'policy' in expected:
+                    current = os.sched_getscheduler(sched_id)
+                    results['policy'] = _verified('policy', current, current == expected['policy'], tid)
+                if 'nice' in expected:
+                    current = target.nice()
+                    results['nice'] = _verified('nice', current, current == expected['nice'], tid)
+                if 'io' in expected:
+                    current = target.ionice()
+                    results['io'] = _verified('io', current, _io_matches(current, expected['io']), tid)
+        except Exception as e:
+            status = _status_for(e)
+            for field in expected:
+                results.setdefault(field, SchedResult(field, status, str(e), tid))
+
+    return [results[field] for field in ('policy', 'nice', 'io') if field in results]
+
+
+def _verified(field: str, current, ok: bool, tid: Optional[int] = None) -> SchedResult:
+    if ok:
+        return SchedResult(field, STATUS_OK, tid=tid)
+    return SchedResult(field, STATUS_MISMATCH, f"valor leído: {current}", tid)
+
+
+def describe_profile(profile: Dict) -> str:
+    """Resumen legible del perfil para el log"""
+    parts = []
+    if 'policy' in profile:
+        parts.append(f"política {profile['policy']}")
+    if 'nice' in profile:
+        parts.append(f"nice {profile['nice']}")
+    if 'io' in profile:
+        parts.append(f"E/S {profile['io']}")
+    return ", ".join(parts)
@@ -6,18 +6,30 @@ import os
 import json
 import uuid
 import time
+import threading
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import psutil
 import pygame
-import winsound
-import win32gui
-import win32con
-from typing import Dict, Any
+from typing import Dict, Any, List
 import shutil
-import keyboard
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 from icon_utils import icon_manager, create_labeled_button, create_labeled_label
+from affinity_enforcer import AffinityEnforcer
+from affinity_ops import (STATUS_LABELS, STATUS_NOT_FOUND, STATUS_OK, apply_affinity_batch,
+                          apply_affinity_parallel, summarize_results)
+from cgroup_cpuset import CgroupCpusetBackend, CgroupUnavailable
+from cpu_topology import get_topology
+from hotkey_dispatch import HotkeyDispatcher
+from hotkey_engine import HotkeyEngine
+from input_backends import InputBackend
+from process_rules import RuleSet, compile_task_rule
+from profile_switcher import DEFAULT_AUTO_PROFILE, ProfileSwitcher, resolve_cpus
+from sched_profile import (FIELD_LABELS, IO_CHOICES, POLICY_CHOICES, PRIORITY_CHOICES, apply_sched_profile,
+                           describe_profile, profile_from_task)
+from thread_affinity import (apply_thread_rules, format_thread_rules, parse_thread_rules,
+                             rules_from_task, rules_to_task)
 
 # Inicializar pygame para el manejo de sonidos
 pygame.mixer.init()
@@ -25,42 +37,81 @@ pygame.mixer.init()
 class TaskManager:
     """Gestor de tareas automatizadas"""
     
-    def __init__(self, manager):
+    def __init__(self, manager, input_backend: InputBackend = None):
         self.manager = manager
         self.automated_tasks = {}
-        self.hotkey_listeners = {}
+        self.hotkey_listeners = {}  # Hotkey normalizado -> id de tarea
         self.hotkey_stats = {}  # Estadísticas de uso de hotkeys
         self.tasks_file = "automated_tasks.json"
+        self.name_index_max_age = 5.0  # Segundos antes de volver a muestrear los procesos
+        self.max_apply_workers = 8  # Hilos para aplicar afinidad a varias instancias
+        self.hotkey_cooldown = 1.0  # Segundos mínimos entre ejecuciones de una tarea (task['cooldown'])
+        self._apply_pool = None
+        self.process_provider = None  # Función nombre -> procesos; sustituye al muestreador (benchmarks)
+        self.enforcer = AffinityEnforcer(self)  # Reaplica tareas persistentes a procesos nuevos
+        self.rule_set = RuleSet([])  # Reglas compiladas de todas las tareas
+        self.profile_switcher = ProfileSwitcher(self)  # Cambio automático entre perfil alto y bajo
+        self.cgroups = CgroupCpusetBackend()  # Cpuset por tarea para las tareas con 'use_cgroup'
+        # Los hotkeys solo encolan; las tareas se ejecutan en un hilo dedicado
+        self.dispatcher = HotkeyDispatcher(self.execute_task, max_pending=16,
+                                           on_rejected=self._on_job_rejected)
+        # Un único hook de teclado para todos los hotkeys (backend según plataforma o AFFINITY_INPUT_BACKEND)
+        self.hotkey_engine = HotkeyEngine(input_backend)
         self.load_tasks()
         
     def log_message(self, message: str, level: str = "info"):
         """Registra un mensaje en el log del administrador principal"""
         if hasattr(self.manager, 'log_message'):
-            self.manager.log_message(message, level)
+            self.run_in_ui(self.manager.log_message, message, level)
         else:
             print(f"[{level.upper()}] {message}")
     
+    def rebuild_rules(self):
+        """Recompila las reglas de coincidencia de procesos tras cargar o guardar tareas"""
+        self.rule_set = RuleSet.from_tasks(self.automated_tasks)
+        self.enforcer.rebuild()
+        self.profile_switcher.rebuild()
+    
+    def on_snapshot(self, snapshot, added):
+        """Listener del muestreador: descarta los veredictos en caché de procesos que ya terminaron"""
+        self.rule_set.prune(snapshot)
+        self.cgroups.prune(snapshot)  # Y borra los cpusets de tarea que se quedaron vacíos
+    
+    def run_in_ui(self, func, *args):
+        """Ejecuta func en el hilo de Tk; desde otros hilos se programa con root.after"""
+        root = getattr(self.manager, 'root', None)
+        if root is None or threading.current_thread() is threading.main_thread():
+            func(*args)
+        else:
+            root.after(0, lambda: func(*args))
+    
+    def _on_job_rejected(self, job):
+        """Registra un trabajo descartado por tener la cola llena"""
+        self.log_message(
+            f"Cola de hotkeys llena ({self.dispatcher.max_pending} pendientes): "
+            f"se descarta la ejecución de la tarea {job.task_id}", 
+            "warning"
+        )
+    
     def load_tasks(self):
         """Carga las tareas desde el archivo JSON"""
         try:
             if os.path.exists(self.tasks_file):
                 with open(self.tasks_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    self.automated_tasks = data
-                    
-                # Configurar hotkeys para las tareas cargadas
-                for task_id, task in self.automated_tasks.items():
-                    if task.get('hotkey'):
-                        self.setup_hotkey_listener(task['hotkey'], task_id)
-                        
+                    self.automated_tasks = json.load(f)
                 self.log_message(f"Cargadas {len(self.automated_tasks)} tareas automatizadas", "success")
             else:
                 self.automated_tasks = {}
                 self.log_message("No se encontró archivo de tareas, iniciando con lista vacía", "info")
                 
-        except Exception as e:
+        except (OSError, ValueError) as e:
+            # Solo un archivo ilegible o corrupto deja la lista vacía
             self.log_message(f"Error cargando tareas: {str(e)}", "error")
             self.automated_tasks = {}
+        
+        # Configurar hotkeys para las tareas cargadas (un fallo del hook no descarta las tareas)
+        self.sync_hotkeys()
+        self.rebuild_rules()
     
     def save_tasks(self):
         """Guarda las tareas en el archivo JSON"""
@@ -71,41 +122,42 @@ class TaskManager:
             
             with open(self.tasks_file, 'w', encoding='utf-8') as f:
                 json.dump(self.automated_tasks, f, indent=2, ensure_ascii=False)
-                
-            self.log_message("Tareas guardadas correctamente", "success")
-            return True
             
         except Exception as e:
             self.log_message(f"Error guardando tareas: {str(e)}", "error")
             return False
+        
+        # Fuera del try: un fallo al recompilar no es un fallo de guardado
+        self.rebuild_rules()
+        self.log_message("Tareas guardadas correctamente", "success")
+        return True
     
     def add_task(self, task_data: Dict[str, Any]) -> str:
         """Añade una nueva tarea"""
+        task_id = None
         try:
             task_id = str(uuid.uuid4())
             self.automated_tasks[task_id] = task_data
             
-            # Configurar hotkey si existe
-            if task_data.get('hotkey'):
-                self.setup_hotkey_listener(task_data['hotkey'], task_id)
-            
-            # Guardar cambios
-            if self.save_tasks():
+            # Configurar hotkey si existe y guardar cambios
+            if self.sync_hotkeys() and self.save_tasks():
                 self.log_message(f"Tarea '{task_data['name']}' añadida correctamente", "success")
                 return task_id
-            else:
-                # Si falla el guardado, remover de memoria
-                del self.automated_tasks[task_id]
-                if task_data.get('hotkey'):
-                    self.remove_hotkey_listener(task_data['hotkey'])
-                return None
+            
+            # Si falla el hotkey o el guardado, remover de memoria
+            self.automated_tasks.pop(task_id, None)
+            self.sync_hotkeys()
+            return None
                 
         except Exception as e:
             self.log_message(f"Error añadiendo tarea: {str(e)}", "error")
+            self.automated_tasks.pop(task_id, None)
+            self.sync_hotkeys()
             return None
     
     def update_task(self, task_id: str, task_data: Dict[str, Any]) -> bool:
         """Actualiza una tarea existente"""
+        old_task = None
         try:
             if task_id not in self.automated_tasks:
                 self.log_message(f"Tarea {task_id} no encontrada para actualizar", "error")
@@ -113,30 +165,26 @@ class TaskManager:
             
             old_task = self.automated_tasks[task_id]
             
-            # Remover el hotkey anterior si existe
-            if old_task.get('hotkey'):
-                self.remove_hotkey_listener(old_task['hotkey'])
-            
-            # Actualizar la tarea
+            # Actualizar la tarea; solo cambia el registro si cambió su hotkey
             self.automated_tasks[task_id] = task_data
             
-            # Configurar nuevo hotkey si existe
-            if task_data.get('hotkey'):
-                self.setup_hotkey_listener(task_data['hotkey'], task_id)
-            
             # Guardar cambios
-            if self.save_tasks():
+            if self.sync_hotkeys() and self.save_tasks():
+                if old_task.get('use_cgroup') and not task_data.get('use_cgroup'):
+                    self._release_task_cgroup(task_id)
                 self.log_message(f"Tarea '{task_data['name']}' actualizada correctamente", "success")
                 return True
-            else:
-                # Revertir cambios si falla el guardado
-                self.automated_tasks[task_id] = old_task
-                if old_task.get('hotkey'):
-                    self.setup_hotkey_listener(old_task['hotkey'], task_id)
-                return False
+            
+            # Revertir cambios si falla el hotkey o el guardado
+            self.automated_tasks[task_id] = old_task
+            self.sync_hotkeys()
+            return False
                 
         except Exception as e:
             self.log_message(f"Error actualizando tarea: {str(e)}", "error")
+            if old_task is not None:
+                self.automated_tasks[task_id] = old_task
+                self.sync_hotkeys()
             return False
     
     def delete_task(self, task_id: str) -> bool:
@@ -148,22 +196,20 @@ class TaskManager:
             
             task = self.automated_tasks[task_id]
             
-            # Remover hotkey si existe
-            if task.get('hotkey'):
-                self.remove_hotkey_listener(task['hotkey'])
-            
-            # Eliminar de memoria
+            # Eliminar de memoria y retirar su hotkey
             del self.automated_tasks[task_id]
+            self.sync_hotkeys()
             
             # Guardar cambios
             if self.save_tasks():
+                if task.get('use_cgroup'):
+                    self._release_task_cgroup(task_id)
                 self.log_message(f"Tarea '{task['name']}' eliminada correctamente", "success")
                 return True
             else:
                 # Revertir si falla el guardado
                 self.automated_tasks[task_id] = task
-                if task.get('hotkey'):
-                    self.setup_hotkey_listener(task['hotkey'], task_id)
+                self.sync_hotkeys()
                 return False
                 
         except Exception as e:
@@ -197,49 +243,63 @@ class TaskManager:
         
         return '+'.join(normalized_keys)
 
-    def setup_hotkey_listener(self, hotkey: str, task_id: str):
-        """Configura un listener para el hotkey de una tarea"""
+    def desired_hotkeys(self) -> Dict[str, str]:
+        """Hotkey normalizado -> id de tarea según las tareas actuales (si se repite, gana la última)"""
+        desired = {}
+        for task_id, task in self.automated_tasks.items():
+            normalized_hotkey = self.normalize_hotkey(task.get('hotkey', ''))
+            if normalized_hotkey:
+                desired[normalized_hotkey] = task_id
+        return desired
+    
+    def sync_hotkeys(self, desired: Dict[str, str] = None) -> bool:
+        """Reconcilia los hotkeys activos con los deseados sin desmontar los demás
+
+        Calcula qué hotkeys sobran, faltan o cambiaron de tarea y los aplica con una única
+        sustitución de la tabla del motor: no hay pausas y los hotkeys sin cambios no dejan
+        de funcionar en ningún momento.
+
+        Args:
+            desired: Hotkey normalizado -> id de tarea; por defecto, el de las tareas actuales
+
+        Returns:
+            True si se aplicó (aunque no hubiera cambios); False si algún hotkey no era válido o
+            no se pudo instalar el hook (la tabla se conserva y se activa al reiniciar el hook)
+        """
+        if desired is None:
+            desired = self.desired_hotkeys()
+        active = self.hotkey_listeners
+        removed = [hotkey for hotkey in active if hotkey not in desired]
+        added = {hotkey: self._make_hotkey_callback(hotkey, task_id)
+                 for hotkey, task_id in desired.items() if active.get(hotkey) != task_id}
+        if not removed and not added:
+            return True
+        
         try:
-            # Normalizar el hotkey
-            normalized_hotkey = self.normalize_hotkey(hotkey)
-            self.log_message(f"Hotkey original: '{hotkey}' -> Normalizado: '{normalized_hotkey}'", "info")
-            
-            # Remover listener existente si lo hay
-            if normalized_hotkey in self.hotkey_listeners:
-                self.remove_hotkey_listener(normalized_hotkey)
-            
-            # Crear función de callback
-            def callback():
-                self.log_message(f"Hotkey '{normalized_hotkey}' activado - ejecutando tarea {task_id}", "info")
-                self.execute_task(task_id)
-                
-                # Actualizar estadísticas de uso de hotkey
-                if normalized_hotkey in self.hotkey_stats:
-                    self.hotkey_stats[normalized_hotkey]['count'] += 1
-                else:
-                    self.hotkey_stats[normalized_hotkey] = {'count': 1}
-                
-                self.log_message(f"Estadísticas de hotkey actualizadas: {self.hotkey_stats}", "info")
-            
-            # Registrar hotkey
-            keyboard.add_hotkey(normalized_hotkey, callback, suppress=True)
-            self.hotkey_listeners[normalized_hotkey] = callback
-            
-            self.log_message(f"Hotkey '{normalized_hotkey}' registrado correctamente", "success")
-            
-        except Exception as e:
-            self.log_message(f"Error configurando hotkey: {str(e)}", "error")
+            self.hotkey_engine.update(added, removed)
+        except ValueError as e:
+            self.log_message(f"Error configurando hotkeys: {str(e)}", "error")
+            return False
+        self.hotkey_listeners = dict(desired)
+        
+        self.log_message(
+            f"Hotkeys sincronizados: {len(added)} añadidos o cambiados, {len(removed)} eliminados, "
+            f"{len(desired)} activos", "info"
+        )
+        if desired:
+            return self.start_hotkey_engine()
+        return True
     
-    def remove_hotkey_listener(self, hotkey: str):
-        """Elimina un listener de hotkey"""
+    def start_hotkey_engine(self) -> bool:
+        """Instala el hook del motor; False si el backend de entrada no puede arrancar
+        (sin permiso sobre /dev/input, sin root para la librería keyboard, librería ausente)"""
         try:
-            normalized_hotkey = self.normalize_hotkey(hotkey)
-            if normalized_hotkey in self.hotkey_listeners:
-                keyboard.remove_hotkey(normalized_hotkey)
-                del self.hotkey_listeners[normalized_hotkey]
-                self.log_message(f"Hotkey '{normalized_hotkey}' eliminado correctamente", "success")
+            self.hotkey_engine.start()
+            return True
         except Exception as e:
-            self.log_message(f"Error eliminando hotkey: {str(e)}", "error")
+            backend = self.hotkey_engine.backend.name
+            self.log_message(f"No se pudo instalar el hook de teclado ({backend}): {str(e)}", "error")
+            return False
     
     def update_hotkey_stats(self, hotkey: str):
         """Actualiza las estadísticas de uso de un hotkey"""
@@ -259,11 +319,11 @@ class TaskManager:
             
             # Actualizar la UI si está disponible
             if hasattr(self.manager, 'last_activation_label'):
-                self.manager.last_activation_label.config(text=current_time)
+                self.run_in_ui(self.manager.last_activation_label.config, {'text': current_time})
             
             # Actualizar visualización de hotkeys
             if hasattr(self.manager, 'refresh_hotkeys_display'):
-                self.manager.refresh_hotkeys_display()
+                self.run_in_ui(self.manager.refresh_hotkeys_display)
                 
         except Exception as e:
             self.log_message(f"Error actualizando estadísticas de hotkey: {str(e)}", "error")
@@ -307,7 +367,7 @@ class TaskManager:
             
             task = self.automated_tasks[task_id]
             process_name = task['process_name']
-            target_affinity = task['target_affinity']
+            target_affinity = self._resolve_task_affinity(task)
             
             # Actualizar estadísticas de uso del hotkey
             hotkey = task.get('hotkey', '')
@@ -316,56 +376,54 @@ class TaskManager:
             
             self.log_message(f"Buscando proceso: {process_name}", "info")
             
+            processes = self._find_task_processes(task_id, task)
+            cpu_list = ', '.join([f"CPU{cpu}" for cpu in target_affinity])
+            
+            # Árbol de procesos: los hijos que ya existen reciben la misma afinidad
+            if task.get('apply_to_tree') and processes:
+                roots = processes if task.get('apply_to_all') else processes[:1]
+                processes = self.expand_process_tree(roots)
+            
+            # Modo cgroup: todas las instancias (y sus hijos futuros) en el cpuset de la tarea
+            if task.get('use_cgroup') and processes:
+                applied = self._apply_task_cgroup(task_id, processes, target_affinity)
+                if applied is not None:
+                    self._report_task_results(task, *applied, cpu_list)
+                    return
+            
+            # Modo "todas las instancias" o árbol: aplicar en paralelo y notificar un único resumen
+            if (task.get('apply_to_all') or task.get('apply_to_tree')) and processes:
+                self._execute_task_on_all(task, processes, target_affinity, cpu_list)
+                return
+            
             # Buscar el proceso por nombre
             found_process = False
-            for proc in psutil.process_iter(['pid', 'name']):
+            for proc in processes:
                 try:
-                    if proc.info['name'].lower() == process_name.lower():
-                        found_process = True
-                        self.log_message(f"Proceso encontrado: {process_name} (PID: {proc.pid})", "info")
-                        
-                        # Aplicar afinidad
-                        proc.cpu_affinity(target_affinity)
-                        
-                        # Mostrar notificación
-                        cpu_list = ', '.join([f"CPU{cpu}" for cpu in target_affinity])
-                        message = f"Afinidad aplicada a {process_name}\nCPUs: {cpu_list}"
-                        self.manager.show_notification(message)
-                        
-                        # Reproducir sonido si está configurado
-                        custom_sound = task.get('custom_sound', {})
-                        if custom_sound.get('enabled', False):
-                            sound_file = custom_sound.get('file', '')
-                            self.log_message(f"Intentando reproducir sonido: {sound_file}", "info")
-                            
-                            if sound_file and os.path.exists(sound_file):
-                                try:
-                                    self.log_message(f"Archivo de sonido encontrado, reproduciendo...", "info")
-                                    if sound_file.lower().endswith('.mp3'):
-                                        pygame.mixer.music.load(sound_file)
-                                        pygame.mixer.music.play()
-                                        self.log_message(f"Sonido MP3 reproducido correctamente", "success")
-                                    else:
-                                        sound = pygame.mixer.Sound(sound_file)
-                                        sound.play()
-                                        self.log_message(f"Sonido WAV reproducido correctamente", "success")
-                                except Exception as e:
-                                    self.log_message(f"Error reproduciendo sonido: {str(e)}", "error")
-                            else:
-                                if not sound_file:
-                                    self.log_message(f"No se especificó archivo de sonido en la tarea", "warning")
-                                else:
-                                    self.log_message(f"Archivo de sonido no existe: {sound_file}", "warning")
-                        else:
-                            self.log_message(f"Sonido personalizado deshabilitado para esta tarea", "info")
-                        
-                        self.log_message(
-                            f"Tarea ejecutada: {task['name']}, Proceso: {process_name}, "
-                            f"Afinidad: {cpu_list}",
-                            "success"
-                        )
-                        return
-                        
+                    # Descartar PIDs reutilizados desde la búsqueda antes de darlo por encontrado
+                    if not self.verify_process(proc):
+                        continue
+                    found_process = True
+                    self.log_message(f"Proceso encontrado: {process_name} (PID: {proc.pid})", "info")
+                    
+                    # Aplicar afinidad
+                    proc.cpu_affinity(target_affinity)
+                    self._apply_task_extras(task, [proc])
+                    
+                    # Mostrar notificación
+                    message = f"Afinidad aplicada a {process_name}\nCPUs: {cpu_list}"
+                    self.run_in_ui(self.manager.show_notification, message)
+                    
+                    # Reproducir sonido si está configurado
+                    self._play_task_sound(task)
+                    
+                    self.log_message(
+                        f"Tarea ejecutada: {task['name']}, Proceso: {process_name}, "
+                        f"Afinidad: {cpu_list}",
+                        "success"
+                    )
+                    return
+                    
                 except (psutil.NoSuchProcess, psutil.AccessDenied):
                     continue
             
@@ -375,6 +433,294 @@ class TaskManager:
         except Exception as e:
             self.log_message(f"Error ejecutando tarea: {str(e)}", "error")
 
+    def _resolve_task_affinity(self, task: Dict[str, Any]) -> List[int]:
+        """CPUs de la tarea; si tiene selector de topología se resuelve para este equipo"""
+        selector = task.get('cpu_selector')
+        if selector:
+            try:
+                cpus = get_topology().resolve(selector)
+                if cpus:
+                    return cpus
+                self.log_message(f"El selector '{selector}' no coincide con ninguna CPU de este equipo", "warning")
+            except ValueError as e:
+                self.log_message(str(e), "warning")
+        return task['target_affinity']
+
+    def _execute_task_on_all(self, task: Dict[str, Any], processes, target_affinity: List[int], cpu_list: str):
+        """Aplica la afinidad de la tarea a todas las instancias del proceso en paralelo"""
+        results = apply_affinity_parallel(processes, target_affinity, self._get_apply_pool(),
+                                          verify=self.verify_process)
+        self._report_task_results(task, processes, results, cpu_list)
+
+    def _apply_task_cgroup(self, task_id: str, processes, target_affinity: List[int]):
+        """Mete los procesos en el cpuset de la tarea; None si hay que usar afinidad por proceso
+
+        Returns:
+            (procesos, resultados) de los procesos que seguían vivos, o None
+        """
+        if not self.cgroups.available():
+            self.log_message("cgroup v2 con cpuset no disponible o sin permisos; se usa afinidad por proceso",
+                             "warning")
+            return None
+        processes = [proc for proc in processes if self.verify_process(proc)]
+        try:
+            return processes, self.cgroups.apply(task_id, [proc.pid for proc in processes], target_affinity)
+        except (CgroupUnavailable, OSError) as e:
+            self.log_message(f"No se pudo usar el cgroup de la tarea ({str(e)}); se usa afinidad por proceso",
+                             "warning")
+            return None
+
+    def _release_task_cgroup(self, task_id: str):
+        """Devuelve los procesos del cpuset de la tarea a su cgroup original y borra el grupo"""
+        try:
+            results = self.cgroups.detach(task_id)
+        except OSError as e:
+            self.log_message(f"No se pudo vaciar el cgroup de la tarea: {str(e)}", "warning")
+            return
+        if results:
+            self.log_message(f"Procesos devueltos a su cgroup original ({summarize_results(results)})", "info")
+
+    def _report_task_results(self, task: Dict[str, Any], processes, results, cpu_list: str):
+        """Registra y notifica el resultado de aplicar una tarea a varias instancias"""
+        process_name = task['process_name']
+        summary = summarize_results(results)
+        
+        for result in results:
+            if result.status != STATUS_OK:
+                detail = f": {result.detail}" if result.detail else ""
+                self.log_message(
+                    f"{process_name} (PID: {result.pid}): {STATUS_LABELS[result.status]}{detail}", "warning"
+                )
+        
+        applied = sum(1 for result in results if result.status == STATUS_OK)
+        if not applied:
+            self.log_message(f"No se pudo aplicar afinidad a ninguna instancia de {process_name} ({summary})", "error")
+            return
+        self._apply_task_extras(task, [proc for proc, result in zip(processes, results) if result.status == STATUS_OK])
+        
+        message = f"Afinidad aplicada a {applied}/{len(results)} instancias de {process_name}\nCPUs: {cpu_list}"
+        self.run_in_ui(self.manager.show_notification, message)
+        self._play_task_sound(task)
+        
+        self.log_message(
+            f"Tarea ejecutada: {task['name']}, Proceso: {process_name}, "
+            f"Afinidad: {cpu_list} ({summary})",
+            "success"
+        )
+
+    def apply_affinity_batch(self, changes, failure_threshold: float = 0.0):
+        """Aplica un lote de pares (selector, CPUs) y lo revierte entero si se supera el umbral de fallos
+
+        Los selectores de tipo texto se buscan por nombre con el índice del muestreador.
+        """
+        def resolve_names(names):
+            return {name: self._find_target_processes(name) for name in names}
+        
+        result = apply_affinity_batch(changes, failure_threshold, self._get_apply_pool(),
+                                      resolve_names=resolve_names)
+        summary = summarize_results(result.changes)
+        
+        for change in result.failures:
+            if change.status == STATUS_NOT_FOUND:
+                self.log_message(f"Ningún proceso '{change.detail}' en ejecución", "warning")
+                continue
+            detail = f": {change.detail}" if change.detail else ""
+            self.log_message(f"PID {change.pid}: {STATUS_LABELS[change.status]}{detail}", "warning")
+        
+        if result.rolled_back:
+            restored = sum(1 for item in result.rollback if item.status == STATUS_OK)
+            self.log_message(
+                f"Lote de afinidad revertido ({summary}): restaurados {restored}/{len(result.rollback)} procesos",
+                "error"
+            )
+        else:
+            self.log_message(f"Lote de afinidad aplicado ({summary})", "success")
+        return result
+
+    def _apply_task_extras(self, task: Dict[str, Any], processes):
+        """Completa la aplicación de la tarea: perfil de planificación y afinidad por hilo"""
+        self._apply_task_sched_profile(task, processes)
+        self._apply_task_thread_rules(task, [proc.pid for proc in processes])
+
+    def _apply_task_sched_profile(self, task: Dict[str, Any], processes):
+        """Aplica y verifica el perfil de planificación de la tarea en los procesos indicados"""
+        profile = profile_from_task(task)
+        if not profile:
+            return
+        for proc in processes:
+            pid = proc.pid
+            try:
+                results = apply_sched_profile(proc, profile)
+            except psutil.NoSuchProcess:
+                continue
+            failures = [result for result in results if result.status != STATUS_OK]
+            for result in failures:
+                detail = f": {result.detail}" if result.detail else ""
+                thread = f", hilo {result.tid}" if result.tid not in (None, pid) else ""
+                self.log_message(
+                    f"Perfil de planificación en PID {pid}{thread}, {FIELD_LABELS[result.field]}: "
+                    f"{STATUS_LABELS[result.status]}{detail}", "warning"
+                )
+            threads = len({result.tid for result in results if result.tid is not None})
+            scope = f", {threads} hilos" if threads > 1 else ""
+            if not failures:
+                self.log_message(
+                    f"Perfil de planificación aplicado a PID {pid} ({describe_profile(profile)}{scope})", "info"
+                )
+
+    def _apply_task_thread_rules(self, task: Dict[str, Any], pids):
+        """Aplica las reglas de afinidad por hilo de la tarea a los procesos indicados"""
+        rules = rules_from_task(task)
+        if not rules:
+            return
+        for pid in pids:
+            try:
+                results = apply_thread_rules(pid, rules)
+            except (psutil.NoSuchProcess, psutil.AccessDenied, OSError) as e:
+                self.log_message(f"No se pudieron leer los hilos del PID {pid}: {str(e)}", "warning")
+                continue
+            for result in results:
+                if result.status != STATUS_OK:
+                    detail = f": {result.detail}" if result.detail else ""
+                    self.log_message(
+                        f"Hilo {result.name or '-'} (TID: {result.tid}) del PID {pid}: "
+                        f"{STATUS_LABELS[result.status]}{detail}", "warning"
+                    )
+            skipped = sum(1 for result in results if result.verification_skipped)
+            unverified = f" ({skipped} sin verificar)" if skipped else ""
+            self.log_message(f"Afinidad por hilo en PID {pid}: "
+                             f"{summarize_results(results) or 'sin coincidencias'}{unverified}", "info")
+
+    def _get_apply_pool(self) -> ThreadPoolExecutor:
+        """Pool acotado compartido para aplicar afinidad a varios procesos"""
+        if self._apply_pool is None:
+            self._apply_pool = ThreadPoolExecutor(max_workers=self.max_apply_workers,
+                                                  thread_name_prefix="affinity")
+        return self._apply_pool
+
+    def _play_task_sound(self, task: Dict[str, Any]):
+        """Reproduce el sonido personalizado de la tarea si está configurado"""
+        custom_sound = task.get('custom_sound', {})
+        if custom_sound.get('enabled', False):
+            sound_file = custom_sound.get('file', '')
+            self.log_message(f"Intentando reproducir sonido: {sound_file}", "info")
+            
+            if sound_file and os.path.exists(sound_file):
+                try:
+                    self.log_message(f"Archivo de sonido encontrado, reproduciendo...", "info")
+                    if sound_file.lower().endswith('.mp3'):
+                        pygame.mixer.music.load(sound_file)
+                        pygame.mixer.music.play()
+                        self.log_message(f"Sonido MP3 reproducido correctamente", "success")
+                    else:
+                        sound = pygame.mixer.Sound(sound_file)
+                        sound.play()
+                        self.log_message(f"Sonido WAV reproducido correctamente", "success")
+                except Exception as e:
+                    self.log_message(f"Error reproduciendo sonido: {str(e)}", "error")
+            else:
+                if not sound_file:
+                    self.log_message(f"No se especificó archivo de sonido en la tarea", "warning")
+                else:
+                    self.log_message(f"Archivo de sonido no existe: {sound_file}", "warning")
+        else:
+            self.log_message(f"Sonido personalizado deshabilitado para esta tarea", "info")
+
+    def _find_task_processes(self, task_id: str, task: Dict[str, Any]):
+        """Procesos que cumplen las reglas de una tarea
+
+        Un nombre exacto sin más criterios se resuelve con el índice de nombres;
+        los globs, regex y criterios adicionales se evalúan con el RuleSet compilado.
+        """
+        rule = self.rule_set.rule_for(task_id)
+        sampler = getattr(self.manager, 'process_sampler', None)
+        if (rule is None or (rule.name_exact and not rule.needs_details())
+                or self.process_provider is not None or sampler is None):
+            return self._find_target_processes(task['process_name'])
+        
+        sampler.fresh_name_index(self.name_index_max_age)
+        return self._get_processes(self.rule_set.find(sampler.latest, task_id))
+
+    def _find_target_processes(self, process_name: str):
+        """Busca los procesos de una tarea en el índice de nombres del muestreador"""
+        if self.process_provider is not None:
+            return self.process_provider(process_name)
+        
+        sampler = getattr(self.manager, 'process_sampler', None)
+        if sampler is None:
+            # Sin muestreador: recorrer los procesos del sistema
+            process_name = process_name.lower()
+            return [proc for proc in psutil.process_iter(['pid', 'name'])
+                    if (proc.info['name'] or '').lower() == process_name]
+        
+        return self._get_processes(sampler.fresh_name_index(self.name_index_max_age).lookup(process_name))
+
+    def expand_process_tree(self, processes):
+        """Los procesos indicados seguidos de todos sus descendientes, sin repetidos
+
+        Usa el índice ppid -> hijos de la última instantánea del muestreador; sin
+        muestreador se recorren los hijos con psutil.
+        """
+        result = list(processes)
+        seen = {proc.pid for proc in result}
+        sampler = getattr(self.manager, 'process_sampler', None)
+        if sampler is None or self.process_provider is not None:
+            for proc in processes:
+                try:
+                    children = proc.children(recursive=True)
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    continue
+                for child in children:
+                    if child.pid not in seen:
+                        seen.add(child.pid)
+                        result.append(child)
+            return result
+        
+        sampler.fresh_name_index(self.name_index_max_age)
+        snapshot = sampler.latest
+        keys = []
+        for proc in processes:
+            index = snapshot.index_of(proc.pid)
+            if index < 0:
+                continue
+            for child in snapshot.descendants(index):
+                pid = snapshot.pids[child]
+                if pid not in seen:
+                    seen.add(pid)
+                    keys.append((pid, snapshot.create_times[child]))
+        return result + self._get_processes(keys)
+
+    def get_process(self, pid: int, create_time: float = None) -> psutil.Process:
+        """Manejador compartido de un proceso; descarta PIDs reutilizados
+
+        Raises:
+            psutil.NoSuchProcess: Si el proceso terminó o el PID es de otro proceso
+        """
+        sampler = getattr(self.manager, 'process_sampler', None)
+        if sampler is not None:
+            return sampler.handles.get(pid, create_time)
+        proc = psutil.Process(pid)
+        if create_time and proc.create_time() != create_time:
+            raise psutil.NoSuchProcess(pid)
+        return proc
+
+    def verify_process(self, proc) -> bool:
+        """Comprueba justo antes de modificarlo que el proceso sigue vivo y no es un PID reutilizado"""
+        sampler = getattr(self.manager, 'process_sampler', None)
+        if sampler is not None:
+            return sampler.handles.verify(proc)
+        return proc.is_running()
+
+    def _get_processes(self, keys):
+        """Manejadores de los pares (pid, create_time) que siguen vivos"""
+        processes = []
+        for pid, create_time in keys:
+            try:
+                processes.append(self.get_process(pid, create_time))
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        return processes
+
     def edit_task_dialog(self, task_id: str = None):
         """Muestra el diálogo para editar una tarea existente"""
         if not task_id:
@@ -390,7 +736,8 @@ class TaskManager:
             task_data = self.automated_tasks[task_id].copy()
             
             # Mostrar el diálogo de edición
-            dialog = TaskDialog(self.manager.root, task_data, is_edit=True)
+            dialog = TaskDialog(self.manager.root, task_data, is_edit=True,
+                                input_backend=self.hotkey_engine.backend)
             self.manager.root.wait_window(dialog.dialog)
             
             if dialog.result:
@@ -454,7 +801,7 @@ class TaskManager:
 
 class TaskDialog:
     """Diálogo para crear o editar tareas"""
-    def __init__(self, parent, task_data=None, is_edit=False):
+    def __init__(self, parent, task_data=None, is_edit=False, input_backend: InputBackend = None):
         self.dialog = tk.Toplevel(parent)
         self.dialog.title("Editar Tarea" if is_edit else "Crear Tarea Automatizada")
         self.dialog.grab_set()
@@ -467,9 +814,11 @@ class TaskDialog:
         self.dialog.resizable(False, False)
         self.parent = parent
         self.task_data = task_data or {}
+        self.input_backend = input_backend  # Backend del motor de hotkeys (para avisar si no suprime)
         self.result = None
         self.listening_for_hotkey = False
         self.cpu_count = psutil.cpu_count()
+        self.topology = get_topology()
         
         self.setup_dialog()
         
@@ -499,13 +848,34 @@ class TaskDialog:
         current_row += 1
         
         # Nombre del proceso
-        ttk.Label(frame, text="Nombre del proceso (ej: notepad.exe):").grid(row=current_row, column=0, columnspan=2, sticky=tk.W, pady=(0, 5))
+        ttk.Label(frame, text="Nombre del proceso (ej: notepad.exe, chrome*.exe o re:^java.*):").grid(row=current_row, column=0, columnspan=2, sticky=tk.W, pady=(0, 5))
         current_row += 1
         
         process_entry = ttk.Entry(frame, textvariable=self.process_var, width=40)
         process_entry.grid(row=current_row, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
         current_row += 1
         
+        # Criterios adicionales de coincidencia (opcionales)
+        match = self.task_data.get('match') or {}
+        match_frame = ttk.LabelFrame(frame, text="Criterios Adicionales (opcionales)", padding="10")
+        match_frame.grid(row=current_row, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
+        match_frame.columnconfigure(1, weight=1)
+        current_row += 1
+        
+        self.match_vars = {}
+        match_fields = [
+            ('exe', "Ruta del ejecutable:"),
+            ('cmdline', "Línea de comandos contiene:"),
+            ('user', "Usuario:"),
+            ('parent', "Proceso padre:")
+        ]
+        for row, (key, label) in enumerate(match_fields):
+            ttk.Label(match_frame, text=label).grid(row=row, column=0, sticky=tk.W, pady=2)
+            var = tk.StringVar(value=match.get(key, ''))
+            ttk.Entry(match_frame, textvariable=var, width=30).grid(
+                row=row, column=1, sticky=(tk.W, tk.E), padx=(10, 0), pady=2)
+            self.match_vars[key] = var
+        
         # Configuración de hotkey simplificada
         hotkey_frame = ttk.LabelFrame(frame, text="Configuración de Hotkey", padding="10")
         hotkey_frame.grid(row=current_row, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
@@ -532,6 +902,22 @@ class TaskDialog:
         if self.task_data.get('hotkey'):
             self.populate_hotkey_fields(self.task_data['hotkey'])
         
+        # Enfriamiento: las pulsaciones repetidas dentro de este intervalo cuentan como una
+        cooldown = self.task_data.get('cooldown')
+        self.cooldown_var = tk.StringVar(value="" if cooldown is None else str(cooldown))
+        ttk.Label(hotkey_frame, text="Enfriamiento (s):").grid(row=2, column=0, sticky=tk.W, pady=(10, 0))
+        ttk.Entry(hotkey_frame, textvariable=self.cooldown_var, width=8).grid(
+            row=2, column=1, sticky=tk.W, pady=(10, 0))
+        ttk.Label(hotkey_frame, text="vacío = valor general", font=('Arial', 8)).grid(
+            row=2, column=2, sticky=tk.W, padx=(10, 0), pady=(10, 0))
+        
+        # evdev sin captura exclusiva (por defecto) no puede ocultar el hotkey a la aplicación activa
+        if self.input_backend is not None and not self.input_backend.suppress:
+            ttk.Label(hotkey_frame, font=('Arial', 8), foreground='orange', wraplength=380,
+                      text=f"Backend '{self.input_backend.name}' sin captura exclusiva: la combinación "
+                           "también llega a la aplicación activa").grid(
+                row=3, column=0, columnspan=4, sticky=tk.W, pady=(5, 0))
+        
         # Configuración de afinidad de CPU
         cpu_frame = ttk.LabelFrame(frame, text="Afinidad de CPU", padding="10")
         cpu_frame.grid(row=current_row, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
@@ -549,11 +935,21 @@ class TaskDialog:
         # Crear checkboxes para CPUs en múltiples columnas
         cols = 4  # 4 columnas
         for i, var in enumerate(self.cpu_affinity_vars):
-            row = i // cols + 1
+            row = i // cols + 2
             col = i % cols
-            cb = ttk.Checkbutton(cpu_frame, text=f"CPU {i}", variable=var)
+            cb = ttk.Checkbutton(cpu_frame, text=self.topology.label(i), variable=var)
             cb.grid(row=row, column=col, sticky=tk.W, padx=(0, 10), pady=2)
         
+        # Selección por topología: se guarda en la tarea y se resuelve en cada equipo
+        selector = self.task_data.get('cpu_selector', '')
+        labels = {value: label for label, value in self.topology.choices()}
+        self.cpu_selector_var = tk.StringVar(value=labels.get(selector, selector))
+        topology_combo = ttk.Combobox(cpu_frame, textvariable=self.cpu_selector_var,
+                                      values=list(labels.values()))
+        topology_combo.grid(row=1, column=0, columnspan=cols, sticky=(tk.W, tk.E), pady=(0, 8))
+        topology_combo.bind('<<ComboboxSelected>>', self.on_topology_select)
+        topology_combo.bind('<Return>', self.on_topology_select)
+        
         # Botones para seleccionar/deseleccionar todas
         button_frame = ttk.Frame(cpu_frame)
         button_frame.grid(row=0, column=0, columnspan=cols, sticky=tk.W, pady=(0, 10))
@@ -566,6 +962,93 @@ class TaskDialog:
                                                command=lambda: self.deselect_all_cpus(self.cpu_affinity_vars))
         deselect_all_btn.pack(side=tk.LEFT)
         
+        # Aplicar a todas las instancias del proceso (navegadores, pools de workers...)
+        self.apply_to_all_var = tk.BooleanVar(value=self.task_data.get('apply_to_all', False))
+        ttk.Checkbutton(frame, text="Aplicar a todas las instancias del proceso",
+                        variable=self.apply_to_all_var).grid(row=current_row, column=0, columnspan=2,
+                                                             sticky=tk.W, pady=(0, 10))
+        current_row += 1
+        
+        # Incluir los procesos hijos (lanzadores, navegadores con un proceso por pestaña...)
+        self.apply_to_tree_var = tk.BooleanVar(value=self.task_data.get('apply_to_tree', False))
+        ttk.Checkbutton(frame, text="Incluir todos los procesos hijos (árbol completo)",
+                        variable=self.apply_to_tree_var).grid(row=current_row, column=0, columnspan=2,
+                                                              sticky=tk.W, pady=(0, 10))
+        current_row += 1
+        
+        # Reaplicar la afinidad cuando el proceso se reinicia o abre nuevas instancias
+        self.enforce_var = tk.BooleanVar(value=self.task_data.get('enforce', False))
+        ttk.Checkbutton(frame, text="Mantener la afinidad en procesos nuevos (sin pulsar el hotkey)",
+                        variable=self.enforce_var).grid(row=current_row, column=0, columnspan=2,
+                                                        sticky=tk.W, pady=(0, 10))
+        current_row += 1
+        
+        # Agrupar los procesos en un cpuset de cgroup v2: los hijos heredan la afinidad
+        self.use_cgroup_var = tk.BooleanVar(value=self.task_data.get('use_cgroup', False))
+        ttk.Checkbutton(frame, text="Agrupar en un cgroup cpuset (incluye procesos hijos; solo Linux)",
+                        variable=self.use_cgroup_var).grid(row=current_row, column=0, columnspan=2,
+                                                           sticky=tk.W, pady=(0, 10))
+        current_row += 1
+        
+        # Perfil de planificación: prioridad, E/S y política del planificador
+        sched = self.task_data.get('sched_profile') or {}
+        sched_frame = ttk.LabelFrame(frame, text="Perfil de Planificación", padding="10")
+        sched_frame.grid(row=current_row, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
+        sched_frame.columnconfigure(1, weight=1)
+        current_row += 1
+        
+        self.sched_choices = {
+            'nice': PRIORITY_CHOICES,
+            'io': IO_CHOICES,
+            'policy': POLICY_CHOICES if hasattr(os, 'sched_setscheduler') else [],
+        }
+        sched_fields = [('nice', "Prioridad de CPU:"), ('io', "Prioridad de E/S:"), ('policy', "Política (Linux):")]
+        self.sched_vars = {}
+        for row, (key, label) in enumerate(sched_fields):
+            labels = {value: text for text, value in self.sched_choices[key]}
+            var = tk.StringVar(value=labels.get(sched.get(key), "Sin cambios"))
+            ttk.Label(sched_frame, text=label).grid(row=row, column=0, sticky=tk.W, pady=2)
+            ttk.Combobox(sched_frame, textvariable=var, state='readonly',
+                         values=["Sin cambios"] + list(labels.values())).grid(
+                row=row, column=1, sticky=(tk.W, tk.E), padx=(10, 0), pady=2)
+            self.sched_vars[key] = var
+        
+        # Cambio automático entre el perfil de rendimiento (CPUs de arriba) y el de eficiencia
+        auto = dict(DEFAULT_AUTO_PROFILE, **(self.task_data.get('auto_profile') or {}))
+        auto_frame = ttk.LabelFrame(frame, text="Cambio Automático de Perfil según Carga", padding="10")
+        auto_frame.grid(row=current_row, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
+        auto_frame.columnconfigure(1, weight=1)
+        current_row += 1
+        
+        self.auto_enabled_var = tk.BooleanVar(value=auto['enabled'])
+        ttk.Checkbutton(auto_frame, text="Activar (las CPUs marcadas son el perfil de rendimiento)",
+                        variable=self.auto_enabled_var).grid(row=0, column=0, columnspan=2, sticky=tk.W, pady=(0, 5))
+        
+        self.auto_vars = {}
+        auto_fields = [
+            ('low_affinity', "CPUs de eficiencia (ej: 0,1 o physical & node:0):"),
+            ('high_threshold', "Subir a rendimiento con CPU del proceso ≥ (%):"),
+            ('low_threshold', "Bajar a eficiencia con CPU del proceso ≤ (%):"),
+            ('core_threshold', "Subir también si sus núcleos superan (%):"),
+            ('min_dwell', "Permanencia mínima en un perfil (s):")
+        ]
+        for row, (key, label) in enumerate(auto_fields, start=1):
+            ttk.Label(auto_frame, text=label).grid(row=row, column=0, sticky=tk.W, pady=2)
+            var = tk.StringVar(value=str(auto[key]))
+            ttk.Entry(auto_frame, textvariable=var, width=18).grid(
+                row=row, column=1, sticky=(tk.W, tk.E), padx=(10, 0), pady=2)
+            self.auto_vars[key] = var
+        
+        # Reglas de afinidad por hilo (opcional)
+        ttk.Label(frame, text="Afinidad por hilo (opcional, ej: net*=2,3; 4321=0):").grid(
+            row=current_row, column=0, columnspan=2, sticky=tk.W, pady=(0, 5))
+        current_row += 1
+        
+        self.thread_rules_var = tk.StringVar(value=format_thread_rules(rules_from_task(self.task_data)))
+        ttk.Entry(frame, textvariable=self.thread_rules_var, width=40).grid(
+            row=current_row, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
+        current_row += 1
+        
         # Configuración de alertas
         alerts_frame = ttk.LabelFrame(frame, text="Tipos de Alerta", padding="10")
         alerts_frame.grid(row=current_row, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
@@ -621,6 +1104,24 @@ class TaskDialog:
         save_btn = ttk.Button(button_frame, text="Guardar", command=self.validate_and_save)
         save_btn.pack(side=tk.RIGHT)
     
+    def get_cpu_selector(self) -> str:
+        """Selector de topología elegido (etiqueta de la lista o texto escrito)"""
+        text = self.cpu_selector_var.get().strip()
+        return dict(self.topology.choices()).get(text, text)
+    
+    def on_topology_select(self, event=None):
+        """Marca las CPUs que corresponden a la selección por topología"""
+        selector = self.get_cpu_selector()
+        if not selector:
+            return
+        try:
+            cpus = self.topology.resolve(selector)
+        except ValueError as e:
+            messagebox.showwarning("Error", str(e))
+            return
+        for i, var in enumerate(self.cpu_affinity_vars):
+            var.set(i in cpus)
+    
     def update_hotkey_fields(self):
         """Actualiza los campos de hotkey según el número seleccionado"""
         # Limpiar campos existentes
@@ -759,6 +1260,60 @@ class TaskDialog:
                 messagebox.showwarning("Error", "Debe seleccionar al menos una CPU")
                 return
             
+            match = {key: var.get().strip() for key, var in self.match_vars.items() if var.get().strip()}
+            try:
+                compile_task_rule('', {'process_name': process, 'match': match})
+            except ValueError as e:
+                messagebox.showwarning("Error", str(e))
+                return
+            
+            sched_profile = {}
+            for key, var in self.sched_vars.items():
+                value = dict(self.sched_choices[key]).get(var.get())
+                if value is not None:
+                    sched_profile[key] = value
+            
+            auto_profile = {'enabled': self.auto_enabled_var.get(),
+                            'low_affinity': self.auto_vars['low_affinity'].get().strip()}
+            try:
+                for key in ('high_threshold', 'low_threshold', 'core_threshold', 'min_dwell'):
+                    auto_profile[key] = float(self.auto_vars[key].get().replace(',', '.'))
+                low_affinity = resolve_cpus(auto_profile['low_affinity'])
+            except ValueError as e:
+                messagebox.showwarning("Error", f"Configuración del cambio automático no válida: {e}")
+                return
+            if auto_profile['enabled']:
+                if not low_affinity:
+                    messagebox.showwarning("Error", "Indique las CPUs del perfil de eficiencia")
+                    return
+                if auto_profile['low_threshold'] >= auto_profile['high_threshold']:
+                    messagebox.showwarning("Error", "El umbral para bajar debe ser menor que el umbral para subir")
+                    return
+            
+            cooldown = self.cooldown_var.get().strip().replace(',', '.')
+            try:
+                cooldown = float(cooldown) if cooldown else None
+                if cooldown is not None and cooldown < 0:
+                    raise ValueError(cooldown)
+            except ValueError:
+                messagebox.showwarning("Error", "El enfriamiento debe ser un número de segundos mayor o igual que 0")
+                return
+            
+            # El selector de topología solo se guarda si las casillas siguen coincidiendo con él
+            cpu_selector = self.get_cpu_selector()
+            try:
+                if cpu_selector and self.topology.resolve(cpu_selector) != target_affinity:
+                    cpu_selector = ''
+            except ValueError as e:
+                messagebox.showwarning("Error", str(e))
+                return
+            
+            try:
+                thread_rules = parse_thread_rules(self.thread_rules_var.get())
+            except ValueError as e:
+                messagebox.showwarning("Error", str(e))
+                return
+            
             # Verificar que al menos un tipo de alerta esté seleccionado
             selected_alerts = [k for k, v in self.alert_vars.items() if v.get()]
             if not selected_alerts:
@@ -770,7 +1325,17 @@ class TaskDialog:
                 'name': name,
                 'process_name': process,
                 'hotkey': hotkey,
+                'cooldown': cooldown,
                 'target_affinity': target_affinity,
+                'cpu_selector': cpu_selector,
+                'apply_to_all': self.apply_to_all_var.get(),
+                'apply_to_tree': self.apply_to_tree_var.get(),
+                'thread_rules': rules_to_task(thread_rules),
+                'enforce': self.enforce_var.get(),
+                'use_cgroup': self.use_cgroup_var.get(),
+                'match': match,
+                'auto_profile': auto_profile,
+                'sched_profile': sched_profile,
                 'alerts': selected_alerts,
                 'custom_sound': {
                     'enabled': self.custom_sound_var.get(),
@@ -0,0 +1,203 @@
+"""
+Afinidad por hilo (TID) para el Administrador de Afinidad
+Las reglas seleccionan hilos por TID o por nombre (/proc/<pid>/task/*/comm) y les asignan sus propias CPUs
+"""
+
+import os
+import sys
+from fnmatch import fnmatchcase
+from typing import Dict, List, NamedTuple, Optional
+
+import psutil
+
+from affinity_ops import (STATUS_ACCESS_DENIED, STATUS_ERROR, STATUS_GONE, STATUS_MISMATCH, STATUS_OK,
+                          STATUS_UNSUPPORTED)
+from cpu_topology import parse_cpu_list
+
+
+class ThreadInfo(NamedTuple):
+    """Hilo de un proceso"""
+    tid: int
+    name: str
+
+
+class ThreadRule(NamedTuple):
+    """Regla de afinidad de hilos: TID o patrón de nombre (admite * y ?) y CPUs"""
+    selector: str
+    cpus: List[int]
+
+    def matches(self, thread: ThreadInfo) -> bool:
+        if self.selector.isdigit():
+            return int(self.selector) == thread.tid
+        return fnmatchcase(thread.name.lower(), self.selector.lower())
+
+
+class ThreadAffinityResult(NamedTuple):
+    """Resultado de aplicar y verificar la afinidad de un hilo
+
+    verified es None cuando el sistema no permite releer la afinidad (verificación omitida).
+    """
+    tid: int
+    name: str
+    cpus: List[int]
+    status: str
+    verified: Optional[bool] = None
+    detail: str = ""
+
+    @property
+    def verification_skipped(self) -> bool:
+        return self.status == STATUS_OK and self.verified is None
+
+
+def list_threads(pid: int) -> List[ThreadInfo]:
+    """Hilos de un proceso con su nombre (en Linux desde /proc; en otros sistemas sin nombre)"""
+    task_dir = f"/proc/{pid}/task"
+    if os.path.isdir(task_dir):
+        threads = []
+        for entry in os.listdir(task_dir):
+            try:
+                with open(f"{task_dir}/{entry}/comm", 'r', encoding='utf-8', errors='replace') as f:
+                    threads.append(ThreadInfo(int(entry), f.read().strip()))
+            except (FileNotFoundError, ProcessLookupError):
+                # El hilo terminó mientras se listaba
+                continue
+        threads.sort()
+        return threads
+    return [ThreadInfo(thread.id, "") for thread in psutil.Process(pid).threads()]
+
+
+def parse_thread_rules(text: str) -> List[ThreadRule]:
+    """Interpreta reglas del tipo "net*=2,3; 1234=0-1"
+
+    Raises:
+        ValueError: Si alguna regla no es válida
+    """
+    rules = []
+    for chunk in text.replace('\n', ';').split(';'):
+        chunk = chunk.strip()
+        if not chunk:
+            continue
+        selector, sep, cpus_text = chunk.partition('=')
+        selector = selector.strip()
+        if not sep or not selector:
+            raise ValueError(f"Regla de hilo no válida: '{chunk}' (formato: nombre o TID=CPUs)")
+        rules.append(ThreadRule(selector, parse_cpu_list(cpus_text)))
+    return rules
+
+
+def format_thread_rules(rules: List[ThreadRule]) -> str:
+    """Representación en texto de las reglas, inversa de parse_thread_rules"""
+    return "; ".join(f"{rule.selector}={','.join(map(str, rule.cpus))}" for rule in rules)
+
+
+def rules_from_task(task: Dict) -> List[ThreadRule]:
+    """Reglas de hilo guardadas en una tarea ('thread_rules': [{'thread': ..., 'cpus': [...]}])"""
+    return [ThreadRule(str(rule['thread']), list(rule['cpus'])) for rule in task.get('thread_rules', [])]
+
+
+def rules_to_task(rules: List[ThreadRule]) -> List[Dict]:
+    """Formato de las reglas en automated_tasks.json"""
+    return [{'thread': rule.selector, 'cpus': rule.cpus} for rule in rules]
+
+
+def match_threads(threads: List[ThreadInfo], rules: List[ThreadRule]) -> List[tuple]:
+    """Pares (hilo, CPUs); si varias reglas coinciden con un hilo gana la última"""
+    plan = []
+    for thread in threads:
+        cpus = None
+        for rule in rules:
+            if rule.matches(thread):
+                cpus = rule.cpus
+        if cpus is not None:
+            plan.append((thread, cpus))
+    return plan
+
+
+# set_thread_affinity devuelve STATUS_OK o STATUS_UNSUPPORTED y lanza la excepción del sistema si falla
+if hasattr(os, 'sched_setaffinity'):
+    def set_thread_affinity(tid: int, cpus: List[int]) -> str:
+        """Fija la afinidad de un hilo"""
+        os.sched_setaffinity(tid, cpus)
+        return STATUS_OK
+
+    def get_thread_affinity(tid: int) -> Optional[List[int]]:
+        """Afinidad actual de un hilo"""
+        return sorted(os.sched_getaffinity(tid))
+
+elif sys.platform == 'win32':
+    def set_thread_affinity(tid: int, cpus: List[int]) -> str:
+        """Fija la afinidad de un hilo"""
+        import win32api
+        import win32con
+        import win32process
+
+        handle = win32api.OpenThread(
+            win32con.THREAD_SET_INFORMATION | win32con.THREAD_QUERY_INFORMATION, False, tid
+        )
+        try:
+            win32process.SetThreadAffinityMask(handle, sum(1 << cpu for cpu in cpus))
+        finally:
+            win32api.CloseHandle(handle)
+        return STATUS_OK
+
+    def get_thread_affinity(tid: int) -> Optional[List[int]]:
+        """Windows no permite leer la afinidad de un hilo sin modificarla"""
+        return None
+
+else:
+    def set_thread_affinity(tid: int, cpus: List[int]) -> str:
+        """Afinidad por hilo no soportada en este sistema"""
+        return STATUS_UNSUPPORTED
+
+    def get_thread_affinity(tid: int) -> Optional[List[int]]:
+        """Afinidad actual de un hilo"""
+        return None
+
+
+def _classify_error(error: Exception) -> str:
+    if isinstance(error, (PermissionError, psutil.AccessDenied)):
+        return STATUS_ACCESS_DENIED
+    if isinstance(error, (ProcessLookupError, FileNotFoundError, psutil.NoSuchProcess)):
+        return STATUS_GONE
+    # pywin32 informa de acceso denegado con el código 5 en pywintypes.error
+    if getattr(error, 'winerror', None) == 5 or (getattr(error, 'args', None) and error.args[0] == 5):
+        return STATUS_ACCESS_DENIED
+    return STATUS_ERROR
+
+
+def apply_thread_rules(pid: int, rules: List[ThreadRule]) -> List[ThreadAffinityResult]:
+    """Aplica las reglas a los hilos de un proceso y verifica con una única relectura
+
+    Los hilos se listan una vez, se aplican todos los cambios y después se releen las
+    afinidades de los hilos modificados para comprobar que el sistema las ha aceptado.
+    Donde no se pueden releer (Windows) el resultado queda como verificación omitida.
+    """
+    plan = match_threads(list_threads(pid), rules)
+
+    applied = []
+    for thread, cpus in plan:
+        try:
+            status = set_thread_affinity(thread.tid, cpus)
+            applied.append(ThreadAffinityResult(thread.tid, thread.name, cpus, status))
+        except Exception as e:
+            applied.append(ThreadAffinityResult(thread.tid, thread.name, cpus, _classify_error(e), detail=str(e)))
+
+    # Pasada de verificación
+    results = []
+    for result in applied:
+        if result.status != STATUS_OK:
+            results.append(result)
+            continue
+        try:
+            current = get_thread_affinity(result.tid)
+        except Exception as e:
+            results.append(result._replace(status=_classify_error(e), detail=str(e)))
+            continue
+        if current is None:
+            results.append(result._replace(detail="verificación omitida: el sistema no permite leer la afinidad"))
+        elif current == sorted(result.cpus):
+            results.append(result._replace(verified=True))
+        else:
+            results.append(result._replace(status=STATUS_MISMATCH, verified=False,
+                                           detail=f"afinidad leída: {current}"))
+    return results
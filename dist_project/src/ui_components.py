@@ -7,6 +7,7 @@ from tkinter import ttk, messagebox, scrolledtext
 import psutil
 import time
 from icon_utils import icon_manager, create_labeled_button, create_labeled_label
+from process_view import VirtualProcessList
 
 class UIComponents:
     def setup_ui(self, manager):
@@ -159,21 +160,11 @@ class UIComponents:
         ttk.Button(process_controls_frame, text="Actualizar Lista", 
                   command=manager.refresh_process_list).grid(row=1, column=0, sticky=(tk.W, tk.E))
         
-        # Treeview de procesos
+        # Lista de procesos virtualizada (solo las filas visibles existen en el widget)
         columns = ('PID', 'Nombre', 'CPU%', 'Memoria')
-        manager.process_tree = ttk.Treeview(parent_frame, columns=columns, show='headings', height=25)
-        
-        for col, width in zip(columns, [90, 300, 90, 120]):
-            manager.process_tree.heading(col, text=col)
-            manager.process_tree.column(col, width=width, minwidth=70)
-        
+        manager.process_tree = VirtualProcessList(parent_frame, columns, [90, 300, 90, 120])
         manager.process_tree.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
-        manager.process_tree.bind('<<TreeviewSelect>>', manager.on_process_select)
-        
-        # Scrollbar
-        scrollbar = ttk.Scrollbar(parent_frame, orient=tk.VERTICAL, command=manager.process_tree.yview)
-        scrollbar.grid(row=1, column=1, sticky=(tk.N, tk.S))
-        manager.process_tree.configure(yscrollcommand=scrollbar.set)
+        manager.process_tree.bind('<<ProcessSelect>>', manager.on_process_select)
 
     def setup_affinity_control_frame(self, manager, parent_frame):
         """Configura el frame de control de afinidad"""
@@ -199,7 +190,8 @@ class UIComponents:
         labels = [
             ("Proceso Seleccionado:", "selected_process_label", "Ninguno"),
             ("PID:", "pid_label", "-"),
-            ("Afinidad Actual:", "current_affinity_label", "-")
+            ("Afinidad Actual:", "current_affinity_label", "-"),
+            ("Hilos:", "threads_label", "-")
         ]
         
         for row, (text, attr, default) in enumerate(labels):
@@ -211,6 +203,20 @@ class UIComponents:
         
         manager.selected_process_label.configure(foreground='blue')
         
+        # Afinidad por hilo: reglas "nombre o TID=CPUs" separadas por ';'
+        thread_frame = ttk.LabelFrame(right_frame, text="Afinidad por Hilo", padding="8")
+        thread_frame.grid(row=1, column=0, sticky=(tk.W, tk.E), pady=(0, 15))
+        thread_frame.columnconfigure(0, weight=1)
+        
+        manager.thread_rules_var = tk.StringVar()
+        ttk.Entry(thread_frame, textvariable=manager.thread_rules_var).grid(
+            row=0, column=0, sticky=(tk.W, tk.E), padx=(0, 5))
+        manager.apply_threads_btn = ttk.Button(thread_frame, text="Aplicar a Hilos",
+                                               command=manager.apply_thread_rules, state='disabled')
+        manager.apply_threads_btn.grid(row=0, column=1)
+        ttk.Label(thread_frame, text="Ej: net*=2,3; 4321=0-1", font=('Arial', 8)).grid(
+            row=1, column=0, columnspan=2, sticky=tk.W, pady=(3, 0))
+        
         # Frame de selección de CPUs
         wrench_icon = icon_manager.get_icon_for_emoji("🔧", (16, 16))
         if wrench_icon:
@@ -232,7 +238,7 @@ class UIComponents:
             var = tk.BooleanVar()
             manager.cpu_vars.append(var)
             
-            checkbox = ttk.Checkbutton(cpu_frame, text=f"CPU {i}", variable=var)
+            checkbox = ttk.Checkbutton(cpu_frame, text=manager.topology.label(i), variable=var)
             row = i // cols
             col = i % cols
             checkbox.grid(row=row, column=col, sticky=tk.W, padx=8, pady=5)
@@ -249,6 +255,21 @@ class UIComponents:
         create_labeled_button(cpu_button_frame, "❌ Deseleccionar Todas", 
                             command=manager.deselect_all_cpus).grid(row=0, column=1, padx=(5, 0), sticky=(tk.W, tk.E))
         
+        # Selección por topología (núcleos físicos, nodo NUMA, dominio L3) o selector escrito a mano
+        ttk.Label(cpu_button_frame, text="Topología:").grid(row=1, column=0, sticky=tk.W, pady=(8, 0))
+        manager.cpu_selector_var = tk.StringVar()
+        topology_combo = ttk.Combobox(cpu_button_frame, textvariable=manager.cpu_selector_var,
+                                      values=[label for label, _ in manager.topology.choices()])
+        topology_combo.grid(row=2, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(3, 0))
+        topology_combo.bind('<<ComboboxSelected>>', manager.on_topology_select)
+        topology_combo.bind('<Return>', manager.on_topology_select)
+        
+        # Aplicar también a los procesos hijos del proceso seleccionado
+        manager.apply_tree_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(cpu_button_frame, text="Incluir procesos hijos (árbol completo)",
+                        variable=manager.apply_tree_var).grid(row=3, column=0, columnspan=2,
+                                                              sticky=tk.W, pady=(8, 0))
+        
         # Botones principales
         manager.apply_btn = create_labeled_button(right_frame, "🚀 Aplicar Afinidad", 
                                                 command=manager.apply_affinity, state='disabled')
@@ -263,6 +284,11 @@ class UIComponents:
                                                       command=manager.show_create_task_dialog, state='disabled')
         manager.create_task_btn.grid(row=5, column=0, pady=(0, 10), sticky=(tk.W, tk.E))
 
+    def topology_selector(self, manager, text: str) -> str:
+        """Selector de topología a partir de la etiqueta elegida o del texto escrito"""
+        text = text.strip()
+        return dict(manager.topology.choices()).get(text, text)
+
     def setup_tasks_tab(self, manager):
         """Configura la pestaña de tareas automatizadas"""
         tasks_frame = ttk.Frame(manager.notebook)
@@ -506,6 +532,8 @@ class UIComponents:
             ("Hotkeys Activos:", "active_hotkeys_label", "0"),
             ("Última Activación:", "last_activation_label", "Ninguna"),
             ("Errores de Captura:", "capture_errors_label", "0"),
+            ("Cola de Tareas:", "dispatch_queue_label", "0"),
+            ("Latencia de Tareas:", "dispatch_latency_label", "-"),
         ]
         
         for row, (text, attr, default) in enumerate(info_labels):
@@ -634,6 +662,7 @@ class UIComponents:
             ("Tiempo sin Captura:", "last_capture_label", "0s"),
             ("Intentos de Recuperación:", "recovery_attempts_label", "0"),
             ("Última Recuperación:", "last_recovery_label", "Nunca"),
+            ("Latencia de Entrega:", "delivery_latency_label", "-"),
         ]
         
         for row, (text, attr, default) in enumerate(monitor_labels):
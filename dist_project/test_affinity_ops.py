@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Prueba de los lotes de afinidad con procesos falsos
+Umbral de fallos, reversión y selectores por nombre sin procesos
+"""
+
+import os
+import sys
+
+import psutil
+
+# Agregar el directorio src al path para importar los módulos
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from affinity_ops import (STATUS_ACCESS_DENIED, STATUS_GONE, STATUS_NOT_FOUND, STATUS_OK,
+                          apply_affinity_batch)
+
+
+class FakeProcess:
+    """Proceso con afinidad en memoria; fail es la excepción que lanza al cambiarla"""
+
+    def __init__(self, pid, affinity, fail=None):
+        self.pid = pid
+        self.affinity = list(affinity)
+        self.fail = fail
+
+    def cpu_affinity(self, cpus=None):
+        if cpus is None:
+            return list(self.affinity)
+        if self.fail is not None:
+            raise self.fail(self.pid)
+        self.affinity = list(cpus)
+
+
+def test_rollback_over_threshold():
+    ok = [FakeProcess(pid, [0, 1, 2, 3]) for pid in (1, 2)]
+    denied = FakeProcess(3, [0, 1, 2, 3], fail=psutil.AccessDenied)
+    result = apply_affinity_batch([(proc, [0]) for proc in ok + [denied]], failure_threshold=0.2)
+
+    # 1 fallo de 3 supera el 20 %: los dos procesos cambiados vuelven a su afinidad anterior
+    assert [change.status for change in result.changes] == [STATUS_OK, STATUS_OK, STATUS_ACCESS_DENIED]
+    assert result.rolled_back
+    assert [item.status for item in result.rollback] == [STATUS_OK, STATUS_OK]
+    assert all(proc.affinity == [0, 1, 2, 3] for proc in ok)
+
+    # El mismo lote con un 50 % tolerado se conserva
+    result = apply_affinity_batch([(proc, [0]) for proc in ok + [denied]], failure_threshold=0.5)
+    assert not result.rolled_back and result.rollback == []
+    assert all(proc.affinity == [0] for proc in ok)
+    print("✅ Lote revertido al superar el umbral de fallos")
+
+
+def test_gone_not_counted():
+    ok = FakeProcess(1, [0, 1])
+    gone = [FakeProcess(pid, [0, 1], fail=psutil.NoSuchProcess) for pid in (2, 3, 4)]
+    result = apply_affinity_batch([(proc, [1]) for proc in [ok] + gone], failure_threshold=0.0)
+
+    # Los procesos que terminaron durante el lote no son fallos y no provocan reversión
+    assert [change.status for change in result.changes] == [STATUS_OK] + [STATUS_GONE] * 3
+    assert result.failures == [] and not result.rolled_back
+    assert ok.affinity == [1]
+    print("✅ Procesos terminados excluidos del umbral")
+
+
+def test_names_not_found():
+    procs = {"juego.exe": [FakeProcess(10, [0, 1]), FakeProcess(11, [0, 1])]}
+    calls = []
+
+    def resolve_names(names):
+        calls.append(set(names))
+        return {name: procs.get(name, []) for name in names}
+
+    changes = [("juego.exe", [1]), ("noexiste.exe", [1]), ("juego.exe", [0])]
+    result = apply_affinity_batch(changes, failure_threshold=0.5, resolve_names=resolve_names)
+
+    # Todos los nombres se resuelven de una vez y el que no tiene procesos se informa como fallo
+    assert calls == [{"juego.exe", "noexiste.exe"}]
+    not_found = [change for change in result.changes if change.status == STATUS_NOT_FOUND]
+    assert [change.detail for change in not_found] == ["noexiste.exe"]
+    assert result.failures == not_found
+    assert not result.rolled_back  # 1 de 5 no supera el 50 %
+
+    result = apply_affinity_batch([("noexiste.exe", [1])], resolve_names=resolve_names)
+    assert [change.status for change in result.changes] == [STATUS_NOT_FOUND] and result.rolled_back
+    print("✅ Nombres sin procesos informados como no encontrados")
+
+
+if __name__ == "__main__":
+    test_rollback_over_threshold()
+    test_gone_not_counted()
+    test_names_not_found()
+    print("✅ Prueba completada")
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Prueba del backend de cpuset de cgroup v2
+Usa un cgroupfs falso (ficheros normales en un directorio temporal) en lugar de /sys/fs/cgroup
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+
+# Agregar el directorio src al path para importar los módulos
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from affinity_ops import STATUS_OK
+from cgroup_cpuset import CgroupCpusetBackend, CgroupUnavailable
+from cpu_topology import format_cpu_list, parse_cpu_list
+
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(text)
+
+
+def read(path):
+    with open(path, 'r') as f:
+        return f.read().strip()
+
+
+def make_cgroupfs(root, controllers="cpuset cpu io memory"):
+    """Raíz cgroup v2 mínima: controladores disponibles y subtree_control vacío"""
+    write(os.path.join(root, "cgroup.controllers"), controllers + "\n")
+    write(os.path.join(root, "cgroup.subtree_control"), "")
+
+
+def make_proc(proc_root, cgroups):
+    """/proc falso: pid (o "self") -> ruta cgroup v2"""
+    for pid, path in cgroups.items():
+        write(os.path.join(proc_root, str(pid), "cgroup"), f"0::{path}\n")
+
+
+class FakeKernelBackend(CgroupCpusetBackend):
+    """Imita al núcleo: un proceso solo está en un cgroup.procs y rmdir borra el grupo entero"""
+
+    def _move(self, pid, group):
+        for dirpath, _, files in os.walk(self.root):
+            if "cgroup.procs" in files:
+                procs_file = os.path.join(dirpath, "cgroup.procs")
+                lines = [line for line in read(procs_file).split() if line != str(pid)]
+                write(procs_file, "".join(f"{line}\n" for line in lines))
+        super()._move(pid, group)
+        write(os.path.join(self.proc_root, str(pid), "cgroup"),
+              f"0::/{os.path.relpath(group, self.root)}\n")
+
+    def _remove_group(self, path):
+        shutil.rmtree(path)
+
+
+def test_format_cpu_list():
+    assert format_cpu_list([0, 2, 3, 4, 7]) == "0,2-4,7"
+    assert format_cpu_list([5, 1, 1]) == "1,5"
+    for text in ("0", "0-3", "1,3,5-6,8-15"):
+        assert format_cpu_list(parse_cpu_list(text)) == text
+    print("✅ Listas de CPUs en formato cpuset")
+
+
+def test_group_pinning():
+    with tempfile.TemporaryDirectory() as root:
+        make_cgroupfs(root)
+        backend = CgroupCpusetBackend(root, proc_root=os.path.join(root, "proc"))
+        assert backend.available()
+        assert read(os.path.join(root, "cgroup.subtree_control")) == "+cpuset"
+
+        task_id = "juego/steam 1"
+        group = backend.group_path(task_id)
+        assert os.path.dirname(group) == backend.managed_path
+        assert os.path.basename(group) == "task-juego_steam_1"
+
+        results = backend.apply(task_id, [101, 102], [0, 1, 2, 3])
+        assert [result.status for result in results] == [STATUS_OK, STATUS_OK]
+        assert read(os.path.join(group, "cpuset.cpus")) == "0-3"
+        assert backend.members(task_id) == [101, 102]
+
+        # Un cambio de perfil es una escritura en cpuset.cpus; los PIDs ya agrupados no se reescriben
+        backend.set_cpus(task_id, [4, 6])
+        backend.attach(task_id, [101, 102, 103])
+        assert read(os.path.join(group, "cpuset.cpus")) == "4,6"
+        assert backend.members(task_id) == [101, 102, 103]
+
+        assert backend.effective_cpus(task_id) is None
+        write(os.path.join(group, "cpuset.cpus.effective"), "4,6\n")
+        assert backend.effective_cpus(task_id) == [4, 6]
+    print("✅ Procesos agrupados y cambio de CPUs con una escritura")
+
+
+def test_fallback():
+    with tempfile.TemporaryDirectory() as root:
+        # Jerarquía v1 (sin cgroup.controllers)
+        backend = CgroupCpusetBackend(root)
+        assert not backend.available()
+        try:
+            backend.set_cpus("tarea", [0])
+        except CgroupUnavailable:
+            pass
+        else:
+            raise AssertionError("Sin cgroup v2 set_cpus debería fallar")
+
+    with tempfile.TemporaryDirectory() as root:
+        # v2 sin el controlador cpuset
+        make_cgroupfs(root, "cpu io memory")
+        assert not CgroupCpusetBackend(root).available()
+    print("✅ Sin cgroup v2 con cpuset se usa la afinidad por proceso")
+
+
+def test_delegated_base():
+    with tempfile.TemporaryDirectory() as root:
+        # Sesión de systemd: la aplicación vive en un scope dentro de app.slice
+        make_cgroupfs(root)
+        app_slice = os.path.join(root, "user.slice", "user@1000.service", "app.slice")
+        make_cgroupfs(app_slice)
+        proc_root = os.path.join(root, "proc")
+        make_proc(proc_root, {"self": "/user.slice/user@1000.service/app.slice/app-affinity.scope"})
+
+        backend = CgroupCpusetBackend(root, proc_root=proc_root)
+        assert backend.available()
+        assert backend.managed_path == os.path.join(app_slice, "process-affinity")
+        assert read(os.path.join(app_slice, "cgroup.subtree_control")) == "+cpuset"
+        assert read(os.path.join(root, "cgroup.subtree_control")) == ""
+
+    with tempfile.TemporaryDirectory() as root:
+        # El cgroup delegado no tiene cpuset: se recurre a la raíz
+        make_cgroupfs(root)
+        app_slice = os.path.join(root, "app.slice")
+        make_cgroupfs(app_slice, "cpu memory")
+        proc_root = os.path.join(root, "proc")
+        make_proc(proc_root, {"self": "/app.slice/app-affinity.scope"})
+        backend = CgroupCpusetBackend(root, proc_root=proc_root)
+        assert backend.available() and backend.managed_path == os.path.join(root, "process-affinity")
+    print("✅ Grupo gestionado bajo el cgroup delegado de la aplicación")
+
+
+def test_restore_origins():
+    with tempfile.TemporaryDirectory() as root:
+        make_cgroupfs(root)
+        proc_root = os.path.join(root, "proc")
+        make_proc(proc_root, {"self": "/", 101: "/user.slice/a.scope", 102: "/user.slice/b.scope"})
+        for scope in ("a.scope", "b.scope"):
+            write(os.path.join(root, "user.slice", scope, "cgroup.procs"), "")
+
+        backend = FakeKernelBackend(root, proc_root=proc_root)
+        backend.apply("tarea", [101, 102], [0, 1])
+        assert backend.members("tarea") == [101, 102]
+
+        # Soltar un proceso lo devuelve a su cgroup original; el grupo sigue con el otro
+        backend.detach("tarea", [101])
+        assert read(os.path.join(root, "user.slice", "a.scope", "cgroup.procs")) == "101"
+        assert backend.members("tarea") == [102]
+
+        # Soltarlos todos vacía y borra el grupo
+        results = backend.detach("tarea")
+        assert [result.status for result in results] == [STATUS_OK]
+        assert read(os.path.join(root, "user.slice", "b.scope", "cgroup.procs")) == "102"
+        assert not os.path.exists(backend.group_path("tarea"))
+
+        # Grupo cuyos procesos terminaron: se borra al podar con la siguiente instantánea
+        backend.apply("tarea", [101], [0])
+        write(os.path.join(backend.group_path("tarea"), "cgroup.procs"), "")
+        backend.prune({102})
+        assert not os.path.exists(backend.group_path("tarea"))
+    print("✅ Procesos devueltos a su cgroup original y grupos vacíos eliminados")
+
+
+if __name__ == "__main__":
+    test_format_cpu_list()
+    test_group_pinning()
+    test_delegated_base()
+    test_restore_origins()
+    test_fallback()
+    print("✅ Prueba completada")
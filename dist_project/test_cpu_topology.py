@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Prueba del modelo de topología de CPU
+Construye un /sys/devices/system/cpu falso (2 sockets, 2 nodos NUMA, SMT) y resuelve selectores
+"""
+
+import os
+import sys
+import tempfile
+
+# Agregar el directorio src al path para importar los módulos
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from cpu_topology import CpuTopology
+
+# 2 sockets x 4 núcleos x 2 hilos; como en Linux, los hermanos SMT son i e i+8
+SOCKETS = 2
+CORES_PER_SOCKET = 4
+LOGICAL = SOCKETS * CORES_PER_SOCKET * 2
+
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(text + "\n")
+
+
+def make_sysfs(root):
+    """Árbol sysfs mínimo: online, topology/*, cache/index3 y node*/cpulist"""
+    cpu_root = os.path.join(root, "cpu")
+    node_root = os.path.join(root, "node")
+    half = LOGICAL // 2
+    write(os.path.join(cpu_root, "online"), f"0-{LOGICAL - 1}")
+    for cpu in range(LOGICAL):
+        primary = cpu % half
+        socket = primary // CORES_PER_SOCKET
+        topo = os.path.join(cpu_root, f"cpu{cpu}", "topology")
+        write(os.path.join(topo, "physical_package_id"), str(socket))
+        write(os.path.join(topo, "core_id"), str(primary % CORES_PER_SOCKET))
+        write(os.path.join(topo, "thread_siblings_list"), f"{primary},{primary + half}")
+        socket_cpus = f"{socket * CORES_PER_SOCKET}-{(socket + 1) * CORES_PER_SOCKET - 1}"
+        smt_cpus = f"{half + socket * CORES_PER_SOCKET}-{half + (socket + 1) * CORES_PER_SOCKET - 1}"
+        l2 = os.path.join(cpu_root, f"cpu{cpu}", "cache", "index2")
+        write(os.path.join(l2, "level"), "2")
+        write(os.path.join(l2, "shared_cpu_list"), f"{primary},{primary + half}")
+        l3 = os.path.join(cpu_root, f"cpu{cpu}", "cache", "index3")
+        write(os.path.join(l3, "level"), "3")
+        write(os.path.join(l3, "shared_cpu_list"), f"{socket_cpus},{smt_cpus}")
+    for socket in range(SOCKETS):
+        cpus = [c for c in range(LOGICAL) if (c % half) // CORES_PER_SOCKET == socket]
+        write(os.path.join(node_root, f"node{socket}", "cpulist"), ",".join(map(str, cpus)))
+    return cpu_root, node_root
+
+
+def test_sysfs_topology():
+    with tempfile.TemporaryDirectory() as root:
+        topology = CpuTopology.from_sysfs(*make_sysfs(root))
+
+    assert len(topology) == LOGICAL
+    assert topology.has_smt()
+    assert topology.siblings(1) == [1, 9]
+    assert topology.resolve("physical") == list(range(8))
+    assert topology.resolve("smt") == list(range(8, 16))
+    assert topology.resolve("node:1") == [4, 5, 6, 7, 12, 13, 14, 15]
+    assert topology.resolve("node:1 & physical") == [4, 5, 6, 7]
+    assert topology.resolve("l3:0 & physical | cpus:15") == [0, 1, 2, 3, 15]
+    assert topology.resolve("core:5") == [5, 13]
+    labels = [selector for _, selector in topology.choices()]
+    assert "node:1 & physical" in labels and "l3:1" in labels
+    print(f"✅ Topología sysfs: {len(topology)} CPUs, opciones: {len(labels)}")
+
+
+def test_fallback_topology():
+    topology = CpuTopology.from_counts(8, 4)
+    assert topology.siblings(2) == [2, 3]
+    assert topology.resolve("physical") == [0, 2, 4, 6]
+    assert CpuTopology.from_counts(6, 4).resolve("physical") == list(range(6))
+    print("✅ Topología deducida sin sysfs")
+
+
+def test_invalid_selector():
+    topology = CpuTopology.from_counts(4, 4)
+    for selector in ("numa1", "node:x", "cpus:"):
+        try:
+            topology.resolve(selector)
+        except ValueError:
+            continue
+        raise AssertionError(f"El selector '{selector}' debería ser rechazado")
+    print("✅ Selectores no válidos rechazados")
+
+
+if __name__ == "__main__":
+    test_sysfs_topology()
+    test_fallback_topology()
+    test_invalid_selector()
+    print("✅ Prueba completada")
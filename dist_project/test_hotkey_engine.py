@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Prueba del motor de hotkeys con el backend de entrada falso
+Reproduce secuencias guionizadas sin teclado real ni librerías de hook
+"""
+
+import os
+import sys
+import threading
+import time
+import types
+
+# Agregar el directorio src al path para importar los módulos
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from hotkey_dispatch import HotkeyDispatcher
+from hotkey_engine import HotkeyEngine
+from hotkey_watchdog import STATE_FAILED, STATE_HEALTHY, STATE_RECOVERED, HotkeyWatchdog
+from input_backends import (EvdevBackend, FakeBackend, KeyEvent, combo_events, create_backend,
+                            evdev_key_name, script_events)
+
+
+def make_engine():
+    backend = FakeBackend()
+    engine = HotkeyEngine(backend)
+    engine.start()
+    return engine, backend
+
+
+def test_combos():
+    engine, backend = make_engine()
+    fired = []
+    engine.update({
+        "ctrl+alt+f1": lambda: fired.append("f1"),
+        "Control+Shift+A": lambda: fired.append("a"),
+    })
+
+    assert backend.press("ctrl+alt+f1")
+    assert backend.press("left ctrl+right shift+a")  # Alias de los modificadores
+    assert not backend.press("ctrl+f1")
+    assert fired == ["f1", "a"]
+
+    # Solo se suprime la pulsación que completa la combinación, no las liberaciones
+    events = combo_events("ctrl+alt+f1")
+    assert [backend.feed(event) for event in events] == [False, False, True, False, False, False]
+
+    # Cada autorepetición de la última tecla vuelve a disparar el hotkey
+    fired.clear()
+    assert backend.replay(combo_events("ctrl+alt+f1", repeats=3)) == 4
+    assert fired == ["f1"] * 4
+    assert engine.keys_down() == 0
+    print("✅ Combinaciones, alias y autorepetición")
+
+
+def test_dialog_key_names():
+    engine, backend = make_engine()
+    fired = []
+    # Hotkeys tal como los guarda TaskDialog.get_key_str -> teclas tal como las entrega keyboard
+    cases = [
+        ("ctrl+pageup", ["ctrl", "page up"]),
+        ("ctrl+pagedown", ["ctrl", "page down"]),
+        ("alt+capslock", ["alt", "caps lock"]),
+        ("ctrl+printscreen", ["ctrl", "print screen"]),
+        ("ctrl+numlock", ["ctrl", "num lock"]),
+        ("ctrl+scrolllock", ["ctrl", "scroll lock"]),
+        ("ctrl+escape", ["ctrl", "esc"]),
+        ("ctrl+shift+!", ["ctrl", "shift", "!"]),
+        ("ctrl+shift+1", ["ctrl", "shift", "!"]),
+        ("alt+shift+?", ["alt", "shift", "/"]),
+    ]
+    for hotkey, keys in cases:
+        engine.update({hotkey: (lambda hotkey=hotkey: fired.append(hotkey))})
+        events = [KeyEvent(key, True, 0.0) for key in keys] + [KeyEvent(key, False, 0.0) for key in reversed(keys)]
+        assert backend.replay(events) == 1, hotkey
+        engine.unregister(hotkey)
+    assert fired == [hotkey for hotkey, _ in cases]
+    print("✅ Nombres de tecla del diálogo y símbolos con shift")
+
+
+def test_prefix_suppression():
+    engine, backend = make_engine()
+    fired = []
+    engine.register("z+x", lambda: fired.append("zx"))
+
+    # La "z" se retiene y la combinación completa no deja pasar ninguna pulsación
+    events = combo_events("z+x")
+    assert [backend.feed(event) for event in events] == [True, True, False, False]
+    assert fired == ["zx"] and backend.injected == []
+
+    # "z" sola: se retiene y al soltarla se reinyecta pulsación + liberación
+    assert backend.feed(KeyEvent("z", True, 0.0))
+    assert backend.feed(KeyEvent("z", True, 0.1))  # Autorepetición retenida
+    assert backend.feed(KeyEvent("z", False, 0.2))
+    assert [(event.name, event.down) for event in backend.injected] == [("z", True), ("z", False)]
+
+    # "z" y luego otra tecla: se reinyectan en orden
+    backend.injected.clear()
+    assert backend.feed(KeyEvent("z", True, 0.0))
+    assert backend.feed(KeyEvent("a", True, 0.1))
+    assert [(event.name, event.down) for event in backend.injected] == [("z", True), ("a", True)]
+    assert not backend.feed(KeyEvent("a", False, 0.2)) and not backend.feed(KeyEvent("z", False, 0.3))
+    assert engine.keys_down() == 0
+
+    # Con modificadores solo se retiene la tecla normal una vez pulsados todos ellos
+    engine.register("ctrl+z+x", lambda: fired.append("ctrl+zx"))
+    events = combo_events("ctrl+z+x")
+    assert [backend.feed(event) for event in events][:3] == [False, True, True]
+    assert fired[-1] == "ctrl+zx"
+
+    # Backend cuyas reinyecciones vuelven a pasar por el hook (librería keyboard)
+    class EchoBackend(FakeBackend):
+        echoes_injected = True
+
+    echo = EchoBackend()
+    engine = HotkeyEngine(echo)
+    engine.register("z+x", lambda: fired.append("echo"))
+    engine.start()
+    assert echo.feed(KeyEvent("z", True, 0.0)) and echo.feed(KeyEvent("z", False, 0.1))
+    replayed, echo.injected = echo.injected, []
+    assert [echo.feed(event) for event in replayed] == [False, False]
+    assert engine.keys_down() == 0 and echo.injected == [] and "echo" not in fired
+    print("✅ Teclas iniciales de una combinación retenidas y reinyectadas")
+
+
+def test_replay_script():
+    engine, backend = make_engine()
+    engine.update({f"ctrl+alt+f{i}": (lambda: None) for i in range(1, 13)})
+
+    script = ["ctrl+alt+f3", "a", "b", "ctrl+alt+f12", "ctrl+z", "ctrl+alt+f7"]
+    events = script_events(script, start=100.0, interval=0.001)
+    assert events[0].time == 100.0
+    assert abs(events[-1].time - (100.0 + (len(events) - 1) * 0.001)) < 1e-9
+
+    suppressed = backend.replay(events, repeat=1000)
+    assert suppressed == 3000
+    assert engine.matches == 3000
+    assert engine.events == backend.delivered == len(events) * 1000
+
+    # Tras parar el hook los eventos se ignoran
+    engine.stop()
+    assert not backend.feed(KeyEvent("a", True, 0.0))
+    assert backend.delivered == len(events) * 1000
+    print("✅ Guion reproducido 1000 veces con resultados deterministas")
+
+
+def test_dispatch_throughput():
+    engine, backend = make_engine()
+    executed = []
+    dispatcher = HotkeyDispatcher(executed.append, max_pending=10000, history_size=10000, cooldown=0.0)
+    dispatcher.start()
+    engine.update({f"ctrl+alt+f{i}": (lambda i=i: dispatcher.submit(f"task{i}")) for i in range(1, 5)})
+
+    events = script_events([f"ctrl+alt+f{i % 4 + 1}" for i in range(2000)])
+    start = time.perf_counter()
+    backend.replay(events)
+    while dispatcher.completed < dispatcher.submitted:
+        time.sleep(0.001)
+    elapsed = time.perf_counter() - start
+    dispatcher.stop()
+
+    assert engine.matches == 2000
+    assert dispatcher.submitted + dispatcher.coalesced == 2000
+    assert set(executed) == {f"task{i}" for i in range(1, 5)}
+    print(f"✅ {len(events)} eventos -> {dispatcher.completed} tareas ejecutadas "
+          f"({dispatcher.coalesced} agrupadas) en {elapsed * 1000:.1f} ms")
+
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        assert time.perf_counter() < deadline, "tiempo de espera agotado"
+        time.sleep(0.001)
+
+
+def test_dispatch_cooldown():
+    now = [100.0]
+    executed = []
+    dispatcher = HotkeyDispatcher(executed.append, cooldown=1.0, clock=lambda: now[0])
+
+    assert dispatcher.submit("a")
+    wait_until(lambda: dispatcher.completed == 1)
+
+    # Segunda activación dentro del enfriamiento: se agrupa con la anterior
+    now[0] = 100.5
+    assert not dispatcher.submit("a")
+    assert dispatcher.coalesced == 1 and dispatcher.submitted == 1
+
+    # Otra tarea no comparte el enfriamiento; pasado el plazo la primera vuelve a ejecutarse
+    assert dispatcher.submit("b")
+    now[0] = 101.0
+    assert dispatcher.submit("a")
+    wait_until(lambda: dispatcher.completed == 3)
+    assert executed == ["a", "b", "a"] and dispatcher.coalesced == 1
+
+    # Un enfriamiento propio de la tarea sustituye al del despachador
+    now[0] = 101.5
+    assert dispatcher.submit("a", cooldown=0.2)
+    wait_until(lambda: dispatcher.completed == 4)
+    dispatcher.stop()
+    print("✅ Activaciones dentro del enfriamiento agrupadas")
+
+
+def test_dispatch_backpressure():
+    release = threading.Event()
+    running = threading.Event()
+    rejected = []
+
+    def run_job(task_id):
+        running.set()
+        release.wait(2.0)
+
+    dispatcher = HotkeyDispatcher(run_job, max_pending=1, on_rejected=rejected.append, clock=lambda: 0.0)
+    assert dispatcher.submit("a")
+    assert running.wait(2.0)  # "a" está en curso y la cola vacía
+
+    # Mientras "a" sigue en curso se agrupan sus repeticiones; la cola admite un trabajo más
+    assert not dispatcher.submit("a") and dispatcher.coalesced == 1
+    assert dispatcher.submit("b")
+    assert not dispatcher.submit("c")
+    assert [job.task_id for job in rejected] == ["c"] and dispatcher.rejected == 1
+
+    # Una tarea rechazada no queda marcada como pendiente
+    release.set()
+    wait_until(lambda: dispatcher.completed == 2)
+    assert dispatcher.submit("c")
+    wait_until(lambda: dispatcher.completed == 3)
+    dispatcher.stop()
+    print("✅ Cola llena: el trabajo se rechaza sin bloquear")
+
+
+def test_idle_probe():
+    engine, backend = make_engine()
+    engine.register("ctrl+alt+f1", lambda: None)
+    states = []
+    watchdog = HotkeyWatchdog(engine, [("reinstalar el hook", engine.restart)], stall_timeout=0.1,
+                              probe_interval=0.0, on_change=lambda state, reason: states.append(state))
+    watchdog.attach()
+
+    # La sonda llega al hook y el motor la consume sin contarla como tecla pulsada
+    watchdog.probe()
+    assert watchdog.state == STATE_HEALTHY and engine.keys_down() == 0 and engine.matches == 0
+
+    # El hook muere con el teclado inactivo: la siguiente sonda no llega y se reinstala
+    backend.dead = True
+    watchdog.probe()
+    time.sleep(0.3)
+    assert watchdog.state == STATE_RECOVERED and watchdog.stalls == 1
+    assert not backend.dead
+
+    watchdog.probe()
+    assert watchdog.state == STATE_HEALTHY and watchdog.attempts == 0
+    assert states == [STATE_HEALTHY, "recovering", STATE_RECOVERED, STATE_HEALTHY]
+
+    # El backend avisa de la muerte de su hook sin sondeo
+    backend._report_dead("el hilo del hook terminó")
+    assert watchdog.state == STATE_RECOVERED and watchdog.stalls == 2
+    watchdog.detach()
+    assert backend.on_dead is None
+    print("✅ Hook muerto en reposo detectado por la sonda y reinstalado")
+
+
+def test_failing_recovery_steps():
+    engine, _ = make_engine()
+    calls = []
+
+    def broken(step):
+        def action():
+            calls.append(step)
+            raise OSError("el backend no arranca")
+        return action
+
+    watchdog = HotkeyWatchdog(engine, [("reinstalar", broken("reinstalar")), ("reconstruir", broken("reconstruir"))],
+                              max_attempts=3)
+    watchdog.attach()
+
+    # Un paso que lanza escala al siguiente y, agotados los intentos, queda en "failed"
+    watchdog.stall("sin eventos")
+    assert calls == ["reinstalar", "reconstruir", "reconstruir"]
+    assert watchdog.state == STATE_FAILED and watchdog.attempts == 3
+    watchdog.detach()
+    print("✅ Pasos de recuperación fallidos escalan hasta 'failed'")
+
+
+def test_backend_factory():
+    assert isinstance(create_backend("fake"), FakeBackend)
+    assert create_backend(" Evdev ").name == "evdev"
+    try:
+        create_backend("pynput")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("Un backend desconocido debería fallar")
+
+    # Nombres de evdev -> nombres de la librería keyboard
+    ecodes = types.SimpleNamespace(
+        KEY={29: 'KEY_LEFTCTRL', 30: 'KEY_A', 59: 'KEY_F1', 113: ['KEY_MIN_INTERESTING', 'KEY_MUTE'],
+             152: ['KEY_COFFEE', 'KEY_SCREENLOCK']},
+        BTN={},
+    )
+    names = [evdev_key_name(ecodes, code) for code in (29, 30, 59, 113, 152)]
+    assert names == ['ctrl', 'a', 'f1', 'mute', 'coffee']
+    print("✅ Selección de backend y nombres de evdev")
+
+
+def test_evdev_forwarding():
+    ecodes = types.SimpleNamespace(EV_SYN=0, EV_KEY=1, KEY={30: 'KEY_A', 59: 'KEY_F1'}, BTN={})
+
+    class Event(types.SimpleNamespace):
+        def timestamp(self):
+            return self.sec
+
+    class UInput:
+        def __init__(self):
+            self.written = []
+
+        def write_event(self, event):
+            self.written.append((event.type, event.code, event.value))
+
+        def syn(self):
+            self.written.append((ecodes.EV_SYN, 0, 0))
+
+    backend = EvdevBackend(suppress=True)
+    assert not EvdevBackend().suppress  # Sin captura exclusiva por defecto (necesita /dev/uinput)
+    backend._uinput = uinput = UInput()
+    backend._handler = lambda event: event.name == "f1" and event.down
+    names = {}
+    for event_type, code, value in ((1, 30, 1), (0, 0, 0), (1, 59, 1), (0, 0, 0), (1, 59, 0), (0, 0, 0)):
+        backend._on_event(ecodes, names, Event(type=event_type, code=code, value=value, sec=1.0))
+
+    # La pulsación del hotkey no se reenvía y cada SYN_REPORT se escribe una sola vez
+    assert uinput.written == [(1, 30, 1), (0, 0, 0), (0, 0, 0), (1, 59, 0), (0, 0, 0)]
+    print("✅ Reenvío por uinput sin SYN_REPORT duplicados")
+
+
+if __name__ == "__main__":
+    test_combos()
+    test_dialog_key_names()
+    test_prefix_suppression()
+    test_replay_script()
+    test_dispatch_throughput()
+    test_dispatch_cooldown()
+    test_dispatch_backpressure()
+    test_idle_probe()
+    test_failing_recovery_steps()
+    test_backend_factory()
+    test_evdev_forwarding()
+    print("✅ Prueba completada")
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Prueba del motor de reglas de procesos
+Patrones exactos, glob y re:, reutilización de PID y poda de la caché de veredictos
+"""
+
+import os
+import sys
+
+import psutil
+
+# Agregar el directorio src al path para importar los módulos
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from process_rules import RuleSet, compile_task_rule
+from process_snapshot import CpuTracker, NameTable, SnapshotBuilder
+
+
+def build_snapshot(names, rows):
+    """rows: (pid, nombre, create_time[, ppid])"""
+    builder = SnapshotBuilder(names)
+    for pid, name, create_time, *ppid in rows:
+        builder.add(pid, name, create_time, 0.0, 0, ppid[0] if ppid else 0)
+    return builder.build(CpuTracker(), 1.0)
+
+
+def pids(matches):
+    return [pid for pid, _ in matches]
+
+
+def test_patterns():
+    rule_set = RuleSet.from_tasks({
+        "exacto": {'process_name': "Game.exe"},
+        "glob": {'process_name': "chrome*.exe"},
+        "regex": {'process_name': r"re:(steam|epic)\w*\.exe"},
+        "invalida": {'process_name': "re:(sin cerrar"},
+    })
+    assert len(rule_set) == 3  # La regex no válida se descarta
+
+    snapshot = build_snapshot(NameTable(), [
+        (10, "game.exe", 1.0), (11, "GAME.EXE", 1.0), (12, "game.exe.bak", 1.0),
+        (20, "chrome.exe", 1.0), (21, "chrome_helper.exe", 1.0), (22, "mychrome.exe", 1.0),
+        (30, "steam.exe", 1.0), (31, "EpicLauncher.exe", 1.0), (32, "steam.exe.old", 1.0),
+    ])
+    assert pids(rule_set.find(snapshot, "exacto")) == [10, 11]
+    assert pids(rule_set.find(snapshot, "glob")) == [20, 21]
+    assert pids(rule_set.find(snapshot, "regex")) == [30, 31]
+    assert rule_set.find(snapshot, "invalida") == []
+    assert rule_set.match(snapshot, snapshot.index_of(12)) == ()
+    print("✅ Patrones exactos, glob y re:")
+
+
+def test_unnamed_rules_rejected():
+    # Sin nombre habría que leer los detalles de todos los procesos
+    try:
+        compile_task_rule("t", {'process_name': "", 'match': {'user': "root"}})
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("Una regla sin nombre con otros criterios debería fallar")
+    assert compile_task_rule("t", {'process_name': ""}) is None
+    assert len(RuleSet.from_tasks({"t": {'process_name': "", 'match': {'cmdline': "x"}}})) == 0
+    print("✅ Reglas sin nombre de proceso rechazadas")
+
+
+def test_pid_reuse():
+    names = NameTable()
+    rule_set = RuleSet.from_tasks({"juego": {'process_name': "juego.exe"}})
+    first = build_snapshot(names, [(100, "juego.exe", 1.0)])
+    assert rule_set.find(first, "juego") == [(100, 1.0)]
+
+    # El mismo PID ahora es otro proceso: el veredicto en caché no se reutiliza
+    second = build_snapshot(names, [(100, "notepad.exe", 2.0)])
+    assert rule_set.find(second, "juego") == []
+    assert rule_set.match(second, 0) == ()
+
+    # Criterios de detalle: con un create_time distinto el proceso real no se da por bueno
+    me = psutil.Process()
+    rule_set = RuleSet.from_tasks({"yo": {'process_name': me.name(), 'match': {'cmdline': "test_process_rules"}}})
+    real = build_snapshot(names, [(me.pid, me.name(), me.create_time())])
+    assert rule_set.find(real, "yo") == [(me.pid, me.create_time())]
+    reused = build_snapshot(names, [(me.pid, me.name(), me.create_time() + 1.0)])
+    assert rule_set.find(reused, "yo") == []
+    print("✅ Veredictos invalidados al reutilizarse un PID")
+
+
+def test_prune():
+    names = NameTable()
+    rule_set = RuleSet.from_tasks({"juego": {'process_name': "juego.exe"}})
+    many = build_snapshot(names, [(pid, "juego.exe", 1.0) for pid in range(1, 201)])
+    assert len(rule_set.find(many, "juego")) == 200
+    assert len(rule_set._verdicts) == 200
+
+    # Una caché pequeña respecto a la instantánea no se recorre
+    few = build_snapshot(names, [(pid, "juego.exe", 1.0) for pid in range(1, 101)])
+    rule_set.prune(few)
+    assert len(rule_set._verdicts) == 200
+
+    # Con muchos más veredictos que procesos vivos se descartan los de procesos terminados
+    tiny = build_snapshot(names, [(1, "juego.exe", 1.0), (2, "juego.exe", 5.0)])
+    rule_set.prune(tiny)
+    assert set(rule_set._verdicts) == {(1, 1.0)}
+    print("✅ Poda de veredictos de procesos terminados")
+
+
+if __name__ == "__main__":
+    test_patterns()
+    test_unnamed_rules_rejected()
+    test_pid_reuse()
+    test_prune()
+    print("✅ Prueba completada")
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Prueba del cambio automático de perfil
+Decisiones con histéresis y permanencia mínima, y confirmación del perfil solo tras aplicarlo
+"""
+
+import os
+import sys
+import types
+
+# Agregar el directorio src al path para importar los módulos
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from profile_switcher import (PROFILE_HIGH, PROFILE_LOW, AutoProfileConfig, AutoProfileState,
+                              ProfileSwitcher, decide)
+
+CONFIG = AutoProfileConfig([0, 1, 2, 3], [4, 5], high_threshold=60.0, low_threshold=20.0,
+                           core_threshold=85.0, min_dwell=30.0)
+
+
+def test_decide_hysteresis():
+    # Primera decisión: según el umbral alto
+    assert decide(AutoProfileState(), 70.0, 0.0, CONFIG, 1000.0) == PROFILE_HIGH
+    assert decide(AutoProfileState(), 40.0, 0.0, CONFIG, 1000.0) == PROFILE_LOW
+
+    # Entre los dos umbrales no se cambia en ningún sentido
+    low = AutoProfileState(PROFILE_LOW, since=0.0)
+    high = AutoProfileState(PROFILE_HIGH, since=0.0)
+    for load in (21.0, 40.0, 59.0):
+        assert decide(low, load, 0.0, CONFIG, 1000.0) is None
+        assert decide(high, load, 0.0, CONFIG, 1000.0) is None
+    assert decide(low, 60.0, 0.0, CONFIG, 1000.0) == PROFILE_HIGH
+    assert decide(high, 20.0, 0.0, CONFIG, 1000.0) == PROFILE_LOW
+
+    # Núcleos del perfil bajo saturados: sube si el proceso está activo, no si está en reposo
+    assert decide(low, 30.0, 90.0, CONFIG, 1000.0) == PROFILE_HIGH
+    assert decide(low, 10.0, 90.0, CONFIG, 1000.0) is None
+    print("✅ Histéresis entre los umbrales alto y bajo")
+
+
+def test_decide_min_dwell():
+    state = AutoProfileState(PROFILE_LOW, since=1000.0)
+    assert decide(state, 95.0, 0.0, CONFIG, 1029.9) is None
+    assert decide(state, 95.0, 0.0, CONFIG, 1030.0) == PROFILE_HIGH
+
+    # Tras un intento fallido sin perfil previo también se espera min_dwell
+    failed = AutoProfileState(None, since=1000.0)
+    assert decide(failed, 95.0, 0.0, CONFIG, 1010.0) is None
+    assert decide(failed, 95.0, 0.0, CONFIG, 1031.0) == PROFILE_HIGH
+    print("✅ Permanencia mínima en cada perfil")
+
+
+class FakeProcess:
+    def __init__(self, pid, create_time):
+        self.pid = pid
+        self.create_time = create_time
+
+
+class FakeTaskManager:
+    """Lo mínimo que usa ProfileSwitcher: procesos por (pid, create_time) y el lote de afinidad"""
+
+    def __init__(self, alive, rolled_back=False):
+        self.alive = alive
+        self.rolled_back = rolled_back
+        self.batches = []
+        self.automated_tasks = {"t": {'process_name': "juego.exe", 'use_cgroup': False}}
+
+    def _get_processes(self, keys):
+        return [FakeProcess(pid, create_time) for pid, create_time in keys
+                if self.alive.get(pid) == create_time]
+
+    def verify_process(self, proc):
+        return self.alive.get(proc.pid) == proc.create_time
+
+    def apply_affinity_batch(self, changes, failure_threshold=0.0):
+        self.batches.append([(proc.pid, cpus) for proc, cpus in changes])
+        return types.SimpleNamespace(rolled_back=self.rolled_back)
+
+    def log_message(self, message, level="info"):
+        pass
+
+
+def make_switcher(task_manager, state):
+    switcher = ProfileSwitcher(task_manager)
+    switcher._configs = {"t": CONFIG}
+    switcher._states = {"t": state}
+    return switcher
+
+
+def test_switch_commits_only_on_success():
+    # PID 11 fue reutilizado por otro proceso: no se toca
+    manager = FakeTaskManager({10: 1.0, 11: 9.0})
+    state = AutoProfileState(PROFILE_LOW, since=0.0)
+    state.pending = PROFILE_HIGH
+    switcher = make_switcher(manager, state)
+    switcher._switch("t", PROFILE_HIGH, [(10, 1.0), (11, 2.0)], 90.0, 0.0, 500.0)
+    assert manager.batches == [[(10, [0, 1, 2, 3])]]
+    assert state.profile == PROFILE_HIGH and state.since == 500.0 and state.pending is None
+    assert switcher.switches == 1
+
+    # Lote revertido: se conserva el perfil anterior y se espera min_dwell antes de reintentar
+    manager = FakeTaskManager({10: 1.0}, rolled_back=True)
+    state = AutoProfileState(PROFILE_LOW, since=0.0)
+    state.pending = PROFILE_HIGH
+    switcher = make_switcher(manager, state)
+    switcher._switch("t", PROFILE_HIGH, [(10, 1.0)], 90.0, 0.0, 500.0)
+    assert state.profile == PROFILE_LOW and state.pending is None and state.since == 500.0
+    assert switcher.switches == 0
+    assert decide(state, 90.0, 0.0, CONFIG, 510.0) is None
+
+    # Ningún proceso sigue vivo: no hay lote y el perfil no cambia
+    manager = FakeTaskManager({})
+    state = AutoProfileState(PROFILE_LOW, since=0.0)
+    switcher = make_switcher(manager, state)
+    switcher._switch("t", PROFILE_HIGH, [(10, 1.0)], 90.0, 0.0, 500.0)
+    assert manager.batches == [] and state.profile == PROFILE_LOW
+    print("✅ El perfil solo se confirma tras aplicar el lote")
+
+
+if __name__ == "__main__":
+    test_decide_hysteresis()
+    test_decide_min_dwell()
+    test_switch_commits_only_on_success()
+    print("✅ Prueba completada")
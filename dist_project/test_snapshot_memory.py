@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Prueba de memoria de las instantáneas de procesos
+Compara con tracemalloc la instantánea columnar con la representación anterior: un
+psutil.Process por proceso con su diccionario info, indexados por fila del Treeview
+"""
+
+import os
+import sys
+import random
+import tracemalloc
+
+import psutil
+
+# Agregar el directorio src al path para importar los módulos
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from process_snapshot import CpuTracker, NameTable, SnapshotBuilder
+
+PROCESS_COUNT = 5000
+
+# Tipo de memory_info() en esta plataforma (pmem)
+MemoryInfo = type(psutil.Process().memory_info())
+
+
+def make_samples(count):
+    """Datos crudos tal como llegan de psutil (se generan fuera de la medición)"""
+    random.seed(count)
+    names = [f"proceso_{i}.exe" for i in range(300)]
+    return [
+        (pid, random.choice(names), 1700000000.0 + pid, random.random() * 100, random.randint(1, 1 << 30))
+        for pid in range(4, 4 + count * 4, 4)
+    ]
+
+
+def make_legacy_process(pid, name, create_time, rss):
+    """psutil.Process tal como lo deja process_iter(['pid', 'name', 'cpu_percent', 'memory_info'])
+
+    Los PIDs de la prueba no existen, así que se crea sin comprobarlos y se rellenan los
+    mismos atributos que psutil guarda para un proceso real.
+    """
+    proc = psutil.Process.__new__(psutil.Process)
+    proc._init(pid, _ignore_nsp=True)
+    proc._gone = False
+    proc._name = name
+    proc._create_time = create_time
+    proc._ident = (pid, create_time)
+    proc.info = {
+        'pid': pid,
+        'name': name,
+        'cpu_percent': 0.0,
+        'memory_info': MemoryInfo._make([rss] + [0] * (len(MemoryInfo._fields) - 1)),
+    }
+    return proc
+
+
+def build_legacy(samples):
+    """Representación anterior de refresh_process_list: id de fila -> psutil.Process
+
+    Incluye la caché PID -> Process que process_iter conserva entre llamadas.
+    """
+    process_list = {}
+    pmap = {}
+    for row, (pid, name, create_time, cpu_time, rss) in enumerate(samples, 1):
+        proc = make_legacy_process(pid, name, create_time, rss)
+        pmap[pid] = proc
+        process_list[f"I{row:03X}"] = proc
+    return process_list, pmap
+
+
+def build_columnar(samples, names):
+    builder = SnapshotBuilder(names)
+    for pid, name, create_time, cpu_time, rss in samples:
+        builder.add(pid, name, create_time, cpu_time, rss)
+    snapshot = builder.build(CpuTracker(), 2.0)
+    snapshot.search_index
+    return snapshot
+
+
+def measure(build):
+    """Memoria retenida y número de bloques vivos creados por una llamada"""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = build()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, 'filename')
+    size = sum(stat.size_diff for stat in stats)
+    blocks = sum(stat.count_diff for stat in stats)
+    return result, size, blocks
+
+
+def test_snapshot_memory():
+    samples = make_samples(PROCESS_COUNT)
+
+    # Los nombres ya registrados se comparten entre instantáneas en ambos casos
+    names = NameTable()
+    for sample in samples:
+        names.intern(sample[1])
+
+    legacy, legacy_size, legacy_blocks = measure(lambda: build_legacy(samples))
+    columnar, columnar_size, columnar_blocks = measure(lambda: build_columnar(samples, names))
+
+    assert len(legacy[0]) == len(columnar) == PROCESS_COUNT
+    assert columnar.get(samples[10][0]).name == samples[10][1]
+    assert columnar_size * 10 <= legacy_size, \
+        f"La instantánea columnar debería ocupar 10 veces menos ({columnar_size} B frente a {legacy_size} B)"
+    assert columnar_blocks * 10 <= legacy_blocks, \
+        f"La instantánea columnar debería asignar 10 veces menos bloques ({columnar_blocks} frente a {legacy_blocks})"
+
+
+if __name__ == "__main__":
+    test_snapshot_memory()
+    print("✅ Prueba completada")
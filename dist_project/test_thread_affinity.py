@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Prueba de la afinidad por hilo
+Interpretación de reglas, selección de hilos y resultados en sistemas sin soporte o sin verificación
+"""
+
+import os
+import sys
+
+# Agregar el directorio src al path para importar los módulos
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+import thread_affinity
+from affinity_ops import STATUS_OK, STATUS_UNSUPPORTED
+from thread_affinity import (ThreadInfo, ThreadRule, apply_thread_rules, format_thread_rules,
+                             match_threads, parse_thread_rules)
+
+
+def test_parse_thread_rules():
+    rules = parse_thread_rules("net*=2,3; 1234=0-1\n render = 4")
+    assert rules == [ThreadRule("net*", [2, 3]), ThreadRule("1234", [0, 1]), ThreadRule("render", [4])]
+    assert parse_thread_rules(format_thread_rules(rules)) == rules
+    assert parse_thread_rules(" ; \n") == []
+    for text in ("net*", "=1", "net*=", "net*=a-b"):
+        try:
+            parse_thread_rules(text)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"'{text}' debería ser una regla no válida")
+    print("✅ Reglas de hilo interpretadas y validadas")
+
+
+def test_match_threads():
+    threads = [ThreadInfo(100, "main"), ThreadInfo(101, "NetWorker"), ThreadInfo(102, "net-io"),
+               ThreadInfo(1234, "render")]
+    rules = parse_thread_rules("net*=2; 1234=0-1; net-io=3")
+    plan = [(thread.tid, cpus) for thread, cpus in match_threads(threads, rules)]
+    # Patrón sin distinguir mayúsculas, TID exacto y, si hay varias reglas, gana la última
+    assert plan == [(101, [2]), (102, [3]), (1234, [0, 1])]
+    assert match_threads(threads, parse_thread_rules("99=0")) == []
+    print("✅ Selección de hilos por nombre y TID")
+
+
+def test_unsupported_and_unverified():
+    set_affinity, get_affinity = thread_affinity.set_thread_affinity, thread_affinity.get_thread_affinity
+    tid = os.getpid()
+    rules = [ThreadRule(str(tid), [0])]
+    try:
+        # Sistema sin afinidad por hilo: no soportado, no un error
+        thread_affinity.set_thread_affinity = lambda tid, cpus: STATUS_UNSUPPORTED
+        results = apply_thread_rules(tid, rules)
+        assert [result.status for result in results] == [STATUS_UNSUPPORTED]
+
+        # Sin lectura de la afinidad (Windows): aplicado con la verificación omitida
+        thread_affinity.set_thread_affinity = lambda tid, cpus: STATUS_OK
+        thread_affinity.get_thread_affinity = lambda tid: None
+        results = apply_thread_rules(tid, rules)
+        assert [result.status for result in results] == [STATUS_OK]
+        assert results[0].verified is None and results[0].verification_skipped
+    finally:
+        thread_affinity.set_thread_affinity, thread_affinity.get_thread_affinity = set_affinity, get_affinity
+
+    if hasattr(os, 'sched_getaffinity'):
+        # Con relectura real la verificación se hace
+        current = sorted(os.sched_getaffinity(tid))
+        results = apply_thread_rules(tid, [ThreadRule(str(tid), current)])
+        assert results[0].verified is True and not results[0].verification_skipped
+    print("✅ Sin soporte o sin verificación se informa como tal")
+
+
+if __name__ == "__main__":
+    test_parse_thread_rules()
+    test_match_threads()
+    test_unsupported_and_unverified()
+    print("✅ Prueba completada")